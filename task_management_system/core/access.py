@@ -0,0 +1,109 @@
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Value
+
+from core.constants import PROJECT_ACCESS_CACHE_TIMEOUT
+from .models import Project
+
+REQUEST_ACCESS_ATTR = "_project_access"
+
+
+class ProjectAccess(NamedTuple):
+    """
+    Ids of the projects a user has created and the projects
+    the user is a member of
+    """
+
+    created: frozenset
+    member: frozenset
+
+    @property
+    def all(self):
+        return self.created | self.member
+
+
+def _cache_key(user_id):
+    return f"core:project-access:{user_id}"
+
+
+def _project_access_query(user_id):
+    """
+    Created and member project ids of the user as a single query
+    """
+    created_ids = (
+        Project.objects.filter(created_by_id=user_id)
+        .annotate(kind=Value("created"))
+        .values_list("id", "kind")
+    )
+    member_ids = (
+        Project.members.through.objects.filter(user_id=user_id)
+        .annotate(kind=Value("member"))
+        .values_list("project_id", "kind")
+    )
+    return created_ids.union(member_ids, all=True)
+
+
+def _build_project_access(rows):
+    created, member = set(), set()
+    for project_id, kind in rows:
+        (created if kind == "created" else member).add(project_id)
+    return ProjectAccess(frozenset(created), frozenset(member))
+
+
+def _load_project_access(user_id):
+    return _build_project_access(_project_access_query(user_id))
+
+
+def get_project_access(user, request=None):
+    """
+    Return the ProjectAccess of the user.
+    The result is memoized on the request (if given) and cached across
+    requests until the user's memberships change.
+    """
+    memo = None
+    if request is not None:
+        memo = request.__dict__.setdefault(REQUEST_ACCESS_ATTR, {})
+        if user.pk in memo:
+            return memo[user.pk]
+    key = _cache_key(user.pk)
+    access = cache.get(key)
+    if access is None:
+        access = _load_project_access(user.pk)
+        cache.set(key, access, PROJECT_ACCESS_CACHE_TIMEOUT)
+    if memo is not None:
+        memo[user.pk] = access
+    return access
+
+
+async def aget_project_access(user, request=None):
+    """
+    Async version of get_project_access sharing the same request memo and cache
+    """
+    memo = None
+    if request is not None:
+        memo = request.__dict__.setdefault(REQUEST_ACCESS_ATTR, {})
+        if user.pk in memo:
+            return memo[user.pk]
+    key = _cache_key(user.pk)
+    access = await cache.aget(key)
+    if access is None:
+        rows = [row async for row in _project_access_query(user.pk)]
+        access = _build_project_access(rows)
+        await cache.aset(key, access, PROJECT_ACCESS_CACHE_TIMEOUT)
+    if memo is not None:
+        memo[user.pk] = access
+    return access
+
+
+def invalidate_project_access(*user_ids):
+    """
+    Drop the cached ProjectAccess of the given users, now and again once
+    the transaction commits: until then, concurrent requests still read
+    the previous memberships and may cache them again
+    """
+    keys = [_cache_key(user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
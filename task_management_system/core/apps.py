@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from core import signals  # noqa: F401
+        from core.permissions import compile_permissions
+
+        # rest_framework_roles, installed before core, has patched the views
+        compile_permissions()
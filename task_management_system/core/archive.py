@@ -0,0 +1,171 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import DateTimeField, Q, Value
+from django.utils import timezone
+
+from core.cache import bump_generations
+from core.constants import ARCHIVE_AFTER_DAYS, ARCHIVE_CHUNK_SIZE, TaskStatusChoices
+from core.counters import apply_deltas, task_batch_deltas
+from core.events import publish_change
+from core.search import index_objects, remove_objects
+from core.sync import (
+    COMMENT,
+    COMMENT_SCOPE,
+    TASK,
+    TASK_SCOPE,
+    comment_tombstone,
+    scope_of,
+    task_tombstone,
+)
+from .models import ArchivedComment, ArchivedTask, Comment, Task, Tombstone
+
+# Moving rows between the live and archive tables applies the side effects
+# of the signals (counters, search index, sync tombstones, list cache and
+# event streams) once per batch instead of once per row.
+
+
+def copy_as(model, obj):
+    """
+    Unsaved ``model`` instance with the column values of ``obj`` that the
+    model shares, primary key included
+    """
+    names = {field.attname for field in obj._meta.concrete_fields}
+    return model(
+        **{
+            field.attname: getattr(obj, field.attname)
+            for field in model._meta.concrete_fields
+            if field.attname in names
+        }
+    )
+
+
+def copy_rows(queryset, model):
+    """
+    Copy the rows of the queryset to the table of ``model`` with a single
+    INSERT ... SELECT, for the columns the models share, setting
+    ``archived_at`` to now
+    """
+    names = {field.attname for field in queryset.model._meta.concrete_fields}
+    fields = [field for field in model._meta.concrete_fields if field.attname in names]
+    rows = queryset.annotate(
+        archived_at=Value(timezone.now(), output_field=DateTimeField())
+    ).values_list(*(field.attname for field in fields), "archived_at")
+    select, params = rows.query.sql_with_params()
+    quote = connection.ops.quote_name
+    columns = [field.column for field in fields] + ["archived_at"]
+    columns = ", ".join(quote(column) for column in columns)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) {select}", params
+        )
+
+
+def insert_rows(model, objs):
+    """
+    bulk_create keeping the created_at of the objects, which auto_now_add
+    replaces; updated_at becomes now
+    """
+    created_at = [obj.created_at for obj in objs]
+    model.objects.bulk_create(objs)
+    for obj, value in zip(objs, created_at):
+        obj.created_at = value
+    model.objects.bulk_update(objs, ["created_at"])
+
+
+def delete_rows(queryset):
+    """
+    DELETE without loading the rows or sending the delete signals
+    """
+    return queryset._raw_delete(queryset.db)
+
+
+def changed_tasks(tasks, action):
+    bump_generations(
+        [task.project_id_id for task in tasks],
+        [pk for task in tasks for pk in (task.assigned_to_id, task.created_by_id)],
+    )
+    for task in tasks:
+        publish_change(task, action)
+
+
+def archive_chunk(before, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """
+    Move up to ``chunk_size`` done tasks last updated before ``before``, and
+    their comments, to the archive tables in one transaction. The tasks are
+    locked so that no comment is added to them meanwhile. Returns the
+    numbers of tasks and comments moved.
+    """
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update()
+            .filter(status=TaskStatusChoices.DONE, updated_at__lt=before)
+            .order_by("updated_at", "pk")[:chunk_size]
+        )
+        if not tasks:
+            return 0, 0
+        task_ids = [task.pk for task in tasks]
+        comments = Comment.objects.filter(task_id__in=task_ids)
+        copy_rows(Task.objects.filter(pk__in=task_ids), ArchivedTask)
+        copy_rows(comments, ArchivedComment)
+        # The side effects only need the columns of the comment scope
+        comments = list(comments.only("project_id", "task_id"))
+        delete_rows(Comment.objects.filter(task_id__in=task_ids))
+        delete_rows(Task.objects.filter(pk__in=task_ids))
+
+        apply_deltas(task_batch_deltas(tasks, comments, -1))
+        remove_objects(Task, tasks)
+        remove_objects(Comment, comments)
+        Tombstone.objects.bulk_create(
+            [
+                *(
+                    task_tombstone(task.pk, scope_of(task, TASK_SCOPE))
+                    for task in tasks
+                ),
+                *(
+                    comment_tombstone(comment.pk, scope_of(comment, COMMENT_SCOPE))
+                    for comment in comments
+                ),
+            ]
+        )
+        changed_tasks(tasks, "archived")
+    return len(tasks), len(comments)
+
+
+def archive_tasks(days=ARCHIVE_AFTER_DAYS, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """
+    Archive the done tasks not updated for ``days`` chunk by chunk, yielding
+    the numbers of tasks and comments moved by each chunk
+    """
+    before = timezone.now() - timedelta(days=days)
+    while True:
+        moved = archive_chunk(before, chunk_size)
+        if not moved[0]:
+            return
+        yield moved
+
+
+def restore_task(archived):
+    """
+    Move an archived task and its comments back to the live tables. They
+    count as updated now, so that the sync feed sends them again, and their
+    tombstones are dropped. Returns the restored task.
+    """
+    with transaction.atomic():
+        archived_comments = list(archived.comments.all())
+        task = copy_as(Task, archived)
+        comments = [copy_as(Comment, comment) for comment in archived_comments]
+        insert_rows(Task, [task])
+        insert_rows(Comment, comments)
+        ArchivedComment.objects.filter(task_id=archived.pk).delete()
+        ArchivedTask.objects.filter(pk=archived.pk).delete()
+
+        apply_deltas(task_batch_deltas([task], comments, 1))
+        index_objects(Task, [task])
+        index_objects(Comment, comments)
+        Tombstone.objects.filter(
+            Q(kind=TASK, object_id=task.pk)
+            | Q(kind=COMMENT, object_id__in=[comment.pk for comment in comments])
+        ).delete()
+        changed_tasks([task], "restored")
+    return task
@@ -0,0 +1,311 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage, Paginator
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.access import aget_project_access
+from core.authentication import StatelessJWTAuthentication
+from core.cache import acached_list
+from core.constants import (
+    ADMIN,
+    CLIENT,
+    DEVELOPER,
+    EVENT_KEEPALIVE_SECONDS,
+    EVENT_RETRY_MILLISECONDS,
+    EVENT_STREAM_MAX_SECONDS,
+    PAGE_SIZE,
+    PROJECT_MANAGER,
+    TECH_LEAD,
+)
+from .events import ALL_PROJECTS, OVERFLOW, broker
+from .models import Comment, Project, Task, User
+from .pagination import InvalidCursor, KeysetPaginator
+from .planning import plan_queryset
+from .search import search
+from .serializers import (
+    CommentSerializer,
+    CustomUserDetailsSerializer,
+    ProjectSerializer,
+    TaskSerializer,
+)
+from .views import CommentViewSet, ProjectViewSet, TaskViewSet, UserViewSet
+
+ALL_ROLES = (ADMIN, PROJECT_MANAGER, TECH_LEAD, DEVELOPER, CLIENT)
+
+
+class AsyncModelView(View):
+    """
+    Async read-only counterpart of a ModelViewSet for ASGI deployments:
+    ``GET`` lists the objects visible to the caller with the same pagination,
+    search and list cache as the viewset, and ``GET <pk>`` retrieves one.
+
+    Requests are authenticated with JWT only. The roles allowed to list and
+    retrieve are those the compiled view_permissions of ``viewset`` grant
+    the action to, and objects are filtered, and looked up with their
+    ``is_visible`` flag, by the visible_to rules of the model, so both
+    follow the viewset.
+    """
+
+    http_method_names = ["get", "options"]
+    model = None
+    serializer_class = None
+    basename = None
+    keyset_field = "created_at"
+    search_kind = None
+    viewset = None
+    authenticator = StatelessJWTAuthentication()
+
+    def render(self, data, status=200):
+        response = JsonResponse(data, encoder=JSONEncoder, safe=False, status=status)
+        response.data = data
+        return response
+
+    def error(self, detail, status):
+        return self.render({"detail": detail}, status)
+
+    async def authenticate(self, request, action):
+        """
+        Set request.user from the JWT, or return the error response when the
+        token is invalid or the role may not perform the action
+        """
+        try:
+            result = await self.authenticator.aauthenticate(request)
+        except AuthenticationFailed as e:
+            detail = e.detail
+            data = detail if isinstance(detail, (list, dict)) else {"detail": detail}
+            return self.render(data, e.status_code)
+        if result is None or result[0].role not in self.allowed_roles(action):
+            return self.error("Permission denied for user.", 403)
+        request.user = result[0]
+        return None
+
+    def allowed_roles(self, action):
+        """
+        Roles with a rule other than False for the action in the viewset,
+        which for lists and lookups leaves the objects to visible_to
+        """
+        return {
+            role
+            for (name, role), granted in self.viewset.permission_table.items()
+            if name == action and granted is not False
+        }
+
+    async def get(self, request, pk=None):
+        action = "list" if pk is None else "retrieve"
+        error = await self.authenticate(request, action)
+        if error is not None:
+            return error
+        if pk is None:
+            return await self.list(request)
+        return await self.retrieve(request, pk)
+
+    async def get_access(self, request):
+        user = request.user
+        if user.role == ADMIN:
+            return None
+        return await aget_project_access(user, request)
+
+    async def retrieve(self, request, pk):
+        # Not gathered with the lookup: the is_visible condition of the
+        # lookup is built from the access, which is usually a cache hit
+        access = await self.get_access(request)
+        queryset = plan_queryset(self.model.objects.all(), self.serializer_class)
+        queryset = queryset.filter(pk=pk).with_visibility(
+            request.user, "retrieve", access=access
+        )
+        obj = await queryset.afirst()
+        if obj is None:
+            return self.error(
+                f"No {self.model._meta.object_name} matches the given query.", 404
+            )
+        if not obj.is_visible:
+            return self.error("Permission denied for user.", 403)
+        return self.render(self.serializer_class(obj).data)
+
+    async def get_list_queryset(self, request):
+        access = await self.get_access(request)
+        return self.model.objects.visible_to(request.user, "list", access=access)
+
+    @acached_list
+    async def list(self, request):
+        queryset = await self.get_list_queryset(request)
+        return await self.paginated_response(request, queryset)
+
+    async def paginated_response(self, request, queryset):
+        queryset = plan_queryset(queryset, self.serializer_class)
+        query = request.GET.get("search", "").strip()
+        if query and self.search_kind:
+            return await self.search_response(request, queryset, query)
+        if "cursor" in request.GET:
+            return await self.cursor_response(request, queryset)
+        queryset = queryset.order_by(self.keyset_field, "pk")
+        paginator = Paginator(queryset, PAGE_SIZE)
+        paginator.count = await queryset.acount()
+        try:
+            page = paginator.page(request.GET.get("page", 1))
+        except InvalidPage:
+            return self.error("page is not valid", 400)
+        objects = [obj async for obj in page.object_list]
+        return self.render(self.serializer_class(objects, many=True).data)
+
+    async def search_response(self, request, queryset, query):
+        ids = await sync_to_async(search)(self.search_kind, query, queryset)
+        try:
+            page_ids = Paginator(ids, PAGE_SIZE).page(request.GET.get("page", 1))
+        except InvalidPage:
+            return self.error("page is not valid", 400)
+        objects = await queryset.ain_bulk(page_ids.object_list)
+        results = [objects[pk] for pk in page_ids.object_list if pk in objects]
+        return self.render(self.serializer_class(results, many=True).data)
+
+    async def cursor_response(self, request, queryset):
+        paginator = KeysetPaginator(queryset, self.keyset_field, PAGE_SIZE)
+        try:
+            page = await paginator.apage(request.GET.get("cursor"))
+        except InvalidCursor:
+            return self.error("cursor is not valid", 400)
+        data = {
+            "next": page.next_cursor,
+            "previous": page.previous_cursor,
+            "results": self.serializer_class(page.object_list, many=True).data,
+        }
+        if request.GET.get("count", "").lower() in ("1", "true"):
+            data["count"] = await queryset.acount()
+        return self.render(data)
+
+
+class AsyncUserView(AsyncModelView):
+    model = User
+    serializer_class = CustomUserDetailsSerializer
+    basename = "async-user"
+    keyset_field = "date_joined"
+    viewset = UserViewSet
+
+
+class AsyncProjectView(AsyncModelView):
+    model = Project
+    serializer_class = ProjectSerializer
+    basename = "async-project"
+    search_kind = "project"
+    viewset = ProjectViewSet
+
+    async def get_list_queryset(self, request):
+        projects = await super().get_list_queryset(request)
+        name = request.GET.get("name", "").strip()
+        if name:
+            projects = projects.filter(name__icontains=name)
+        return projects
+
+
+class AsyncTaskView(AsyncModelView):
+    model = Task
+    serializer_class = TaskSerializer
+    basename = "async-task"
+    search_kind = "task"
+    viewset = TaskViewSet
+
+    async def get_list_queryset(self, request):
+        tasks = await super().get_list_queryset(request)
+        title = request.GET.get("title", "").strip()
+        if title:
+            tasks = tasks.filter(title__icontains=title)
+        return tasks
+
+
+class AsyncCommentView(AsyncModelView):
+    model = Comment
+    serializer_class = CommentSerializer
+    basename = "async-comment"
+    search_kind = "comment"
+    viewset = CommentViewSet
+
+
+class EventStreamView(AsyncModelView):
+    """
+    Server-sent events stream of the task and comment changes of the
+    projects visible to the caller, all of them or those given as
+    ``?projects=<id>,<id>``. Admins without ``?projects=`` get the changes
+    of every project.
+
+    Clients reconnecting with ``Last-Event-ID`` (or ``?last_event_id=``)
+    first get the events they missed, or a ``reset`` event when those are
+    no longer buffered and the client must refetch. Streams not keeping up
+    with their events are ended so that they resume the same way, and
+    every stream ends after EVENT_STREAM_MAX_SECONDS to check the
+    memberships again on reconnect.
+    """
+
+    model = Project
+    basename = "events"
+
+    def allowed_roles(self, action):
+        return ALL_ROLES
+
+    async def get(self, request):
+        error = await self.authenticate(request, "stream")
+        if error is not None:
+            return error
+        last_event_id = request.headers.get(
+            "Last-Event-ID", request.GET.get("last_event_id")
+        )
+        try:
+            project_ids = {
+                int(pk) for pk in request.GET.get("projects", "").split(",") if pk
+            }
+            if last_event_id is not None:
+                last_event_id = int(last_event_id)
+        except ValueError:
+            return self.error("projects and last_event_id must be integers", 400)
+
+        if project_ids or request.user.role != ADMIN:
+            visible = Project.objects.visible_to(
+                request.user, "retrieve", access=await self.get_access(request)
+            )
+            if project_ids:
+                visible = visible.filter(pk__in=project_ids)
+            visible_ids = {pk async for pk in visible.values_list("pk", flat=True)}
+            if project_ids - visible_ids:
+                return self.error("Permission denied for user.", 403)
+            project_ids = visible_ids
+        else:
+            project_ids = {ALL_PROJECTS}
+
+        subscriber, replay = broker.subscribe(project_ids, last_event_id)
+        response = StreamingHttpResponse(
+            self.stream(subscriber, replay), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, subscriber, replay):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + EVENT_STREAM_MAX_SECONDS
+        try:
+            yield f"retry: {EVENT_RETRY_MILLISECONDS}\n\n"
+            if replay is None:
+                yield f"id: {subscriber.last_id}\nevent: reset\ndata: {{}}\n\n"
+            elif replay:
+                for event in replay:
+                    yield event.encode()
+            else:
+                # Lets clients that got no event yet resume from here
+                yield f"id: {subscriber.last_id}\n\n"
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    event = await asyncio.wait_for(
+                        subscriber.queue.get(),
+                        min(EVENT_KEEPALIVE_SECONDS, remaining),
+                    )
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is OVERFLOW:
+                    return
+                yield event.encode()
+        finally:
+            broker.unsubscribe(subscriber)
@@ -0,0 +1,141 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# Stored for deleted users so that their tokens are rejected without a query
+DELETED_STATE = {"role": None, "is_active": False}
+
+
+def _auth_state_key(user_id):
+    return f"core:auth:{user_id}"
+
+
+def _store_auth_state(user_id, state):
+    """
+    Drop the cached state now and record ``state`` once the transaction
+    commits, so that a rolled back change is never cached, while the state
+    that concurrent requests reload in the meantime is overwritten
+    """
+    key = _auth_state_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(
+        lambda: cache.set(key, state, settings.AUTH_STATE_CACHE_TIMEOUT)
+    )
+
+
+def set_auth_state(user):
+    """
+    Record the current role and active flag of the user
+    """
+    _store_auth_state(user.pk, {"role": user.role, "is_active": user.is_active})
+
+
+def revoke_auth_state(user_id):
+    _store_auth_state(user_id, DELETED_STATE)
+
+
+def _auth_state_query(user_id):
+    return get_user_model().objects.filter(pk=user_id).values("role", "is_active")
+
+
+def get_auth_state(user_id):
+    """
+    Return the role and active flag of the user, reading the database only
+    when the state is not cached
+    """
+    key = _auth_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = _auth_state_query(user_id).first() or DELETED_STATE
+        cache.set(key, state, settings.AUTH_STATE_CACHE_TIMEOUT)
+    return state
+
+
+async def aget_auth_state(user_id):
+    key = _auth_state_key(user_id)
+    state = await cache.aget(key)
+    if state is None:
+        state = await _auth_state_query(user_id).afirst() or DELETED_STATE
+        await cache.aset(key, state, settings.AUTH_STATE_CACHE_TIMEOUT)
+    return state
+
+
+class LazyUser(SimpleLazyObject):
+    """
+    Stand-in for the authenticated user which answers id, role and the
+    authentication flags from the token and only loads the user row when
+    any other attribute is used
+    """
+
+    def __init__(self, user_id, role):
+        user_model = get_user_model()
+        super().__init__(lambda: user_model.objects.get(pk=user_id))
+        # Written to __dict__ directly, setattr() would load the user
+        self.__dict__.update(
+            id=user_id,
+            pk=user_id,
+            role=role,
+            is_active=True,
+            is_authenticated=True,
+            is_anonymous=False,
+        )
+
+    @property
+    def __class__(self):
+        return get_user_model()
+
+    def __eq__(self, other):
+        if isinstance(other, (LazyUser, get_user_model())):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __bool__(self):
+        return True
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that does not fetch the user row on every request.
+    The role comes from the cached auth state so that role changes and
+    deactivations apply to tokens issued before them.
+    """
+
+    def get_user_id(self, validated_token):
+        try:
+            return int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidToken("Token contained no recognizable user identification")
+
+    def user_from_state(self, user_id, state):
+        if state["role"] is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not state["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return LazyUser(user_id, state["role"])
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        return self.user_from_state(user_id, get_auth_state(user_id))
+
+    async def aauthenticate(self, request):
+        """
+        Async version of authenticate() for plain Django async views
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user_id = self.get_user_id(validated_token)
+        state = await aget_auth_state(user_id)
+        return self.user_from_state(user_id, state), validated_token
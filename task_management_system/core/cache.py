@@ -0,0 +1,203 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from core.access import get_project_access
+from core.constants import ADMIN, LIST_CACHE_ALIAS, LIST_CACHE_TIMEOUT
+
+GLOBAL_GENERATION = "core:gen:all"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def project_generation(project_id):
+    return f"core:gen:project:{project_id}"
+
+
+def user_generation(user_id):
+    return f"core:gen:user:{user_id}"
+
+
+def get_generations(keys):
+    """
+    Return the current value of the given generation counters.
+    Missing counters are seeded with the current time so that an evicted
+    counter never comes back with a value that was already used.
+    """
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return generations
+
+
+def bump_generations(project_ids=(), user_ids=()):
+    """
+    Invalidate the cached lists depending on the given projects and users,
+    now and again once the transaction commits: until then, concurrent
+    requests still read the previous rows and may cache them under the
+    new generations
+    """
+    keys = [GLOBAL_GENERATION]
+    keys += [project_generation(pk) for pk in set(project_ids) if pk is not None]
+    keys += [user_generation(pk) for pk in set(user_ids) if pk is not None]
+    _increment(keys)
+    transaction.on_commit(lambda: _increment(keys))
+
+
+def _increment(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def user_generation_keys(user, request=None):
+    """
+    The generation counters of everything visible to the user: the global
+    one for admins, otherwise the user's own and those of their projects
+    """
+    if user.role == ADMIN:
+        return [GLOBAL_GENERATION]
+    project_ids = sorted(get_project_access(user, request).all)
+    return [user_generation(user.pk)] + [project_generation(pk) for pk in project_ids]
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def get_stats():
+    """
+    Return the hit/miss counters of the list cache in this process
+    """
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
+
+
+def list_cache_key(view, request):
+    """
+    Build the cache key of a list request from the caller's role, id, query
+    parameters and the generations of everything visible to the caller
+    """
+    user = request.user
+    generation_keys = user_generation_keys(user, request)
+    generations = get_generations(generation_keys)
+    parts = [
+        view.basename,
+        user.role,
+        str(user.pk),
+        repr(sorted(request.GET.lists())),
+        repr([generations[key] for key in generation_keys]),
+    ]
+    digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+    return f"core:list:{view.basename}:{digest}"
+
+
+def list_etag(key):
+    """
+    ETag of a list response: the digest of its cache key, which changes
+    with the generations of everything visible to the caller. The
+    generations live in the default cache, which settings require to be
+    shared between the workers, so every worker agrees on the ETag.
+    """
+    return quote_etag(key.rsplit(":", 1)[1])
+
+
+def set_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    A 304 response when ``If-None-Match`` matches the ETag, or without it
+    when ``If-Modified-Since`` is not older than ``last_modified``
+    (a timestamp), else None
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def cached_list(list_method):
+    """
+    Cache the response data of a viewset ``list`` method until one of the
+    generations it depends on is bumped. Responses carry an ETag derived
+    from the cache key and matching ``If-None-Match`` requests get a 304
+    without reading the cache.
+    """
+
+    @wraps(list_method)
+    def wrapper(self, request, *args, **kwargs):
+        query_cache = caches[LIST_CACHE_ALIAS]
+        key = list_cache_key(self, request)
+        etag = list_etag(key)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        data = query_cache.get(key)
+        if data is not None:
+            _record("hits")
+            response = Response(data)
+        else:
+            _record("misses")
+            response = list_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                query_cache.set(key, response.data, LIST_CACHE_TIMEOUT)
+        if response.status_code == 200:
+            set_validators(response, etag)
+        return response
+
+    return wrapper
+
+
+def acached_list(list_method):
+    """
+    cached_list for the async list views, which render responses with
+    ``self.render(data)``
+    """
+
+    @wraps(list_method)
+    async def wrapper(self, request, *args, **kwargs):
+        query_cache = caches[LIST_CACHE_ALIAS]
+        key = await sync_to_async(list_cache_key)(self, request)
+        etag = list_etag(key)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        data = await query_cache.aget(key)
+        if data is not None:
+            _record("hits")
+            response = self.render(data)
+        else:
+            _record("misses")
+            response = await list_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                await query_cache.aset(key, response.data, LIST_CACHE_TIMEOUT)
+        if response.status_code == 200:
+            set_validators(response, etag)
+        return response
+
+    return wrapper
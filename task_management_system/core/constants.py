@@ -28,4 +28,50 @@ class PriorityChoices(models.TextChoices):
     HIGH = "HIGH", "High Priority"
 
 
-PAGE_SIZE = 15
\ No newline at end of file
+class CounterDimensionChoices(models.TextChoices):
+    STATUS = "status", "Tasks by status"
+    PRIORITY = "priority", "Tasks by priority"
+    ASSIGNEE = "assignee", "Tasks by assignee"
+    COMMENTS = "comments", "Comments"
+    OPEN_COMMENTS = "open_comments", "Comments on open tasks"
+
+
+PAGE_SIZE = 15
+
+PROJECT_ACCESS_CACHE_TIMEOUT = 60 * 10
+
+LIST_CACHE_ALIAS = "query_results"
+LIST_CACHE_TIMEOUT = 60 * 10
+
+SEARCH_MAX_RESULTS = 1000
+
+BULK_MAX_ITEMS = 1000
+
+# Cached permission decisions are dropped by the generation counters when
+# memberships or assignments change; the timeout bounds anything they miss
+PERMISSION_DECISION_TIMEOUT = 30
+
+EXPORT_CHUNK_SIZE = 2000
+
+SYNC_PAGE_SIZE = 500
+# Seconds subtracted from the watermark so that rows committed late, or
+# stamped by a server with a slightly late clock, are still picked up
+SYNC_WATERMARK_LAG = 5
+SYNC_RETENTION_DAYS = 30
+
+# Below this many passwords, hashing in-process beats starting a process pool
+PASSWORD_POOL_MIN_ITEMS = 50
+
+# Events kept per project for clients resuming an event stream
+EVENT_BUFFER_SIZE = 200
+# Events queued for a stream before it is dropped as too slow
+EVENT_QUEUE_SIZE = 100
+EVENT_KEEPALIVE_SECONDS = 15
+# Streams end after this long, and the clients reconnect with their last
+# event id, so that memberships are checked again
+EVENT_STREAM_MAX_SECONDS = 60 * 5
+EVENT_RETRY_MILLISECONDS = 2000
+
+# Done tasks not updated for this long are moved to the archive tables
+ARCHIVE_AFTER_DAYS = 180
+ARCHIVE_CHUNK_SIZE = 500
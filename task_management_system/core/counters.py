@@ -0,0 +1,287 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import Coalesce
+
+from core.constants import CounterDimensionChoices, PriorityChoices, TaskStatusChoices
+from .models import Comment, ProjectCounter, Task
+
+STATUS = CounterDimensionChoices.STATUS.value
+PRIORITY = CounterDimensionChoices.PRIORITY.value
+ASSIGNEE = CounterDimensionChoices.ASSIGNEE.value
+COMMENTS = CounterDimensionChoices.COMMENTS.value
+OPEN_COMMENTS = CounterDimensionChoices.OPEN_COMMENTS.value
+
+# Task columns the counters depend on
+TASK_FIELDS = ("project_id_id", "status", "priority", "assigned_to_id")
+
+# Counter deltas are keyed by (project id, dimension, key). They are combined
+# with Counter.update/subtract since the + and - operators drop negative counts.
+
+
+def assignee_key(user_id):
+    return "" if user_id is None else str(user_id)
+
+
+def is_open(status):
+    return status != TaskStatusChoices.DONE
+
+
+def task_state(task):
+    return {field: getattr(task, field) for field in TASK_FIELDS}
+
+
+def task_deltas(state, sign):
+    """
+    Counts contributed by one task in the given state
+    """
+    deltas = Counter()
+    project_id = state["project_id_id"]
+    if project_id is not None:
+        deltas[(project_id, STATUS, state["status"])] += sign
+        deltas[(project_id, PRIORITY, state["priority"])] += sign
+        deltas[(project_id, ASSIGNEE, assignee_key(state["assigned_to_id"]))] += sign
+    return deltas
+
+
+def comment_deltas(project_id, task, count):
+    """
+    Counts contributed by ``count`` comments on the given project and task
+    (a task state or None). A comment belongs to its own project, or else
+    to the project of its task, and is open while its task is not done.
+    """
+    deltas = Counter()
+    owner = project_id or (task and task["project_id_id"])
+    if owner is not None:
+        deltas[(owner, COMMENTS, "")] += count
+        if task is not None and is_open(task["status"]):
+            deltas[(owner, OPEN_COMMENTS, "")] += count
+    return deltas
+
+
+def task_comment_deltas(task_id, previous, current):
+    """
+    Move the comments of a task from its previous to its current state,
+    None meaning that the task was deleted and its comments detached from it
+    (those with a project of their own still count for that project)
+    """
+    deltas = Counter()
+    rows = (
+        Comment.objects.filter(task_id=task_id)
+        .values_list("project_id")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for project_id, count in rows:
+        deltas.subtract(comment_deltas(project_id, previous, count))
+        deltas.update(comment_deltas(project_id, current, count))
+    return deltas
+
+
+def task_counter_deltas(task, previous=None):
+    """
+    Deltas of a saved task, ``previous`` being the state stored before the
+    save or None for a new task
+    """
+    current = task_state(task)
+    deltas = task_deltas(current, 1)
+    if previous:
+        deltas.update(task_deltas(previous, -1))
+        moved = previous["project_id_id"] != current["project_id_id"]
+        if moved or is_open(previous["status"]) != is_open(current["status"]):
+            deltas.update(task_comment_deltas(task.pk, previous, current))
+    return deltas
+
+
+def deleted_task_deltas(task):
+    state = task_state(task)
+    deltas = task_deltas(state, -1)
+    deltas.update(task_comment_deltas(task.pk, state, None))
+    return deltas
+
+
+def task_batch_deltas(tasks, comments, sign):
+    """
+    Deltas of tasks leaving (-1) or entering (1) the task table along with
+    their comments, as when they are archived or restored
+    """
+    states = {task.pk: task_state(task) for task in tasks}
+    deltas = Counter()
+    for state in states.values():
+        deltas.update(task_deltas(state, sign))
+    for comment in comments:
+        task = states.get(comment.task_id_id)
+        deltas.update(comment_deltas(comment.project_id_id, task, sign))
+    return deltas
+
+
+def comment_counter_deltas(comment, previous=None, deleted=False):
+    """
+    Deltas of a saved or deleted comment, ``previous`` being the stored
+    project_id_id and task_id_id before the save
+    """
+    if deleted:
+        places = [(comment.project_id_id, comment.task_id_id, -1)]
+    else:
+        places = [(comment.project_id_id, comment.task_id_id, 1)]
+        if previous:
+            places.append((previous["project_id_id"], previous["task_id_id"], -1))
+    task_ids = [task_id for _, task_id, _ in places if task_id]
+    tasks = {
+        row["pk"]: row
+        for row in Task.objects.filter(pk__in=task_ids).values("pk", *TASK_FIELDS)
+    }
+    deltas = Counter()
+    for project_id, task_id, sign in places:
+        deltas.update(comment_deltas(project_id, tasks.get(task_id), sign))
+    return deltas
+
+
+def unassigned_user_deltas(user_id):
+    """
+    Tasks of a deleted user become unassigned
+    """
+    deltas = Counter()
+    rows = (
+        Task.objects.filter(assigned_to_id=user_id, project_id__isnull=False)
+        .values_list("project_id")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for project_id, count in rows:
+        deltas[(project_id, ASSIGNEE, assignee_key(user_id))] -= count
+        deltas[(project_id, ASSIGNEE, "")] += count
+    return deltas
+
+
+def _counter_sql():
+    table = ProjectCounter._meta.db_table
+    quote = connection.ops.quote_name
+    project, dimension, key, count = (
+        quote(name) for name in ("project_id", "dimension", "key", "count")
+    )
+    columns = f"{project}, {dimension}, {key}, {count}"
+    if connection.vendor == "mysql":
+        conflict = f"ON DUPLICATE KEY UPDATE {count} = {count} + VALUES({count})"
+    else:
+        conflict = (
+            f"ON CONFLICT ({project}, {dimension}, {key}) "
+            f"DO UPDATE SET {count} = {table}.{count} + excluded.{count}"
+        )
+    upsert = f"INSERT INTO {table} ({columns}) VALUES (%s, %s, %s, %s) {conflict}"
+    update = (
+        f"UPDATE {table} SET {count} = {count} + %s "
+        f"WHERE {project} = %s AND {dimension} = %s AND {key} = %s"
+    )
+    return upsert, update
+
+
+def apply_deltas(deltas):
+    """
+    Add the deltas to the counter rows: increments are upserted and
+    decrements are plain updates, each batch as a single statement.
+    Decrements never create rows, so they cannot recreate the counters
+    of a project that is being deleted.
+    """
+    increments = [(*key, delta) for key, delta in deltas.items() if delta > 0]
+    decrements = [(delta, *key) for key, delta in deltas.items() if delta < 0]
+    upsert, update = _counter_sql()
+    with connection.cursor() as cursor:
+        if increments:
+            cursor.executemany(upsert, increments)
+        if decrements:
+            cursor.executemany(update, decrements)
+
+
+def update_task_counters(tasks):
+    """
+    Apply the deltas of a batch of saved tasks at once
+    """
+    deltas = Counter()
+    for task in tasks:
+        deltas.update(task_counter_deltas(task, getattr(task, "_previous", None)))
+    apply_deltas(deltas)
+
+
+def expected_counters(project_ids=None):
+    """
+    Compute the counters from scratch with GROUP BY queries
+    """
+    counters = Counter()
+    tasks = Task.objects.filter(project_id__isnull=False)
+    if project_ids is not None:
+        tasks = tasks.filter(project_id__in=project_ids)
+    for dimension, field in [
+        (STATUS, "status"),
+        (PRIORITY, "priority"),
+        (ASSIGNEE, "assigned_to"),
+    ]:
+        rows = tasks.values_list("project_id", field).annotate(count=Count("id"))
+        for project_id, value, count in rows.order_by():
+            key = assignee_key(value) if dimension == ASSIGNEE else value
+            counters[(project_id, dimension, key)] += count
+
+    comments = Comment.objects.annotate(
+        owner=Coalesce("project_id", "task_id__project_id")
+    ).filter(owner__isnull=False)
+    if project_ids is not None:
+        comments = comments.filter(owner__in=project_ids)
+    open_comments = comments.filter(task_id__isnull=False).exclude(
+        task_id__status=TaskStatusChoices.DONE
+    )
+    for dimension, queryset in [(COMMENTS, comments), (OPEN_COMMENTS, open_comments)]:
+        rows = queryset.values_list("owner").annotate(count=Count("id")).order_by()
+        for project_id, count in rows:
+            counters[(project_id, dimension, "")] += count
+    return counters
+
+
+def reconcile(project_ids=None):
+    """
+    Rewrite the counters that differ from a full recount.
+    Returns the number of rows that were fixed.
+    """
+    with transaction.atomic():
+        expected = expected_counters(project_ids=project_ids)
+        existing = ProjectCounter.objects.select_for_update()
+        if project_ids is not None:
+            existing = existing.filter(project_id__in=project_ids)
+        changed = []
+        for counter in existing:
+            count = expected.pop(
+                (counter.project_id, counter.dimension, counter.key), 0
+            )
+            if counter.count != count:
+                counter.count = count
+                changed.append(counter)
+        ProjectCounter.objects.bulk_update(changed, ["count"])
+        missing = ProjectCounter.objects.bulk_create(
+            ProjectCounter(project_id=project_id, dimension=dimension, key=key, count=n)
+            for (project_id, dimension, key), n in expected.items()
+            if n
+        )
+    return len(changed) + len(missing)
+
+
+def project_stats(project_id):
+    """
+    Dashboard counts of a project read from its counter rows
+    """
+    stats = {
+        "project": project_id,
+        STATUS: dict.fromkeys(TaskStatusChoices.values, 0),
+        PRIORITY: dict.fromkeys(PriorityChoices.values, 0),
+        ASSIGNEE: {},
+        COMMENTS: 0,
+        OPEN_COMMENTS: 0,
+    }
+    counters = ProjectCounter.objects.filter(project_id=project_id).values_list(
+        "dimension", "key", "count"
+    )
+    for dimension, key, count in counters:
+        if dimension in (COMMENTS, OPEN_COMMENTS):
+            stats[dimension] = count
+        elif count:
+            stats[dimension][key or "unassigned"] = count
+    return stats
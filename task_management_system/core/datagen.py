@@ -0,0 +1,164 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+
+from core.constants import (
+    ADMIN,
+    CLIENT,
+    DEVELOPER,
+    PROJECT_MANAGER,
+    TECH_LEAD,
+    PriorityChoices,
+    TaskStatusChoices,
+)
+from core.counters import reconcile
+from core.provisioning import refresh_user_caches
+from core.search import SEARCH_SOURCES, get_search_backend
+from .models import Comment, Project, Task, User
+
+# Share of the users having each role
+ROLE_WEIGHTS = {
+    ADMIN: 1,
+    PROJECT_MANAGER: 5,
+    TECH_LEAD: 10,
+    DEVELOPER: 60,
+    CLIENT: 24,
+}
+BATCH_SIZE = 1000
+
+
+class Dataset:
+    def __init__(self, users, projects, tasks, comments):
+        self.users = users
+        self.projects = projects
+        self.tasks = tasks
+        self.comments = comments
+
+
+def skewed_sizes(count, total, skew, rng):
+    """
+    Sizes of ``count`` groups drawn from ``total`` items following a Zipf
+    like law: with ``skew`` above 0 a few groups are much larger than the
+    others, with 0 all groups have about the same size
+    """
+    weights = [1 / (rank**skew) for rank in range(1, count + 1)]
+    rng.shuffle(weights)
+    scale = total / sum(weights)
+    return [max(1, min(total, round(weight * scale))) for weight in weights]
+
+
+def generate_dataset(
+    users=100,
+    projects=20,
+    tasks=2000,
+    comments=5000,
+    members=None,
+    skew=1.0,
+    task_comment_ratio=0.7,
+    prefix="gen",
+    password="password",
+    seed=0,
+):
+    """
+    Create a synthetic dataset with bulk_create: users spread across the
+    roles following ROLE_WEIGHTS, projects created by project managers whose
+    member counts follow ``skew``, tasks assigned to members of their
+    project and comments on tasks or projects. ``members`` is the average
+    number of members per project, a quarter of the users by default.
+
+    bulk_create skips the signals: call refresh_derived_data once the data
+    is written.
+    """
+    rng = random.Random(seed)
+    roles = list(ROLE_WEIGHTS)
+    weights = list(ROLE_WEIGHTS.values())
+    # Every role has at least one user, the others are drawn by weight
+    user_roles = roles + rng.choices(roles, weights, k=max(0, users - len(roles)))
+    password_hash = make_password(password)
+    user_objs = User.objects.bulk_create(
+        (
+            User(
+                username=f"{prefix}_user_{i}",
+                email=f"{prefix}_user_{i}@example.com",
+                role=role,
+                password=password_hash,
+            )
+            for i, role in enumerate(user_roles[:users])
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    managers = [user for user in user_objs if user.role == PROJECT_MANAGER]
+    project_objs = Project.objects.bulk_create(
+        (
+            Project(
+                name=f"{prefix}_project_{i}",
+                description="generated",
+                created_by=rng.choice(managers or user_objs),
+            )
+            for i in range(projects)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    members = len(user_objs) // 4 if members is None else members
+    sizes = skewed_sizes(len(project_objs), members * len(project_objs), skew, rng)
+    sizes = [min(size, len(user_objs)) for size in sizes]
+    project_members = {
+        project.id: rng.sample(user_objs, size)
+        for project, size in zip(project_objs, sizes)
+    }
+    Membership = Project.members.through
+    Membership.objects.bulk_create(
+        (
+            Membership(project_id=project_id, user_id=user.id)
+            for project_id, users_of_project in project_members.items()
+            for user in users_of_project
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    refresh_user_caches(user_objs)
+
+    # Larger projects get proportionally more tasks
+    task_projects = rng.choices(project_objs, sizes, k=tasks) if project_objs else []
+    task_objs = Task.objects.bulk_create(
+        (
+            Task(
+                title=f"{prefix}_task_{i}",
+                description="generated",
+                created_by=rng.choice(
+                    [project.created_by, *project_members[project.id]]
+                ),
+                assigned_to=rng.choice(project_members[project.id]),
+                project_id=project,
+                status=rng.choice(TaskStatusChoices.values),
+                priority=rng.choice(PriorityChoices.values),
+            )
+            for i, project in enumerate(task_projects)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    comment_objs = []
+    for i in range(comments if project_objs else 0):
+        on_task = task_objs and rng.random() < task_comment_ratio
+        comment_objs.append(
+            Comment(
+                content=f"{prefix}_comment_{i}",
+                author=rng.choice(user_objs),
+                task_id=rng.choice(task_objs) if on_task else None,
+                project_id=None if on_task else rng.choice(project_objs),
+            )
+        )
+    comment_objs = Comment.objects.bulk_create(comment_objs, batch_size=BATCH_SIZE)
+    return Dataset(user_objs, project_objs, task_objs, comment_objs)
+
+
+def refresh_derived_data():
+    """
+    Rebuild the search index and the project counters, which are
+    maintained by signals that bulk_create does not send
+    """
+    backend = get_search_backend()
+    for kind in SEARCH_SOURCES:
+        backend.rebuild(kind)
+    reconcile()
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from itertools import count
+
+from django.conf import settings
+from django.db import transaction
+
+from core.constants import EVENT_BUFFER_SIZE, EVENT_QUEUE_SIZE
+from .models import Task
+
+TASK = "task"
+COMMENT = "comment"
+
+# Subscription key of the streams receiving the events of every project
+ALL_PROJECTS = "*"
+
+# Queued in place of the events of a subscriber that fell behind
+OVERFLOW = object()
+
+
+class Event:
+    def __init__(self, id, project_id, kind, data):
+        self.id = id
+        self.project_id = project_id
+        self.kind = kind
+        self.data = data
+
+    def encode(self):
+        """
+        The event in the text/event-stream format
+        """
+        data = json.dumps(self.data)
+        return f"id: {self.id}\nevent: {self.kind}\ndata: {data}\n\n"
+
+
+class Subscription:
+    """
+    Bounded queue of the events of some projects for one stream, living on
+    the event loop of the stream
+    """
+
+    def __init__(self, project_ids, loop):
+        self.project_ids = project_ids
+        self.loop = loop
+        self.queue = asyncio.Queue(EVENT_QUEUE_SIZE)
+        self.overflowed = False
+        self.last_id = None
+
+    def deliver(self, event):
+        """
+        Queue the event, or drop the queued events and mark the subscription
+        as overflowed when the stream does not keep up: it ends and the
+        client resumes from its last event id with the replay buffers
+        """
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+
+class EventBroker:
+    """
+    In-process fan-out of change events to the streams subscribed to their
+    project, with a replay buffer of the last EVENT_BUFFER_SIZE events of
+    each project for clients resuming from a ``Last-Event-ID``.
+
+    Events are published from the threads running the signals and handed
+    to each subscriber on its own event loop. Event ids increase across
+    projects and start from the clock, so that ids issued before a restart
+    are older than every new one. Each process has its own broker, so the
+    settings turn the stream off (EVENT_STREAM) to run several workers.
+    """
+
+    def __init__(self, buffer_size=EVENT_BUFFER_SIZE):
+        self.lock = threading.Lock()
+        self.ids = count(time.time_ns() // 1000)
+        self.start = self.last_id = next(self.ids)
+        self.buffer_size = buffer_size
+        self.buffers = {}
+        # Id of the last event dropped from each buffer
+        self.horizons = {}
+        self.subscribers = {}
+
+    def publish(self, project_id, kind, data):
+        with self.lock:
+            self.last_id = next(self.ids)
+            event = Event(self.last_id, project_id, kind, data)
+            buffer = self.buffers.setdefault(project_id, deque())
+            if len(buffer) == self.buffer_size:
+                self.horizons[project_id] = buffer.popleft().id
+            buffer.append(event)
+            subscribers = [
+                *self.subscribers.get(project_id, ()),
+                *self.subscribers.get(ALL_PROJECTS, ()),
+            ]
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # The loop of the stream has been closed
+                self.unsubscribe(subscriber)
+        return event
+
+    def subscribe(self, project_ids, last_event_id=None):
+        """
+        Subscribe the running event loop to the projects, or to every project
+        with ALL_PROJECTS. Returns the subscription, holding the id of the
+        last event published before it, and the buffered events after
+        ``last_event_id``, or None in place of the events when some of them
+        are no longer buffered.
+        """
+        subscriber = Subscription(project_ids, asyncio.get_running_loop())
+        with self.lock:
+            subscriber.last_id = self.last_id
+            for project_id in project_ids:
+                self.subscribers.setdefault(project_id, set()).add(subscriber)
+            replay = []
+            if last_event_id is not None:
+                replay = self.replay(project_ids, last_event_id)
+        return subscriber, replay
+
+    def replay(self, project_ids, last_event_id):
+        if ALL_PROJECTS in project_ids:
+            project_ids = list(self.buffers)
+        horizon = max([self.start, *(self.horizons.get(pk, 0) for pk in project_ids)])
+        if last_event_id < horizon:
+            return None
+        events = [
+            event
+            for project_id in project_ids
+            for event in self.buffers.get(project_id, ())
+            if event.id > last_event_id
+        ]
+        return sorted(events, key=lambda event: event.id)
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            for project_id in subscriber.project_ids:
+                subscribers = self.subscribers.get(project_id)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self.subscribers[project_id]
+
+
+broker = EventBroker()
+
+
+def change_event(instance, action):
+    """
+    Projects and payload of the event of a task or comment change. The
+    payload only identifies the object: clients fetch it from the API,
+    which applies the object rules.
+    """
+    previous = getattr(instance, "_previous", None) or {}
+    if isinstance(instance, Task):
+        kind = TASK
+        project_ids = {instance.project_id_id, previous.get("project_id_id")}
+        data = {"id": instance.pk, "project_id": instance.project_id_id}
+    else:
+        kind = COMMENT
+        project_ids = {instance.project_id_id, previous.get("project_id_id")}
+        task_ids = {instance.task_id_id, previous.get("task_id_id")} - {None}
+        if task_ids:
+            project_ids |= set(
+                Task.objects.filter(pk__in=task_ids).values_list(
+                    "project_id_id", flat=True
+                )
+            )
+        data = {
+            "id": instance.pk,
+            "project_id": instance.project_id_id,
+            "task_id": instance.task_id_id,
+        }
+    data["action"] = action
+    return kind, project_ids - {None}, data
+
+
+def publish_change(instance, action):
+    """
+    Publish the change of a task or comment to the streams of its projects,
+    current and previous, once the transaction commits
+    """
+    kind, project_ids, data = change_event(instance, action)
+
+    def publish():
+        for project_id in project_ids:
+            broker.publish(project_id, kind, data)
+
+    if project_ids and settings.EVENT_STREAM:
+        transaction.on_commit(publish)
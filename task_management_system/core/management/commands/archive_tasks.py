@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.archive import archive_tasks
+from core.constants import ARCHIVE_AFTER_DAYS, ARCHIVE_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the done tasks not updated for --days, with their comments, to "
+        "the archive tables, one transaction per chunk of --chunk-size tasks. "
+        "Archived tasks are listed with ?include_archived=true and restored "
+        "with POST /tasks/<id>/restore/. Meant to run daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--chunk-size", type=int, default=ARCHIVE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        tasks = comments = 0
+        for moved_tasks, moved_comments in archive_tasks(
+            options["days"], options["chunk_size"]
+        ):
+            tasks += moved_tasks
+            comments += moved_comments
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Archived {moved_tasks} tasks")
+        self.stdout.write(f"Archived {tasks} tasks and {comments} comments")
@@ -0,0 +1,89 @@
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of the sync viewsets and the async views under "
+        "concurrent load. The server must already be running, for example: "
+        "uvicorn task_management_system.asgi:application --workers 1"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--email", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument(
+            "--paths", nargs="+", default=["tasks/", "projects/", "comments/"]
+        )
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument(
+            "--bust-cache",
+            action="store_true",
+            help="Send a distinct query string per request to bypass the list cache",
+        )
+
+    def handle(self, *args, **options):
+        base_url = options["base_url"].rstrip("/")
+        token = self.obtain_token(base_url, options["email"], options["password"])
+        for path in options["paths"]:
+            for label, url in [
+                ("sync", f"{base_url}/{path}"),
+                ("async", f"{base_url}/async/{path}"),
+            ]:
+                result = self.run(url, token, options)
+                self.stdout.write(
+                    f"{label:<6} {path:<12} {result['throughput']:8.1f} req/s "
+                    f"p50={result['p50'] * 1000:.1f}ms "
+                    f"p95={result['p95'] * 1000:.1f}ms errors={result['errors']}"
+                )
+
+    def obtain_token(self, base_url, email, password):
+        body = json.dumps({"email": email, "password": password}).encode()
+        request = urllib.request.Request(
+            f"{base_url}/api/token/",
+            data=body,
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.load(response)["access"]
+        except (urllib.error.URLError, KeyError) as e:
+            raise CommandError(f"Could not obtain a token from {base_url}: {e}")
+
+    def fetch(self, url, token):
+        request = urllib.request.Request(
+            url, headers={"Authorization": f"Bearer {token}"}
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                ok = response.status == 200
+        except urllib.error.URLError:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    def run(self, url, token, options):
+        total = options["requests"]
+        urls = [
+            f"{url}?bench={i}" if options["bust_cache"] else url for i in range(total)
+        ]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            results = list(executor.map(lambda u: self.fetch(u, token), urls))
+        elapsed = time.perf_counter() - start
+        latencies = sorted(latency for latency, _ in results)
+        return {
+            "throughput": total / elapsed,
+            "p50": statistics.median(latencies),
+            "p95": latencies[int(len(latencies) * 0.95) - 1],
+            "errors": sum(1 for _, ok in results if not ok),
+        }
@@ -0,0 +1,137 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from core.constants import (
+    PROJECT_MANAGER,
+    TECH_LEAD,
+    DEVELOPER,
+    CLIENT,
+    UserRoleChoices,
+)
+from core.models import Comment, Project, Task, User
+
+
+def legacy_visible_comments(user):
+    """
+    Comment visibility as computed by CommentViewSet.list before the
+    single query rewrite, kept as the reference result set
+    """
+    if user.role == PROJECT_MANAGER:
+        projects = Project.objects.filter(
+            Q(created_by=user) | Q(members=user)
+        ).distinct()
+        tasks = Task.objects.filter(
+            Q(assigned_to=user) | Q(project_id__in=projects)
+        ).distinct()
+    elif user.role in [TECH_LEAD, DEVELOPER, CLIENT]:
+        tasks = Task.objects.filter(Q(assigned_to=user) | Q(created_by=user)).distinct()
+        projects = Project.objects.filter(members=user)
+    else:
+        return Comment.objects.all()
+    task_ids = tasks.values_list("id", flat=True)
+    project_ids = projects.values_list("id", flat=True)
+    return Comment.objects.filter(
+        Q(task_id__in=task_ids) | Q(project_id__in=project_ids)
+    ).distinct()
+
+
+def visible_comments(user):
+    return Comment.objects.visible_to(user)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the legacy and the single query comment visibility for every "
+        "role and time both. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--projects", type=int, default=20)
+        parser.add_argument("--tasks", type=int, default=2000)
+        parser.add_argument("--comments", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            users = self.generate(options)
+            for role in UserRoleChoices.values:
+                user = next(user for user in users if user.role == role)
+                legacy = set(legacy_visible_comments(user).values_list("id", flat=True))
+                current = set(visible_comments(user).values_list("id", flat=True))
+                if legacy != current:
+                    raise CommandError(f"Result sets differ for role {role}")
+                legacy_time = self.measure(
+                    legacy_visible_comments, user, options["repeat"]
+                )
+                current_time = self.measure(visible_comments, user, options["repeat"])
+                self.stdout.write(
+                    f"{role:<16} rows={len(current):<7} "
+                    f"legacy={legacy_time * 1000:.2f}ms single={current_time * 1000:.2f}ms"
+                )
+            transaction.set_rollback(True)
+
+    def measure(self, visibility, user, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(visibility(user).values_list("id", flat=True))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def generate(self, options):
+        rng = random.Random(0)
+        roles = UserRoleChoices.values
+        users = User.objects.bulk_create(
+            User(
+                username=f"bench_user_{i}",
+                email=f"bench_user_{i}@example.com",
+                role=roles[i % len(roles)],
+                password="!",
+            )
+            for i in range(options["users"])
+        )
+        projects = Project.objects.bulk_create(
+            Project(
+                name=f"bench_project_{i}",
+                description="benchmark",
+                created_by=rng.choice(users),
+            )
+            for i in range(options["projects"])
+        )
+        Membership = Project.members.through
+        Membership.objects.bulk_create(
+            Membership(project_id=project.id, user_id=user.id)
+            for project in projects
+            for user in rng.sample(users, len(users) // 4)
+        )
+        tasks = Task.objects.bulk_create(
+            Task(
+                title=f"bench_task_{i}",
+                description="benchmark",
+                created_by=rng.choice(users),
+                assigned_to=rng.choice(users),
+                project_id=rng.choice(projects),
+                status="TO_DO",
+                priority="LOW",
+            )
+            for i in range(options["tasks"])
+        )
+        comments = []
+        for i in range(options["comments"]):
+            on_task = rng.random() < 0.7
+            comments.append(
+                Comment(
+                    content=f"bench_comment_{i}",
+                    author=rng.choice(users),
+                    task_id=rng.choice(tasks) if on_task else None,
+                    project_id=None if on_task else rng.choice(projects),
+                )
+            )
+        Comment.objects.bulk_create(comments, batch_size=1000)
+        return users
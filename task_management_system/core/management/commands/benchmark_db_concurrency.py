@@ -0,0 +1,146 @@
+import random
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.db.backends.signals import connection_created
+
+from core.constants import PAGE_SIZE, TaskStatusChoices
+from core.models import Task
+
+
+def percentile(values, fraction):
+    return values[max(0, int(len(values) * fraction) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run task reads and writes from several threads against the "
+        "configured database, e.g. on data made by generate_data, and report "
+        "the throughput, latency and lock errors. Each operation ends like a "
+        "request, with close_old_connections. Writes change the status of "
+        "random tasks. Compare DATABASES profiles by running it with "
+        "different environment variables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument(
+            "--write-ratio",
+            type=float,
+            default=0.2,
+            help="Share of the operations updating a task",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rows = list(Task.objects.values_list("pk", "project_id"))
+        if not rows:
+            raise CommandError("No tasks, run generate_data first")
+        self.task_ids = [pk for pk, _ in rows]
+        self.project_ids = sorted({project_id for _, project_id in rows})
+        self.lock = threading.Lock()
+        self.results = {"read": [], "write": []}
+        self.errors = {"read": 0, "write": 0}
+        self.connections = 0
+        connection_created.connect(self.count_connection)
+        self.describe()
+        connection.close()
+
+        deadline = time.perf_counter() + options["duration"]
+        threads = [
+            threading.Thread(
+                target=self.work,
+                args=(deadline, options["write_ratio"], options["seed"] + i),
+            )
+            for i in range(options["threads"])
+        ]
+        start = time.perf_counter()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            connection_created.disconnect(self.count_connection)
+        elapsed = time.perf_counter() - start
+
+        total = sum(len(latencies) for latencies in self.results.values())
+        self.stdout.write(
+            f"threads={options['threads']} operations={total} "
+            f"{total / elapsed:8.1f} ops/s connections={self.connections}"
+        )
+        for kind, latencies in self.results.items():
+            latencies.sort()
+            line = f"{kind:<6} count={len(latencies):<7} errors={self.errors[kind]:<5}"
+            if latencies:
+                line += (
+                    f" p50={statistics.median(latencies):8.2f}ms"
+                    f" p95={percentile(latencies, 0.95):8.2f}ms"
+                    f" max={latencies[-1]:8.2f}ms"
+                )
+            self.stdout.write(line)
+
+    def describe(self):
+        database = settings.DATABASES["default"]
+        line = (
+            f"{connection.vendor} CONN_MAX_AGE={database.get('CONN_MAX_AGE', 0)} "
+            f"OPTIONS={database.get('OPTIONS', {})}"
+        )
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                line += f" journal_mode={cursor.fetchone()[0]}"
+        self.stdout.write(line)
+
+    def count_connection(self, sender, **kwargs):
+        with self.lock:
+            self.connections += 1
+
+    def work(self, deadline, write_ratio, seed):
+        rng = random.Random(seed)
+        results = {"read": [], "write": []}
+        errors = {"read": 0, "write": 0}
+        try:
+            while time.perf_counter() < deadline:
+                kind = "write" if rng.random() < write_ratio else "read"
+                start = time.perf_counter()
+                try:
+                    if kind == "write":
+                        self.write(rng)
+                    else:
+                        self.read(rng)
+                except OperationalError:
+                    # e.g. "database is locked" once the busy timeout expires
+                    errors[kind] += 1
+                else:
+                    results[kind].append((time.perf_counter() - start) * 1000)
+                finally:
+                    close_old_connections()
+        finally:
+            connection.close()
+            with self.lock:
+                for kind in results:
+                    self.results[kind] += results[kind]
+                    self.errors[kind] += errors[kind]
+
+    def read(self, rng):
+        """
+        A page of the task list of a project and its count
+        """
+        tasks = Task.objects.filter(project_id=rng.choice(self.project_ids))
+        tasks.count()
+        list(tasks.order_by("created_at", "pk").values()[:PAGE_SIZE])
+
+    def write(self, rng):
+        """
+        A status change saved like the viewset does, signals included
+        """
+        with transaction.atomic():
+            task = Task.objects.get(pk=rng.choice(self.task_ids))
+            task.status = rng.choice(TaskStatusChoices.values)
+            task.save()
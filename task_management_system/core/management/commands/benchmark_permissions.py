@@ -0,0 +1,106 @@
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_roles.permissions import _check_role_permissions
+
+from core.constants import UserRoleChoices
+from core.models import Comment, Project, Task, User
+from core.permissions import has_permission
+from core.views import CommentViewSet, ProjectViewSet, TaskViewSet, UserViewSet
+
+VIEWSETS = [
+    (UserViewSet, User),
+    (ProjectViewSet, Project),
+    (TaskViewSet, Task),
+    (CommentViewSet, Comment),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the permission check of retrieve for a user of each role on "
+        "existing objects, e.g. made by generate_data: as interpreted by "
+        "rest_framework_roles, with the compiled table, and with the compiled "
+        "table and the warm decision cache. Every check gets a new request and "
+        "view, like a request would."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--objects", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        modes = [
+            ("roles", self.check_roles),
+            ("compiled", self.check_compiled),
+            ("cached", has_permission),
+        ]
+        for role in UserRoleChoices.values:
+            user = (
+                User.objects.filter(role=role)
+                .annotate(projects_count=Count("project_members"))
+                .order_by("-projects_count", "pk")
+                .first()
+            )
+            if user is None:
+                self.stderr.write(f"No {role} user, skipping the role")
+                continue
+            for viewset, model in VIEWSETS:
+                pks = list(
+                    model.objects.order_by("pk").values_list("pk", flat=True)[
+                        : options["objects"]
+                    ]
+                )
+                if not pks:
+                    raise CommandError("No data, run generate_data first")
+                line = f"{viewset.__name__:<16} {role:<16}"
+                for label, check in modes:
+                    cache.clear()
+                    if check is has_permission:
+                        # Measure the steady state, with the decisions cached
+                        self.measure(factory, viewset, user, pks, check, 1)
+                    elapsed, granted = self.measure(
+                        factory, viewset, user, pks, check, options["repeat"]
+                    )
+                    line += f" {label}={elapsed * 1e6:8.1f}us"
+                line += f" granted={granted}/{len(pks)}"
+                self.stdout.write(line)
+        cache.clear()
+
+    def measure(self, factory, viewset, user, pks, check, repeat):
+        total, granted = 0.0, 0
+        for _ in range(repeat):
+            granted = 0
+            for pk in pks:
+                request = Request(factory.get("/"))
+                request.user = user
+                view = viewset(
+                    action="retrieve",
+                    detail=True,
+                    args=(),
+                    kwargs={"pk": pk},
+                    request=request,
+                    format_kwarg=None,
+                )
+                start = time.perf_counter()
+                try:
+                    granted += bool(check(request, view, "retrieve"))
+                except PermissionDenied:
+                    pass
+                total += time.perf_counter() - start
+        return total / (repeat * len(pks)), granted
+
+    def check_roles(self, request, view, action):
+        handler = getattr(type(view), action)
+        rules = type(view)._view_permissions[action]
+        return _check_role_permissions(request, handler, view, rules)
+
+    def check_compiled(self, request, view, action):
+        check = view.permission_table.get((action, request.user.role), False)
+        return check if isinstance(check, bool) else check(request, view)
@@ -0,0 +1,108 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.constants import ADMIN, DEVELOPER, PAGE_SIZE
+from core.models import Project, Task, User
+from core.search import get_search_backend, search
+
+WORDS = (
+    "billing invoice login signup dashboard report export import payment refund "
+    "search filter cache index migration backup restore deploy release hotfix "
+    "profile avatar upload download email notification webhook api token session"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare title icontains filtering with the full text search on a "
+        "synthetic task table. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=1_000_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            admin, developer = self.generate(options)
+            backend = get_search_backend()
+            start = time.perf_counter()
+            backend.rebuild("task")
+            self.stdout.write(
+                f"indexed {options['tasks']} tasks in {time.perf_counter() - start:.2f}s"
+            )
+            for user in [admin, developer]:
+                if user.role == ADMIN:
+                    queryset = Task.objects.all()
+                else:
+                    queryset = Task.objects.filter(assigned_to=user)
+                for term in ["invoice", "rel", "payment refund", "quarterly"]:
+                    like = self.measure(
+                        options["repeat"], lambda: self.icontains_page(queryset, term)
+                    )
+                    fts = self.measure(
+                        options["repeat"], lambda: search("task", term, queryset)
+                    )
+                    self.stdout.write(
+                        f"{user.role:<10} {term!r:<18} "
+                        f"icontains={like * 1000:.2f}ms search={fts * 1000:.2f}ms"
+                    )
+            transaction.set_rollback(True)
+
+    def icontains_page(self, queryset, term):
+        """
+        What a ?title= list request runs: a COUNT for the paginator
+        and the first page
+        """
+        matches = queryset.filter(title__icontains=term).order_by("created_at", "pk")
+        matches.count()
+        return list(matches.values_list("pk", flat=True)[:PAGE_SIZE])
+
+    def measure(self, repeat, run):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def generate(self, options):
+        rng = random.Random(0)
+        admin = User.objects.create(
+            username="bench_admin", email="bench_admin@example.com", role=ADMIN
+        )
+        developers = User.objects.bulk_create(
+            User(
+                username=f"bench_dev_{i}",
+                email=f"bench_dev_{i}@example.com",
+                role=DEVELOPER,
+                password="!",
+            )
+            for i in range(100)
+        )
+        project = Project.objects.create(
+            name="bench_search", description="benchmark", created_by=admin
+        )
+        remaining = options["tasks"]
+        while remaining > 0:
+            size = min(remaining, options["batch_size"])
+            Task.objects.bulk_create(
+                Task(
+                    title=" ".join(rng.sample(WORDS, 3))
+                    + (" quarterly" if rng.random() < 0.001 else ""),
+                    description=" ".join(rng.sample(WORDS, 6)),
+                    created_by=admin,
+                    assigned_to=rng.choice(developers),
+                    project_id=project,
+                    status="TO_DO",
+                    priority="LOW",
+                )
+                for _ in range(size)
+            )
+            remaining -= size
+        return admin, developers[0]
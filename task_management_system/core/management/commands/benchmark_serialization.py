@@ -0,0 +1,100 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.constants import PriorityChoices, TaskStatusChoices, UserRoleChoices
+from core.models import Project, Task, User
+from core.planning import plan_queryset
+from core.projection import Projection
+from core.serializers import TaskSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the rows/sec of TaskSerializer and of the values() based "
+        "projection used by the list views on a payload of generated tasks. "
+        "Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--fields", default="id,title,status,assigned_to")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.generate(options["tasks"])
+            queryset = Task.objects.order_by("created_at", "pk")
+            full = Projection(TaskSerializer)
+            sparse = Projection(TaskSerializer, options["fields"].split(","))
+
+            expected = TaskSerializer(
+                plan_queryset(queryset, TaskSerializer), many=True
+            ).data
+            if full.render(list(full.values(queryset))) != expected:
+                raise CommandError("The projection does not match the serializer")
+
+            cases = [
+                (
+                    "serializer",
+                    lambda: TaskSerializer(
+                        plan_queryset(queryset, TaskSerializer), many=True
+                    ).data,
+                ),
+                ("values", lambda: full.render(list(full.values(queryset)))),
+                ("values+fields", lambda: sparse.render(list(sparse.values(queryset)))),
+            ]
+            for label, render in cases:
+                elapsed = self.measure(render, options["repeat"])
+                self.stdout.write(
+                    f"{label:<14} rows={options['tasks']:<7} "
+                    f"{elapsed * 1000:8.1f}ms {options['tasks'] / elapsed:10.0f} rows/s"
+                )
+            transaction.set_rollback(True)
+
+    def measure(self, render, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            render()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def generate(self, count):
+        rng = random.Random(0)
+        roles = UserRoleChoices.values
+        users = User.objects.bulk_create(
+            User(
+                username=f"bench_user_{i}",
+                email=f"bench_user_{i}@example.com",
+                role=roles[i % len(roles)],
+                password="!",
+            )
+            for i in range(50)
+        )
+        projects = Project.objects.bulk_create(
+            Project(
+                name=f"bench_project_{i}",
+                description="benchmark",
+                created_by=rng.choice(users),
+            )
+            for i in range(20)
+        )
+        Task.objects.bulk_create(
+            (
+                Task(
+                    title=f"bench_task_{i}",
+                    description="benchmark",
+                    created_by=rng.choice(users),
+                    assigned_to=rng.choice(users),
+                    project_id=rng.choice(projects),
+                    status=rng.choice(TaskStatusChoices.values),
+                    priority=rng.choice(PriorityChoices.values),
+                )
+                for i in range(count)
+            ),
+            batch_size=1000,
+        )
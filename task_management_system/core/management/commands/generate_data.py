@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.datagen import generate_dataset, refresh_derived_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset with users of every role, projects with "
+        "skewed membership, tasks and comments, e.g. for run_benchmarks. "
+        "Every generated user has the given password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--projects", type=int, default=50)
+        parser.add_argument("--tasks", type=int, default=10000)
+        parser.add_argument("--comments", type=int, default=30000)
+        parser.add_argument(
+            "--members",
+            type=int,
+            help="Average members per project, a quarter of the users by default",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.0,
+            help="Zipf exponent of the project sizes, 0 for uniform sizes",
+        )
+        parser.add_argument("--prefix", default="gen")
+        parser.add_argument("--password", default="password")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            dataset = generate_dataset(
+                users=options["users"],
+                projects=options["projects"],
+                tasks=options["tasks"],
+                comments=options["comments"],
+                members=options["members"],
+                skew=options["skew"],
+                prefix=options["prefix"],
+                password=options["password"],
+                seed=options["seed"],
+            )
+            refresh_derived_data()
+        self.stdout.write(
+            f"Generated {len(dataset.users)} users, {len(dataset.projects)} "
+            f"projects, {len(dataset.tasks)} tasks and {len(dataset.comments)} "
+            "comments"
+        )
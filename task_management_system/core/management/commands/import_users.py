@@ -0,0 +1,44 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.provisioning import import_users, validate_user_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV file with a username,email,role[,password] "
+        "header or from NDJSON, hashing the passwords in a process pool. "
+        "Nothing is written unless every row is valid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--input", choices=["csv", "ndjson"], default="csv")
+        parser.add_argument(
+            "--workers", type=int, help="Hashing processes, one per CPU by default"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], newline="") as f:
+                if options["input"] == "csv":
+                    items = [
+                        {key: value for key, value in row.items() if value != ""}
+                        for row in csv.DictReader(f)
+                    ]
+                else:
+                    items = [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        rows, errors = validate_user_rows(items)
+        if errors:
+            for error in errors:
+                self.stderr.write(f"Row {error['index'] + 1}: {error['errors']}")
+            raise CommandError(f"{len(errors)} invalid rows, nothing was imported")
+        with transaction.atomic():
+            users = import_users(rows, options["workers"])
+        self.stdout.write(f"Imported {len(users)} users")
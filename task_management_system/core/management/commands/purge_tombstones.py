@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.sync import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the sync tombstones older than the retention period. Clients "
+        "holding an older watermark get a full snapshot. Meant to run daily."
+    )
+
+    def handle(self, *args, **options):
+        purged = purge_tombstones()
+        self.stdout.write(f"Purged {purged} tombstones")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.search import SEARCH_SOURCES, get_search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the full text search index from the database, e.g. after "
+        "rows were written with bulk_create or raw SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kinds", nargs="*", choices=list(SEARCH_SOURCES))
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        for kind in options["kinds"] or SEARCH_SOURCES:
+            backend.rebuild(kind)
+            self.stdout.write(f"Rebuilt {kind} search index")
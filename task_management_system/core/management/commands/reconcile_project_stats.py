@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the project dashboard counters from the tasks and comments and "
+        "fix the rows that drifted, e.g. after rows were written with raw SQL or "
+        "QuerySet.update(). Meant to run periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("projects", nargs="*", type=int)
+
+    def handle(self, *args, **options):
+        fixed = reconcile(options["projects"] or None)
+        self.stdout.write(f"Fixed {fixed} project counters")
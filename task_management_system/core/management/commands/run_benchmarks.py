@@ -0,0 +1,356 @@
+import json
+import logging
+import statistics
+import time
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.access import get_project_access
+from core.authentication import set_auth_state
+from core.constants import LIST_CACHE_ALIAS, UserRoleChoices
+from core.models import Comment, Project, Task, User
+from core.serializers import RoleTokenObtainPairSerializer
+
+# (name, method, url name, object kind of detail routes, query parameters).
+# "since" parameters are replaced by a fresh sync watermark.
+ENDPOINTS = [
+    ("users.list", "get", "user-list", None, {}),
+    ("users.retrieve", "get", "user-detail", "user", {}),
+    ("users.create", "post", "user-list", None, {}),
+    ("users.update", "put", "user-detail", "user", {}),
+    ("users.partial_update", "patch", "user-detail", "user", {}),
+    ("users.destroy", "delete", "user-detail", "user", {}),
+    ("users.bulk", "post", "user-bulk", None, {}),
+    ("projects.list", "get", "project-list", None, {}),
+    ("projects.search", "get", "project-list", None, {"search": "gen"}),
+    ("projects.retrieve", "get", "project-detail", "project", {}),
+    ("projects.stats", "get", "project-stats", "project", {}),
+    ("projects.create", "post", "project-list", None, {}),
+    ("projects.update", "put", "project-detail", "project", {}),
+    ("projects.partial_update", "patch", "project-detail", "project", {}),
+    ("projects.destroy", "delete", "project-detail", "project", {}),
+    ("projects.members_add", "post", "project-members", "project", {}),
+    ("projects.members_replace", "put", "project-members", "project", {}),
+    ("projects.members_remove", "delete", "project-members", "project", {}),
+    ("tasks.list", "get", "task-list", None, {}),
+    ("tasks.list_cursor", "get", "task-list", None, {"cursor": ""}),
+    ("tasks.list_fields", "get", "task-list", None, {"fields": "id,title"}),
+    ("tasks.search", "get", "task-list", None, {"search": "gen"}),
+    ("tasks.retrieve", "get", "task-detail", "task", {}),
+    ("tasks.create", "post", "task-list", None, {}),
+    ("tasks.update", "put", "task-detail", "task", {}),
+    ("tasks.partial_update", "patch", "task-detail", "task", {}),
+    ("tasks.destroy", "delete", "task-detail", "task", {}),
+    ("tasks.bulk_create", "post", "task-bulk", None, {}),
+    ("tasks.bulk_update", "patch", "task-bulk", None, {}),
+    ("tasks.bulk_destroy", "delete", "task-bulk", None, {}),
+    ("tasks.export", "get", "task-export", None, {}),
+    ("comments.list", "get", "comment-list", None, {}),
+    ("comments.retrieve", "get", "comment-detail", "comment", {}),
+    ("comments.create", "post", "comment-list", None, {}),
+    ("comments.update", "put", "comment-detail", "comment", {}),
+    ("comments.partial_update", "patch", "comment-detail", "comment", {}),
+    ("comments.destroy", "delete", "comment-detail", "comment", {}),
+    ("comments.export", "get", "comment-export", None, {}),
+    ("sync.list", "get", "sync-list", None, {}),
+    ("sync.incremental", "get", "sync-list", None, {"since": None}),
+    ("async.users.list", "get", "async-user-list", None, {}),
+    ("async.users.retrieve", "get", "async-user-detail", "user", {}),
+    ("async.projects.list", "get", "async-project-list", None, {}),
+    ("async.projects.retrieve", "get", "async-project-detail", "project", {}),
+    ("async.tasks.list", "get", "async-task-list", None, {}),
+    ("async.tasks.list_cursor", "get", "async-task-list", None, {"cursor": ""}),
+    ("async.tasks.retrieve", "get", "async-task-detail", "task", {}),
+    ("async.comments.list", "get", "async-comment-list", None, {}),
+    ("async.comments.retrieve", "get", "async-comment-detail", "comment", {}),
+]
+
+MODELS = {
+    "user": User,
+    "project": Project,
+    "task": Task,
+    "comment": Comment,
+}
+
+
+# p95 changes smaller than this are noise whatever the relative change
+NOISE_MS = 0.5
+
+
+def server_name():
+    """
+    A host name the requests are allowed to use
+    """
+    hosts = [host for host in settings.ALLOWED_HOSTS if host != "*"]
+    return hosts[0].lstrip(".") if hosts else "localhost"
+
+
+def percentile(values, fraction):
+    return values[max(0, int(len(values) * fraction) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Call every viewset action as a user of each role through APIClient "
+        "and report p50/p95 latency and query counts, e.g. on data made by "
+        "generate_data. Each request runs in a transaction that is rolled "
+        "back, and write endpoints act on objects other than the benchmark "
+        "user. Results are saved as JSON and can be compared to a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20)
+        parser.add_argument("--output", default="benchmark-results.json")
+        parser.add_argument("--baseline", help="Results of a previous run")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=20.0,
+            help="Report a regression above this p95 increase, in percent",
+        )
+        parser.add_argument(
+            "--endpoints",
+            nargs="+",
+            help="Only run these endpoints, e.g. tasks.list, or groups, e.g. tasks",
+        )
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help="Keep the list cache between requests instead of clearing it",
+        )
+
+    def handle(self, *args, **options):
+        endpoints = [
+            endpoint
+            for endpoint in ENDPOINTS
+            if not options["endpoints"]
+            or any(
+                endpoint[0] == name or endpoint[0].startswith(f"{name}.")
+                for name in options["endpoints"]
+            )
+        ]
+        results = []
+        # Expected 403 responses would otherwise be logged as warnings
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            for role in UserRoleChoices.values:
+                results += self.run_role(role, endpoints, options)
+        finally:
+            request_logger.setLevel(level)
+
+        report = {
+            "meta": {
+                "timestamp": timezone.now().isoformat(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "requests": options["requests"],
+                "warm_cache": options["warm_cache"],
+                "rows": {
+                    "users": User.objects.count(),
+                    "projects": Project.objects.count(),
+                    "tasks": Task.objects.count(),
+                    "comments": Comment.objects.count(),
+                },
+            },
+            "results": results,
+        }
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Saved {len(results)} results to {options['output']}")
+        if options["baseline"]:
+            self.compare(results, options["baseline"], options["threshold"])
+
+    def run_role(self, role, endpoints, options):
+        user = self.benchmark_user(role)
+        if user is None:
+            self.stderr.write(f"No {role} user, skipping the role")
+            return []
+        client = APIClient(SERVER_NAME=server_name())
+        token = RoleTokenObtainPairSerializer.get_token(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        results = []
+        for endpoint in endpoints:
+            result = self.run(client, user, endpoint, options)
+            if result is None:
+                continue
+            results.append(result)
+            self.stdout.write(
+                f"{result['endpoint']:<24} {role:<16} {result['status']} "
+                f"p50={result['p50_ms']:8.2f}ms p95={result['p95_ms']:8.2f}ms "
+                f"queries={result['queries']}"
+            )
+        return results
+
+    def benchmark_user(self, role):
+        """
+        The user of the role in the most projects, so that the lists and
+        permission checks have work to do
+        """
+        return (
+            User.objects.filter(role=role)
+            .annotate(projects_count=Count("project_members"))
+            .order_by("-projects_count", "pk")
+            .first()
+        )
+
+    def visible_object(self, kind, user, write=False):
+        """
+        The first object of the kind the user can see; writes never target
+        the benchmark user itself, whose role and access the remaining
+        requests depend on
+        """
+        queryset = MODELS[kind].objects.visible_to(user, "retrieve")
+        if write and kind == "user":
+            queryset = queryset.exclude(pk=user.pk)
+        return queryset.order_by("pk").first()
+
+    def reset_caches(self, user):
+        """
+        Drop what a rolled back write left in the default cache (generations,
+        project access and auth states are not rolled back with the database)
+        and warm up the benchmark user's entries again
+        """
+        cache.clear()
+        set_auth_state(user)
+        get_project_access(user)
+
+    def payload(self, name, user):
+        project = self.visible_object("project", user)
+        project_id = project and project.pk
+        task = self.visible_object("task", user)
+        task_id = task and task.pk
+        other = User.objects.exclude(pk=user.pk).order_by("pk").first()
+        member_ids = [other.pk] if other else []
+        new_user = {
+            "username": "benchmark",
+            "email": "benchmark@example.com",
+            "role": UserRoleChoices.DEVELOPER,
+            "password": "benchmark",
+        }
+        new_project = {
+            "name": "benchmark",
+            "description": "benchmark",
+            "members": member_ids,
+        }
+        new_task = {
+            "title": "benchmark",
+            "description": "benchmark",
+            "status": "TO_DO",
+            "priority": "LOW",
+            "project_id": project_id,
+        }
+        new_comment = {"content": "benchmark", "project_id": project_id}
+        return {
+            "users.create": new_user,
+            "users.update": new_user,
+            "users.partial_update": {"username": "benchmark"},
+            "users.bulk": [
+                {**new_user, "username": f"benchmark{i}", "email": f"b{i}@example.com"}
+                for i in range(10)
+            ],
+            "projects.create": new_project,
+            "projects.update": new_project,
+            "projects.partial_update": {"description": "benchmark"},
+            "projects.members_add": {"members": member_ids},
+            "projects.members_replace": {"members": member_ids},
+            "projects.members_remove": {"members": member_ids},
+            "tasks.create": new_task,
+            "tasks.update": new_task,
+            "tasks.partial_update": {"status": "IN_PROGRESS"},
+            "tasks.bulk_create": [new_task] * 10,
+            "tasks.bulk_update": [{"id": task_id, "status": "IN_PROGRESS"}],
+            "tasks.bulk_destroy": [task_id],
+            "comments.create": new_comment,
+            "comments.update": new_comment,
+            "comments.partial_update": {"content": "benchmark"},
+        }.get(name)
+
+    def run(self, client, user, endpoint, options):
+        name, method, url_name, kind, params = endpoint
+        write = method != "get"
+        if kind is None:
+            url = reverse(url_name)
+        else:
+            obj = self.visible_object(kind, user, write)
+            if obj is None:
+                return None
+            url = reverse(url_name, args=[obj.pk])
+        if "since" in params:
+            watermark = client.get(reverse("sync-list")).data.get("watermark")
+            params = {**params, "since": watermark}
+        if params:
+            url += "?" + urlencode(params)
+        data = self.payload(name, user)
+        list_cache = caches[LIST_CACHE_ALIAS]
+
+        latencies, queries, statuses = [], [], set()
+        # The first request warms up the access and auth caches
+        for i in range(options["requests"] + 1):
+            if not options["warm_cache"]:
+                list_cache.clear()
+            with transaction.atomic(), CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                if method == "get":
+                    response = client.get(url)
+                else:
+                    response = getattr(client, method)(url, data, format="json")
+                if getattr(response, "streaming", False):
+                    b"".join(response.streaming_content)
+                elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+            if write:
+                self.reset_caches(user)
+            if i:
+                latencies.append(elapsed * 1000)
+                queries.append(len(captured.captured_queries))
+                statuses.add(response.status_code)
+        latencies.sort()
+        return {
+            "endpoint": name,
+            "role": user.role,
+            "status": ",".join(str(code) for code in sorted(statuses)),
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "queries": statistics.median(queries),
+            "max_queries": max(queries),
+        }
+
+    def compare(self, results, path, threshold):
+        try:
+            with open(path) as f:
+                baseline = json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not read the baseline {path}: {e}")
+        previous = {(r["endpoint"], r["role"]): r for r in baseline}
+        regressions = 0
+        for result in results:
+            before = previous.get((result["endpoint"], result["role"]))
+            if before is None:
+                continue
+            delta = result["p95_ms"] - before["p95_ms"]
+            change = delta / before["p95_ms"] * 100 if before["p95_ms"] else 0
+            significant = abs(change) > threshold and abs(delta) > NOISE_MS
+            queries = result["queries"] - before["queries"]
+            regressed = (significant and delta > 0) or queries > 0
+            regressions += regressed
+            if regressed or significant or queries < 0:
+                self.stdout.write(
+                    f"{'REGRESSION' if regressed else 'improved':<10} "
+                    f"{result['endpoint']:<24} {result['role']:<16} "
+                    f"p95 {before['p95_ms']:.2f}ms -> {result['p95_ms']:.2f}ms "
+                    f"({change:+.0f}%) queries {before['queries']} -> "
+                    f"{result['queries']}"
+                )
+        self.stdout.write(f"{regressions} regressions against {path}")
@@ -0,0 +1,340 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+PERMISSION = "permission"
+SERIALIZER = "serializer"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+REQUEST_LABELS = ("view", "action", "role")
+
+_current = contextvars.ContextVar("core_request_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Measurements of the request being processed
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.times = {PERMISSION: 0.0, SERIALIZER: 0.0}
+        self.active = set()
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                # One count per bucket, then +Inf, then the sum
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def reset(self):
+        with self.lock:
+            self.series = {}
+
+    def expose(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self.lock:
+            series = {labels: list(counts) for labels, counts in self.series.items()}
+        for labels, counts in sorted(series.items()):
+            names = [
+                f'{name}="{escape(value)}"' for name, value in zip(self.labels, labels)
+            ]
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], counts):
+                cumulative += count
+                le = ",".join([*names, f'le="{bound}"'])
+                lines.append(f"{self.name}_bucket{{{le}}} {cumulative}")
+            label_text = ",".join(names)
+            lines.append(f"{self.name}_sum{{{label_text}}} {counts[-1]}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram(
+    "core_request_duration_seconds", "Time spent handling the request", REQUEST_LABELS
+)
+REQUEST_QUERIES = Histogram(
+    "core_request_queries",
+    "Number of SQL queries run by the request",
+    REQUEST_LABELS,
+    QUERY_BUCKETS,
+)
+REQUEST_SQL = Histogram(
+    "core_request_sql_seconds", "Time spent running SQL queries", REQUEST_LABELS
+)
+REQUEST_SERIALIZER = Histogram(
+    "core_request_serializer_seconds",
+    "Time spent rendering objects with serializers",
+    REQUEST_LABELS,
+)
+REQUEST_PERMISSION = Histogram(
+    "core_request_permission_seconds",
+    "Time spent in the permission checks of core.utils",
+    REQUEST_LABELS,
+)
+PERMISSION_CHECK = Histogram(
+    "core_permission_check_seconds",
+    "Time spent in each permission check, including the checks it calls",
+    ("check", "role"),
+)
+HISTOGRAMS = [
+    REQUEST_DURATION,
+    REQUEST_QUERIES,
+    REQUEST_SQL,
+    REQUEST_SERIALIZER,
+    REQUEST_PERMISSION,
+    PERMISSION_CHECK,
+]
+
+
+def expose():
+    """
+    All the histograms in the Prometheus text format
+    """
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.expose()
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    for histogram in HISTOGRAMS:
+        histogram.reset()
+
+
+@contextmanager
+def timed(kind):
+    """
+    Add the time spent in the block to the ``kind`` time of the current
+    request. Nested blocks of the same kind are counted once.
+    """
+    metrics = _current.get()
+    if metrics is None or kind in metrics.active:
+        yield
+        return
+    metrics.active.add(kind)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.times[kind] += time.perf_counter() - start
+        metrics.active.discard(kind)
+
+
+def timed_permission(check):
+    """
+    Attribute the time spent in a ``check(request, view)`` permission
+    function to the permission time of the request and to the check itself
+    """
+
+    @wraps(check)
+    def wrapper(request, view):
+        if _current.get() is None:
+            return check(request, view)
+        start = time.perf_counter()
+        try:
+            with timed(PERMISSION):
+                return check(request, view)
+        finally:
+            role = getattr(request.user, "role", None) or "anonymous"
+            PERMISSION_CHECK.observe(
+                (check.__name__, role), time.perf_counter() - start
+            )
+
+    return wrapper
+
+
+class TimedRepresentationMixin:
+    """
+    Serializer mixin attributing the time spent rendering to the
+    serializer time of the request
+    """
+
+    def to_representation(self, instance):
+        with timed(SERIALIZER):
+            return super().to_representation(instance)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper counting the queries and SQL time of the current request
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += time.perf_counter() - start
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def request_labels(request, response):
+    """
+    (view, action, role) of a request: the basename and action of DRF
+    viewsets, or the URL name and method of other views
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    view = (getattr(response, "renderer_context", None) or {}).get("view")
+    # Viewset actions returning a plain HttpResponse have no renderer context
+    initkwargs = getattr(match.func, "initkwargs", None) or {}
+    actions = getattr(match.func, "actions", None) or {}
+    method = request.method.lower()
+    name = (
+        getattr(view, "basename", None)
+        or initkwargs.get("basename")
+        or match.url_name
+        or match.view_name
+    )
+    action = getattr(view, "action", None) or actions.get(method) or method
+    role = getattr(getattr(request, "user", None), "role", None) or "anonymous"
+    return name, action, role
+
+
+def observe_request(request, response, metrics, duration):
+    labels = request_labels(request, response)
+    if labels is None:
+        return
+    REQUEST_DURATION.observe(labels, duration)
+    REQUEST_QUERIES.observe(labels, metrics.queries)
+    REQUEST_SQL.observe(labels, metrics.sql_time)
+    REQUEST_SERIALIZER.observe(labels, metrics.times[SERIALIZER])
+    REQUEST_PERMISSION.observe(labels, metrics.times[PERMISSION])
+
+
+# Returned by next/anext at the end of a streamed response
+_END = object()
+
+
+def measured_stream(chunks, metrics, finish):
+    """
+    Iterate over the chunks of a streamed response with the metrics of its
+    request current, so that the queries run while streaming are counted,
+    and call ``finish`` once the response is exhausted or closed
+    """
+    chunks = iter(chunks)
+    try:
+        while True:
+            token = _current.set(metrics)
+            try:
+                chunk = next(chunks, _END)
+            finally:
+                _current.reset(token)
+            if chunk is _END:
+                return
+            yield chunk
+    finally:
+        finish()
+
+
+async def ameasured_stream(chunks, metrics, finish):
+    """
+    measured_stream for async streaming content
+    """
+    chunks = aiter(chunks)
+    try:
+        while True:
+            token = _current.set(metrics)
+            try:
+                chunk = await anext(chunks, _END)
+            finally:
+                _current.reset(token)
+            if chunk is _END:
+                return
+            yield chunk
+    finally:
+        finish()
+
+
+class MetricsMiddleware:
+    """
+    Measure every request: duration, query count and SQL time recorded by
+    the execute wrapper, and the serializer and permission time recorded by
+    ``timed``, aggregated into histograms per view, action and role.
+    Streamed responses are measured until their content is consumed.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.observe(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.observe(request, response, metrics, start)
+
+    def observe(self, request, response, metrics, start):
+        def finish():
+            duration = time.perf_counter() - start
+            observe_request(request, response, metrics, duration)
+
+        if not response.streaming:
+            finish()
+        elif response.is_async:
+            response.streaming_content = ameasured_stream(
+                response.streaming_content, metrics, finish
+            )
+        else:
+            response.streaming_content = measured_stream(
+                response.streaming_content, metrics, finish
+            )
+        return response
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+SEARCH_TABLES = {
+    "core_task_search": ("core_task", ("title", "description")),
+    "core_project_search": ("core_project", ("name", "description")),
+    "core_comment_search": ("core_comment", ("content",)),
+}
+
+
+def create_search_tables(apps, schema_editor):
+    """
+    Full text search tables only exist on SQLite, other databases
+    search the tables themselves through core.search
+    """
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for table, (source, columns) in SEARCH_TABLES.items():
+        columns = ", ".join(columns)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {table} USING fts5({columns}, tokenize='unicode61')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {table} (rowid, {columns}) SELECT id, {columns} FROM {source}"
+        )
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for table in SEARCH_TABLES:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_list_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2 on 2026-10-17 23:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    """
+    Count the existing tasks and comments of each project, like
+    core.counters.expected_counters with the historical models
+    """
+    Task = apps.get_model("core", "Task")
+    Comment = apps.get_model("core", "Comment")
+    ProjectCounter = apps.get_model("core", "ProjectCounter")
+    counters = []
+    tasks = Task.objects.filter(project_id__isnull=False)
+    for dimension, field in [
+        ("status", "status"),
+        ("priority", "priority"),
+        ("assignee", "assigned_to"),
+    ]:
+        rows = tasks.values_list("project_id", field).annotate(count=Count("id"))
+        for project_id, value, count in rows.order_by():
+            key = "" if value is None else str(value)
+            counters.append((project_id, dimension, key, count))
+
+    comments = Comment.objects.annotate(
+        owner=Coalesce("project_id", "task_id__project_id")
+    ).filter(owner__isnull=False)
+    open_comments = comments.filter(task_id__isnull=False).exclude(
+        task_id__status="DONE"
+    )
+    for dimension, queryset in [
+        ("comments", comments),
+        ("open_comments", open_comments),
+    ]:
+        rows = queryset.values_list("owner").annotate(count=Count("id")).order_by()
+        for project_id, count in rows:
+            counters.append((project_id, dimension, "", count))
+
+    ProjectCounter.objects.bulk_create(
+        ProjectCounter(project_id=project_id, dimension=dimension, key=key, count=n)
+        for project_id, dimension, key, n in counters
+        if n
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("status", "Tasks by status"),
+                            ("priority", "Tasks by priority"),
+                            ("assignee", "Tasks by assignee"),
+                            ("comments", "Comments"),
+                            ("open_comments", "Comments on open tasks"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("key", models.CharField(blank=True, max_length=30)),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="counters",
+                        to="core.project",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("project", "dimension", "key"),
+                        name="project_counter_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
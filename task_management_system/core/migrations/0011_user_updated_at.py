@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 09:40
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_user_updated_at(apps, schema_editor):
+    User = apps.get_model("core", "User")
+    User.objects.update(updated_at=F("date_joined"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_user_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["updated_at", "id"], name="user_updated_idx"),
+        ),
+    ]
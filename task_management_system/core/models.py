@@ -1,14 +1,173 @@
 from django.db import models
+from django.db.models import BooleanField, ExpressionWrapper, Q, Value
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 
-from core.constants import ADMIN, PriorityChoices, TaskStatusChoices, UserRoleChoices
+from core.constants import (
+    ADMIN,
+    PROJECT_MANAGER,
+    TECH_LEAD,
+    CounterDimensionChoices,
+    PriorityChoices,
+    TaskStatusChoices,
+    UserRoleChoices,
+)
+
+# Actions listing objects, which may apply wider rules than the single
+# object actions
+LIST_ACTIONS = ("list", "export")
+NOTHING = Q(pk__in=[])
+
+
+class VisibleQuerySet(models.QuerySet):
+    """
+    Queryset encoding the object rules of the viewset's view_permissions as
+    SQL, so that the list views and the object lookups share them. Rules
+    reading the request body stay in view_permissions.
+    """
+
+    @staticmethod
+    def visibility_filter(user, action, access):
+        """
+        Q of the objects a non admin user may apply the action to, given
+        the user's ProjectAccess. Querysets without rules show them nothing.
+        """
+        return NOTHING
+
+    def visibility(self, user, action, request=None, access=None):
+        if user.role == ADMIN:
+            return Q()
+        if access is None:
+            # core.access imports the models
+            from core.access import get_project_access
+
+            access = get_project_access(user, request)
+        return self.visibility_filter(user, action, access)
+
+    def visible_to(self, user, action="list", request=None, access=None):
+        """
+        The objects the user may apply the action to
+        """
+        return self.filter(self.visibility(user, action, request, access))
+
+    def with_visibility(self, user, action, request=None, access=None):
+        """
+        Annotate ``is_visible``: whether visible_to would return the object.
+        Looking an object up through this queryset tells apart a missing
+        object (404) and a forbidden one (403) in a single query.
+        """
+        condition = self.visibility(user, action, request, access)
+        if condition:
+            condition = ExpressionWrapper(condition, output_field=BooleanField())
+        else:
+            condition = Value(True)
+        return self.annotate(is_visible=condition)
+
+
+class UserQuerySet(VisibleQuerySet):
+    @staticmethod
+    def visibility_filter(user, action, access):
+        """
+        Project managers see the members and creators of their projects,
+        and themselves outside of lists; the other roles only themselves
+        and nobody in lists
+        """
+        if user.role != PROJECT_MANAGER:
+            return NOTHING if action in LIST_ACTIONS else Q(pk=user.pk)
+        members = Project.members.through.objects.filter(
+            project_id__in=access.all
+        ).values("user_id")
+        creators = Project.objects.filter(id__in=access.all).values("created_by_id")
+        shared = Q(id__in=members) | Q(id__in=creators)
+        return shared if action in LIST_ACTIONS else shared | Q(pk=user.pk)
+
+
+class ProjectQuerySet(VisibleQuerySet):
+    @staticmethod
+    def visibility_filter(user, action, access):
+        """
+        Project managers see and manage the projects they created or are
+        members of; the other roles see the projects they are members of
+        """
+        if user.role == PROJECT_MANAGER:
+            return Q(id__in=access.all)
+        if action in (*LIST_ACTIONS, "retrieve", "stats"):
+            return Q(id__in=access.member)
+        return NOTHING
+
+
+class TaskQuerySet(VisibleQuerySet):
+    @staticmethod
+    def visibility_filter(user, action, access):
+        """
+        Project managers see the tasks of their projects, tech leads the
+        tasks assigned to or created by them and the other roles the tasks
+        assigned to them. Project managers may update any task they move to
+        one of their projects (checked on the body), tech leads the tasks
+        they see. Also applies to tombstones, which copy the project,
+        assignee and creator columns.
+        """
+        if user.role == PROJECT_MANAGER:
+            if action in ("update", "partial_update"):
+                return Q()
+            return Q(project_id__in=access.all)
+        if user.role == TECH_LEAD:
+            return Q(assigned_to_id=user.pk) | Q(created_by_id=user.pk)
+        if action in (*LIST_ACTIONS, "retrieve"):
+            return Q(assigned_to_id=user.pk)
+        return NOTHING
+
+
+class CommentQuerySet(VisibleQuerySet):
+    @staticmethod
+    def visibility_filter(user, action, access, tasks=None):
+        """
+        Comments visible to the user, without joins or DISTINCT:
+        - comments on the user's projects (created or member for project
+          managers, member for others)
+        - comments on tasks assigned to the user, in the user's projects
+          (project managers) or created by the user (tech leads, and in
+          lists the other roles too)
+        Only authors change their comments. Also applies to tombstones,
+        which copy the project and task columns, and to archived comments
+        given the archived ``tasks``.
+        """
+        if action in ("update", "partial_update"):
+            return Q(author_id=user.pk)
+        if user.role == PROJECT_MANAGER:
+            project_ids = access.all
+            task_filter = Q(assigned_to_id=user.pk) | Q(project_id__in=project_ids)
+        else:
+            project_ids = access.member
+            task_filter = Q(assigned_to_id=user.pk)
+            if user.role == TECH_LEAD or action in LIST_ACTIONS:
+                task_filter |= Q(created_by_id=user.pk)
+        if tasks is None:
+            tasks = Task.objects
+        visible_tasks = tasks.filter(task_filter).values("id")
+        if action in LIST_ACTIONS:
+            return Q(project_id__in=project_ids) | Q(task_id__in=visible_tasks)
+        # Outside of lists the project of a comment decides alone
+        return Q(project_id__in=project_ids) | Q(
+            project_id__isnull=True, task_id__in=visible_tasks
+        )
+
+
+class ArchivedCommentQuerySet(CommentQuerySet):
+    @staticmethod
+    def visibility_filter(user, action, access):
+        """
+        The comment rules, through the archived tasks
+        """
+        return CommentQuerySet.visibility_filter(
+            user, action, access, ArchivedTask.objects
+        )
 
 
-class UserManager(BaseUserManager):
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def _create_user(self, username, email, password, role, **extra_fields):
         if not username:
             raise ValueError("User must have username")
@@ -41,12 +200,19 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["date_joined", "id"], name="user_joined_idx"),
+            models.Index(fields=["updated_at", "id"], name="user_updated_idx"),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
@@ -61,6 +227,14 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="project_created_idx"),
+            models.Index(fields=["updated_at", "id"], name="project_updated_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -69,22 +243,53 @@ class Task(models.Model):
     title = models.CharField(max_length=50)
     description = models.CharField(max_length=200)
     created_by = models.ForeignKey(
-        User, on_delete=models.SET_NULL, null=True, related_name="created_tasks"
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="created_tasks",
+        db_index=False,
     )
     status = models.CharField(max_length=20, choices=TaskStatusChoices.choices)
     priority = models.CharField(max_length=20, choices=PriorityChoices.choices)
     project_id = models.ForeignKey(
-        Project, on_delete=models.CASCADE, null=True, related_name="tasks"
+        Project,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="tasks",
+        db_index=False,
     )
     assigned_to = models.ForeignKey(
-        User, on_delete=models.SET_NULL, null=True, related_name="assigned_tasks"
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="assigned_tasks",
+        db_index=False,
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        # The foreign keys are covered by the leading column of these indexes,
+        # which also serve the (created_at, id) ordering of the list views.
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="task_created_idx"),
+            models.Index(fields=["updated_at", "id"], name="task_updated_idx"),
+            models.Index(
+                fields=["assigned_to", "created_at"], name="task_assignee_created_idx"
+            ),
+            models.Index(
+                fields=["created_by", "created_at"], name="task_creator_created_idx"
+            ),
+            models.Index(
+                fields=["project_id", "created_at"], name="task_project_created_idx"
+            ),
+        ]
+
     def __str__(self):
         return self.title
-    
+
 
 class Comment(models.Model):
     content = models.CharField(max_length=200)
@@ -92,12 +297,178 @@ class Comment(models.Model):
         User, on_delete=models.SET_NULL, null=True, related_name="created_comments"
     )
     task_id = models.ForeignKey(
-        Task, on_delete=models.SET_NULL, null=True, related_name="comments"
+        Task,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="comments",
+        db_index=False,
     )
     project_id = models.ForeignKey(
-        Project, on_delete=models.SET_NULL, null=True, related_name="comments"
+        Project,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="comments",
+        db_index=False,
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="comment_created_idx"),
+            models.Index(fields=["updated_at", "id"], name="comment_updated_idx"),
+            models.Index(
+                fields=["task_id", "created_at"], name="comment_task_created_idx"
+            ),
+            models.Index(
+                fields=["project_id", "created_at"],
+                name="comment_project_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.content
+
+
+class ArchivedTask(models.Model):
+    """
+    Done task moved out of the task table by archive_tasks, under the same
+    id. The columns match Task so that the same visibility rules apply.
+    """
+
+    title = models.CharField(max_length=50)
+    description = models.CharField(max_length=200)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="+", db_index=False
+    )
+    status = models.CharField(max_length=20, choices=TaskStatusChoices.choices)
+    priority = models.CharField(max_length=20, choices=PriorityChoices.choices)
+    project_id = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="archived_tasks",
+        db_index=False,
+    )
+    assigned_to = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="+", db_index=False
+    )
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="archived_task_created_idx"),
+            models.Index(
+                fields=["assigned_to", "created_at"],
+                name="archived_task_assignee_idx",
+            ),
+            models.Index(
+                fields=["created_by", "created_at"], name="archived_task_creator_idx"
+            ),
+            models.Index(
+                fields=["project_id", "created_at"], name="archived_task_project_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedComment(models.Model):
+    """
+    Comment of an archived task, moved along with it
+    """
+
+    content = models.CharField(max_length=200)
+    author = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    task_id = models.ForeignKey(
+        ArchivedTask,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="comments",
+        db_index=False,
+    )
+    project_id = models.ForeignKey(
+        Project, on_delete=models.SET_NULL, null=True, related_name="+", db_index=False
+    )
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ArchivedCommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"], name="archived_comment_created_idx"
+            ),
+            models.Index(
+                fields=["task_id", "created_at"], name="archived_comment_task_idx"
+            ),
+            models.Index(
+                fields=["project_id", "created_at"],
+                name="archived_comment_project_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.content
+
+
+class ProjectCounter(models.Model):
+    """
+    Number of tasks of a project per status, priority and assignee and
+    number of comments on the project, maintained by core.counters
+    """
+
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, related_name="counters"
+    )
+    dimension = models.CharField(max_length=20, choices=CounterDimensionChoices.choices)
+    key = models.CharField(max_length=30, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "dimension", "key"],
+                name="project_counter_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} {self.dimension} {self.key}: {self.count}"
+
+
+class Tombstone(models.Model):
+    """
+    Deleted object, or object that some users can no longer see, reported by
+    the sync endpoint. The scope columns copy the ids that the visibility
+    rules of the object filter on, under the same names as on the object.
+    """
+
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    project_id = models.BigIntegerField(null=True)
+    task_id = models.BigIntegerField(null=True)
+    assigned_to_id = models.BigIntegerField(null=True)
+    created_by_id = models.BigIntegerField(null=True)
+    # Set on the rows of a deleted project, one per user who could see it
+    user_id = models.BigIntegerField(null=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
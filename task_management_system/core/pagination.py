@@ -0,0 +1,109 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+from core.constants import PAGE_SIZE
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(position, reverse=False):
+    """
+    Encode a keyset position into an opaque cursor string
+    """
+    value, pk = position
+    payload = {"v": value.isoformat(), "pk": pk, "r": reverse}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor string into ((value, pk), reverse)
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        position = (datetime.fromisoformat(payload["v"]), int(payload["pk"]))
+        return position, bool(payload.get("r", False))
+    except (TypeError, ValueError, KeyError, AttributeError) as e:
+        raise InvalidCursor(str(e))
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking on a (field, id) keyset instead of
+    counting rows and scanning an OFFSET.
+    """
+
+    def __init__(self, queryset, field, page_size=PAGE_SIZE):
+        self.queryset = queryset
+        self.field = field
+        self.page_size = page_size
+
+    def _position(self, obj):
+        if isinstance(obj, dict):
+            # Rows of a values() queryset
+            return obj[self.field], obj["pk"]
+        return getattr(obj, self.field), obj.pk
+
+    def _seek(self, position, reverse):
+        value, pk = position
+        lookup = "lt" if reverse else "gt"
+        return self.queryset.filter(
+            Q(**{f"{self.field}__{lookup}": value})
+            | Q(**{self.field: value, f"pk__{lookup}": pk})
+        )
+
+    def _window(self, cursor):
+        """
+        Queryset of the rows following the cursor, and the direction
+        """
+        reverse = False
+        queryset = self.queryset
+        if cursor:
+            position, reverse = decode_cursor(cursor)
+            queryset = self._seek(position, reverse)
+
+        if reverse:
+            queryset = queryset.order_by(f"-{self.field}", "-pk")
+        else:
+            queryset = queryset.order_by(self.field, "pk")
+        return queryset[: self.page_size + 1], reverse
+
+    def _page(self, object_list, cursor, reverse):
+        has_more = len(object_list) > self.page_size
+        object_list = object_list[: self.page_size]
+        if reverse:
+            object_list.reverse()
+
+        next_cursor = previous_cursor = None
+        if object_list:
+            first, last = object_list[0], object_list[-1]
+            if reverse:
+                next_cursor = encode_cursor(self._position(last))
+                if has_more:
+                    previous_cursor = encode_cursor(self._position(first), True)
+            else:
+                if has_more:
+                    next_cursor = encode_cursor(self._position(last))
+                if cursor:
+                    previous_cursor = encode_cursor(self._position(first), True)
+        return KeysetPage(object_list, next_cursor, previous_cursor)
+
+    def page(self, cursor=None):
+        queryset, reverse = self._window(cursor)
+        return self._page(list(queryset), cursor, reverse)
+
+    async def apage(self, cursor=None):
+        queryset, reverse = self._window(cursor)
+        return self._page([obj async for obj in queryset], cursor, reverse)
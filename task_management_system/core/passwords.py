@@ -0,0 +1,51 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import batched
+
+from django.contrib.auth.hashers import get_hasher, make_password
+
+from core.constants import PASSWORD_POOL_MIN_ITEMS
+
+
+def encode_passwords(hasher, passwords):
+    """
+    Hash a chunk of passwords. Runs in the pool workers, so this module
+    must not import models.
+    """
+    return [hasher.encode(password, hasher.salt()) for password in passwords]
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hash the passwords with the preferred hasher, in the same order. Large
+    batches are split across a process pool since hashing is CPU bound and
+    holds the GIL. None gives an unusable password, like set_password(None).
+
+    The pool workers are started by a fork server (or spawned where there
+    is none) rather than forked, since forking a process running threads,
+    such as a threaded server, can copy locks held by the other threads.
+    """
+    passwords = list(passwords)
+    hashes = [
+        make_password(None) if password is None else None for password in passwords
+    ]
+    plain = [password for password in passwords if password is not None]
+    hasher = get_hasher()
+    # process_cpu_count (3.13+) only counts the CPUs this process may use
+    workers = workers or getattr(os, "process_cpu_count", os.cpu_count)() or 1
+    if workers == 1 or len(plain) < PASSWORD_POOL_MIN_ITEMS:
+        encoded = encode_passwords(hasher, plain)
+    else:
+        size = math.ceil(len(plain) / (workers * 4))
+        chunks = list(batched(plain, size))
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn"
+        )
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            results = executor.map(encode_passwords, [hasher] * len(chunks), chunks)
+            encoded = [password for chunk in results for password in chunk]
+    encoded = iter(encoded)
+    return [next(encoded) if hashed is None else hashed for hashed in hashes]
@@ -0,0 +1,157 @@
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.urls import get_resolver
+from rest_framework_roles.granting import GrantChecker
+from rest_framework_roles.patching import iter_urlpatterns
+
+from core.cache import get_generations, user_generation_keys
+from core.constants import PERMISSION_DECISION_TIMEOUT
+from core.metrics import PERMISSION, timed
+
+PERMISSION_DENIED = "Permission denied for user."
+
+
+def uses_request_data(check):
+    """
+    Mark a permission check whose outcome depends on the request body,
+    so that its decisions are never cached
+    """
+    check.uses_request_data = True
+    return check
+
+
+def reads_loaded_object(check):
+    """
+    Mark a permission check that only reads the object the view loads
+    anyway: caching its decisions would save nothing but add cache reads
+    """
+    check.reads_loaded_object = True
+    return check
+
+
+def compile_grant(granted):
+    """
+    The granting rule of a view_permissions entry as True, False or a
+    ``check(request, view)`` function. anyof and allof stop at the first
+    check deciding the outcome.
+    """
+    if not isinstance(granted, GrantChecker):
+        return granted
+    checks = [compile_grant(check) for check in granted.checkers]
+    scheme = GrantChecker.SCHEMES[granted.scheme]
+
+    def check(request, view):
+        return scheme(c if isinstance(c, bool) else c(request, view) for c in checks)
+
+    check.uses_request_data = any(
+        getattr(c, "uses_request_data", False) for c in checks
+    )
+    check.reads_loaded_object = all(
+        isinstance(c, bool) or getattr(c, "reads_loaded_object", False) for c in checks
+    )
+    return check
+
+
+def compile_view_permissions(view_permissions):
+    """
+    Map each (action, role) of view_permissions to its granting rule.
+    Pairs missing from the table are denied.
+    """
+    table = {}
+    for actions, rules in view_permissions.items():
+        for action in actions.split(","):
+            for role, granted in rules.items():
+                table[action.strip(), role] = compile_grant(granted)
+    return table
+
+
+def decision_key(request, view, action):
+    """
+    Cache key of the decision for the caller, the object of a detail route
+    and the action, within the ``permission_scope(request)`` of views that
+    look objects up in more than one place. It includes the generations of
+    the caller and of their projects, which the signals bump when
+    memberships, assignments or the object change.
+    """
+    user = request.user
+    generation_keys = user_generation_keys(user, request)
+    generations = get_generations(generation_keys)
+    parts = [
+        type(view).__qualname__,
+        action,
+        str(view.kwargs[view.lookup_url_kwarg or view.lookup_field]),
+        user.role,
+        str(user.pk),
+        repr([generations[key] for key in generation_keys]),
+    ]
+    if hasattr(view, "permission_scope"):
+        parts.append(view.permission_scope(request))
+    digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+    return f"core:permission:{digest}"
+
+
+def has_permission(request, view, action):
+    """
+    Look up the rule of the caller's role for the action and evaluate it.
+    Decisions on the object of a detail route are cached unless the check
+    reads the request body or only the object the view loads anyway.
+    """
+    role = getattr(request.user, "role", None)
+    check = view.permission_table.get((action, role), False)
+    if isinstance(check, bool):
+        return check
+    lookup = view.lookup_url_kwarg or view.lookup_field
+    if (
+        lookup not in view.kwargs
+        or getattr(check, "uses_request_data", False)
+        or getattr(check, "reads_loaded_object", False)
+    ):
+        return bool(check(request, view))
+    key = decision_key(request, view, action)
+    decision = cache.get(key)
+    if decision is None:
+        decision = bool(check(request, view))
+        cache.set(key, decision, PERMISSION_DECISION_TIMEOUT)
+    return decision
+
+
+def protect(handler, action):
+    @wraps(handler)
+    def protected_handler(self, request, *args, **kwargs):
+        with timed(PERMISSION):
+            granted = has_permission(request, self, action)
+        if not granted:
+            raise PermissionDenied(PERMISSION_DENIED)
+        return handler(self, request, *args, **kwargs)
+
+    return protected_handler
+
+
+def compile_permissions(urlconf=None):
+    """
+    Replace the handlers that rest_framework_roles wrapped for the
+    view_permissions of the views in the URLconf. Its wrappers walk the
+    ROLES predicates and the granting rules on every request; the compiled
+    handlers look up the rule of the caller's role for the action directly.
+    """
+    classes = {
+        pattern.callback.cls
+        for pattern in iter_urlpatterns(get_resolver(urlconf).url_patterns)
+        if hasattr(pattern.callback, "cls")
+    }
+    for cls in classes:
+        if (
+            "_view_permissions" not in cls.__dict__
+            or "permission_table" in cls.__dict__
+        ):
+            continue
+        cls.permission_table = compile_view_permissions(cls.view_permissions)
+        for action in cls._view_permissions:
+            handler = getattr(cls, action)
+            # Unwrap the rest_framework_roles wrapper only
+            if handler.__code__.co_name == "_rfr_wrapped_handler":
+                handler = handler.__wrapped__
+            setattr(cls, action, protect(handler, action))
@@ -0,0 +1,70 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+class QueryPlan:
+    def __init__(self, only, select_related, prefetch_related):
+        self.only = only
+        self.select_related = select_related
+        self.prefetch_related = prefetch_related
+
+    def apply(self, queryset, defer=True):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if defer:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+
+def _plan_fields(model, serializer, prefix=""):
+    only, select_related, prefetch_related = [], [], []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*" or "." in field.source:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            # Properties and methods: nothing to plan
+            continue
+        path = f"{prefix}{field.source}"
+        if model_field.many_to_many or model_field.one_to_many:
+            related_model = model_field.related_model
+            if isinstance(field, serializers.ManyRelatedField):
+                related = related_model.objects.only("pk")
+            else:
+                related = plan_queryset(related_model.objects.all(), type(field.child))
+            prefetch_related.append(Prefetch(path, queryset=related))
+        elif isinstance(field, serializers.BaseSerializer):
+            select_related.append(path)
+            only.append(path)
+            nested = _plan_fields(model_field.related_model, field, f"{path}__")
+            only += nested[0] or [f"{path}__pk"]
+            select_related += nested[1]
+            prefetch_related += nested[2]
+        else:
+            only.append(path)
+    return only, select_related, prefetch_related
+
+
+@lru_cache(maxsize=None)
+def get_query_plan(serializer_class):
+    """
+    Derive the columns, joins and prefetches needed to render the readable
+    fields of a model serializer: plain and primary key fields become only()
+    columns, nested serializers become select_related joins and to-many
+    relations become a prefetch
+    """
+    serializer = serializer_class()
+    only, select_related, prefetch_related = _plan_fields(
+        serializer_class.Meta.model, serializer
+    )
+    return QueryPlan(["pk", *only], select_related, prefetch_related)
+
+
+def plan_queryset(queryset, serializer_class, defer=True):
+    return get_query_plan(serializer_class).apply(queryset, defer)
@@ -0,0 +1,156 @@
+from functools import lru_cache
+
+from rest_framework import serializers
+
+from core.metrics import SERIALIZER, timed
+
+# Serializer fields whose representation of a column value is the value itself
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.RelatedField,
+    serializers.ManyRelatedField,
+)
+
+
+class InvalidProjection(Exception):
+    pass
+
+
+def parse_names(value):
+    """
+    Names of a comma separated query parameter such as ``?fields=id,title``
+    """
+    return list(
+        dict.fromkeys(name.strip() for name in value.split(",") if name.strip())
+    )
+
+
+class FieldSpec:
+    def __init__(self, name, source, convert, many):
+        self.name = name
+        self.source = source
+        self.convert = convert
+        self.many = many
+
+
+@lru_cache(maxsize=None)
+def get_field_specs(serializer_class):
+    """
+    Readable fields of a model serializer, in output order, with the column
+    each one renders and the function converting the column value, or None
+    when the value is rendered as is
+    """
+    model = serializer_class.Meta.model
+    specs = {}
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        model_field = model._meta.get_field(field.source)
+        convert = None
+        if not isinstance(field, PASSTHROUGH_FIELDS):
+            convert = field.to_representation
+        specs[name] = FieldSpec(name, field.source, convert, model_field.many_to_many)
+    return specs
+
+
+class Expansion:
+    """
+    Related objects rendered in place of their primary key. Only the objects
+    of ``queryset`` are expanded; the others keep their primary key.
+    """
+
+    def __init__(self, serializer_class, queryset):
+        self.projection = Projection(serializer_class)
+        self.queryset = queryset
+
+    def lookup(self, ids):
+        if not ids:
+            return {}
+        rows = list(self.projection.values(self.queryset.filter(pk__in=ids)))
+        return dict(zip((row["pk"] for row in rows), self.projection.render(rows)))
+
+
+class Projection:
+    """
+    Read-only rendering of a model serializer from ``values()`` rows, without
+    instantiating models or serializers per row. ``fields`` restricts the
+    output to some of the serializer fields and ``expansions`` maps relation
+    fields to the Expansion rendering them as nested objects.
+    Many-to-many fields and expansions each cost one query per page.
+    """
+
+    def __init__(self, serializer_class, fields=None, expansions=None):
+        specs = get_field_specs(serializer_class)
+        expansions = expansions or {}
+        unknown = [name for name in fields or () if name not in specs]
+        if unknown:
+            raise InvalidProjection(f"Unknown fields: {', '.join(unknown)}")
+        if fields is None:
+            fields = list(specs)
+        else:
+            fields = [*fields, *(name for name in expansions if name not in fields)]
+        self.model = serializer_class.Meta.model
+        self.fields = [specs[name] for name in fields]
+        self.expansions = expansions
+        self.columns = ["pk"]
+        self.columns += [spec.source for spec in self.fields if not spec.many]
+
+    def values(self, queryset, *extra):
+        """
+        The queryset as the rows the projection renders, plus the
+        ``extra`` columns
+        """
+        return queryset.values(*dict.fromkeys([*self.columns, *extra]))
+
+    def related_ids(self, spec, pks):
+        """
+        Map each primary key to the ids of its many-to-many relation
+        """
+        model_field = self.model._meta.get_field(spec.source)
+        through = model_field.remote_field.through
+        source = f"{model_field.m2m_field_name()}_id"
+        target = f"{model_field.m2m_reverse_field_name()}_id"
+        related = {pk: [] for pk in pks}
+        rows = (
+            through.objects.filter(**{f"{source}__in": pks})
+            .order_by(target)
+            .values_list(source, target)
+        )
+        for pk, related_id in rows:
+            related[pk].append(related_id)
+        return related
+
+    def render(self, rows):
+        """
+        Render the rows column by column
+        """
+        with timed(SERIALIZER):
+            return self._render(rows)
+
+    def _render(self, rows):
+        items = [{} for _ in rows]
+        pks = [row["pk"] for row in rows]
+        for spec in self.fields:
+            expansion = self.expansions.get(spec.name)
+            if spec.many:
+                values = list(self.related_ids(spec, pks).values())
+                if expansion:
+                    ids = {pk for related in values for pk in related}
+                    objects = expansion.lookup(ids)
+                    values = [
+                        [objects.get(pk, pk) for pk in related] for related in values
+                    ]
+            else:
+                values = [row[spec.source] for row in rows]
+                if expansion:
+                    objects = expansion.lookup({pk for pk in values if pk is not None})
+                    values = [objects.get(pk, pk) for pk in values]
+                elif spec.convert is not None:
+                    convert = spec.convert
+                    values = [None if v is None else convert(v) for v in values]
+            for item, value in zip(items, values):
+                item[spec.name] = value
+        return items
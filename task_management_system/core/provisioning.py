@@ -0,0 +1,87 @@
+from core.access import invalidate_project_access
+from core.authentication import set_auth_state
+from core.cache import bump_generations
+from core.passwords import hash_passwords
+from .models import User
+from .serializers import UserImportSerializer
+
+BATCH_SIZE = 1000
+
+
+def refresh_user_caches(users):
+    """
+    What the user post_save signal does for new users, for users written
+    with bulk_create
+    """
+    for user in users:
+        set_auth_state(user)
+    user_ids = [user.pk for user in users]
+    invalidate_project_access(*user_ids)
+    bump_generations((), user_ids)
+
+
+def validate_user_rows(items):
+    """
+    Validate the rows of a user import. Emails and usernames are checked
+    against the batch and the database with one query each.
+    Returns the valid rows and the errors of the others by index.
+    """
+    rows, errors = [], []
+    for index, item in enumerate(items):
+        serializer = UserImportSerializer(data=item)
+        if serializer.is_valid():
+            row = dict(serializer.validated_data)
+            row["email"] = User.objects.normalize_email(row["email"])
+            rows.append((index, row))
+        else:
+            errors.append({"index": index, "errors": serializer.errors})
+
+    taken = {
+        "email": set(
+            User.objects.filter(
+                email__in=[row["email"] for _, row in rows]
+            ).values_list("email", flat=True)
+        ),
+        "username": set(
+            User.objects.filter(
+                username__in=[row["username"] for _, row in rows]
+            ).values_list("username", flat=True)
+        ),
+    }
+    valid = []
+    for index, row in rows:
+        row_errors = {}
+        for field, values in taken.items():
+            if row[field] in values:
+                row_errors[field] = f"A user with this {field} already exists."
+            values.add(row[field])
+        if row_errors:
+            errors.append({"index": index, "errors": row_errors})
+        else:
+            valid.append(row)
+    errors.sort(key=lambda error: error["index"])
+    return valid, errors
+
+
+def import_users(rows, workers=None):
+    """
+    Create users from validated rows (username, email, role and an optional
+    password) with bulk_create, hashing the passwords with ``workers``
+    processes (one per CPU by default, see hash_passwords). Users without a
+    password get an unusable one.
+    """
+    hashes = hash_passwords((row.get("password") for row in rows), workers)
+    users = User.objects.bulk_create(
+        (
+            User(
+                username=row["username"],
+                email=User.objects.normalize_email(row["email"]),
+                role=row["role"],
+                password=password,
+            )
+            for row, password in zip(rows, hashes)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    refresh_user_caches(users)
+    return users
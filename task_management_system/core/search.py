@@ -0,0 +1,159 @@
+import re
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import Q
+
+from core.constants import SEARCH_MAX_RESULTS
+from .models import Comment, Project, Task
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# kind -> (model, indexed fields, FTS5 table)
+SEARCH_SOURCES = {
+    "task": (Task, ("title", "description"), "core_task_search"),
+    "project": (Project, ("name", "description"), "core_project_search"),
+    "comment": (Comment, ("content",), "core_comment_search"),
+}
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN_RE.findall(text or "")]
+
+
+def kind_for_model(model):
+    for kind, (source_model, _, _) in SEARCH_SOURCES.items():
+        if source_model is model:
+            return kind
+    return None
+
+
+class SQLiteSearchBackend:
+    """
+    Search backed by one FTS5 virtual table per kind, using the object
+    primary key as the FTS rowid
+    """
+
+    def index(self, kind, objs):
+        _, fields, table = SEARCH_SOURCES[kind]
+        columns = ", ".join(fields)
+        placeholders = ", ".join(["%s"] * (len(fields) + 1))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {table} (rowid, {columns}) VALUES ({placeholders})",
+                [
+                    [obj.pk, *(getattr(obj, field) or "" for field in fields)]
+                    for obj in objs
+                ],
+            )
+
+    def remove(self, kind, pks):
+        table = SEARCH_SOURCES[kind][2]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {table} WHERE rowid = %s", [[pk] for pk in pks]
+            )
+
+    def rebuild(self, kind):
+        model, fields, table = SEARCH_SOURCES[kind]
+        columns = ", ".join(fields)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, {columns}) "
+                f"SELECT id, {columns} FROM {model._meta.db_table}"
+            )
+
+    def search(self, kind, query, queryset, limit=SEARCH_MAX_RESULTS):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        table = SEARCH_SOURCES[kind][2]
+        match = " ".join(f'"{token}"*' for token in tokens)
+        sql = f"SELECT rowid FROM {table} WHERE {table} MATCH %s"
+        params = [match]
+        if queryset.query.where:
+            # Restrict the matches to the rows visible to the caller. The unary +
+            # keeps SQLite from pushing the IN list into FTS5 as one lookup per id.
+            visible = queryset.values("pk").query
+            try:
+                visible_sql, visible_params = visible.sql_with_params()
+            except EmptyResultSet:
+                # The filter matches nothing, e.g. pk__in=[]
+                return []
+            sql += f" AND +rowid IN ({visible_sql})"
+            params += visible_params
+        with connection.cursor() as cursor:
+            cursor.execute(f"{sql} ORDER BY rank LIMIT %s", [*params, limit])
+            return [row[0] for row in cursor.fetchall()]
+
+
+class DatabaseSearchBackend:
+    """
+    Search for databases without FTS5, run as a query on the table itself so
+    that it sees the same committed rows as every other query, in every
+    process. Each term must be found in one of the indexed fields; matches
+    are unranked, most recent first.
+    """
+
+    def index(self, kind, objs):
+        pass
+
+    def remove(self, kind, pks):
+        pass
+
+    def rebuild(self, kind):
+        pass
+
+    def search(self, kind, query, queryset, limit=SEARCH_MAX_RESULTS):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        fields = SEARCH_SOURCES[kind][1]
+        for token in tokens:
+            matches = Q()
+            for field in fields:
+                matches |= Q(**{f"{field}__icontains": token})
+            queryset = queryset.filter(matches)
+        return list(queryset.order_by("-pk").values_list("pk", flat=True)[:limit])
+
+
+_backends = {}
+
+
+def get_search_backend():
+    """
+    Return the search backend matching the default database
+    """
+    vendor = connection.vendor
+    if vendor not in _backends:
+        if vendor == "sqlite":
+            _backends[vendor] = SQLiteSearchBackend()
+        else:
+            _backends[vendor] = DatabaseSearchBackend()
+    return _backends[vendor]
+
+
+def search(kind, query, queryset):
+    """
+    Ids of the objects of the queryset matching the query, best match first.
+    Every term of the query is matched as a prefix. The queryset carries the
+    caller's visibility rules.
+    """
+    return get_search_backend().search(kind, query, queryset)
+
+
+def index_objects(model, objs):
+    kind = kind_for_model(model)
+    if kind and objs:
+        get_search_backend().index(kind, objs)
+
+
+def remove_objects(model, objs):
+    kind = kind_for_model(model)
+    if kind and objs:
+        get_search_backend().remove(kind, [obj.pk for obj in objs])
+
+
+def remove_object(obj):
+    remove_objects(type(obj), [obj])
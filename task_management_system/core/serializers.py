@@ -1,8 +1,35 @@
 from .models import Project, Task, User, Comment
+from core.authentication import set_auth_state
+from core.constants import UserRoleChoices
+from core.metrics import TimedRepresentationMixin
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field that resolves instances from ``context["prefetched"]``
+    when a bulk request has already loaded them, instead of one query per item
+    """
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get("prefetched", {}).get(self.queryset.model)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            instance = prefetched.get(int(data))
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if instance is None:
+            self.fail("does_not_exist", pk_value=data)
+        return instance
 
 
-class CustomUserDetailsSerializer(serializers.ModelSerializer):
+class CustomUserDetailsSerializer(
+    TimedRepresentationMixin, serializers.ModelSerializer
+):
     password = serializers.CharField(min_length=6, write_only=True)
 
     class Meta:
@@ -28,7 +55,35 @@ class CustomUserDetailsSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class UserImportSerializer(serializers.Serializer):
+    """
+    One row of a bulk user import. Emails and usernames are checked for
+    uniqueness over the whole batch by core.provisioning instead of one
+    query per row.
+    """
+
+    username = serializers.CharField(max_length=30)
+    email = serializers.EmailField()
+    role = serializers.ChoiceField(choices=UserRoleChoices.choices)
+    password = serializers.CharField(
+        min_length=6, required=False, allow_null=True, write_only=True
+    )
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Issue tokens and record the user's auth state, which
+    StatelessJWTAuthentication reads the role from
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        set_auth_state(user)
+        return token
+
+
+class ProjectSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     created_by = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
@@ -39,23 +94,36 @@ class ProjectSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         members = validated_data.pop("members")
         project = Project.objects.create(
-            created_by=self.context["request"].user, **validated_data
+            created_by_id=self.context["request"].user.pk, **validated_data
         )
-        project.save()
-        for member in members:
-            project.members.add(member)
-        project.save()
+        project.members.add(*members)
         return project
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     created_by = serializers.PrimaryKeyRelatedField(read_only=True)
+    project_id = PrefetchedPrimaryKeyRelatedField(
+        queryset=Project.objects.all(), allow_null=True, required=False
+    )
+    assigned_to = PrefetchedPrimaryKeyRelatedField(
+        queryset=User.objects.all(), allow_null=True, required=False
+    )
+
+    def is_project_member(self, project, user):
+        """
+        Membership check, answered from ``context["project_members"]``
+        (a set of (project id, user id) pairs) when a bulk request provides it
+        """
+        project_members = self.context.get("project_members")
+        if project_members is not None:
+            return (project.pk, user.pk) in project_members
+        return project.members.filter(pk=user.pk).exists()
 
     def validate(self, data):
         assigned_to = data.get("assigned_to")
         project = data.get("project_id")
         if assigned_to and project:
-            if not project.members.filter(pk=assigned_to.pk).exists():
+            if not self.is_project_member(project, assigned_to):
                 raise serializers.ValidationError(
                     {
                         "assigned_to": "The assigned user must be a member of the selected project."
@@ -70,14 +138,12 @@ class TaskSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_by", "created_at", "updated_at"]
 
     def create(self, validated_data):
-        task = Task.objects.create(
-            created_by=self.context["request"].user, **validated_data
+        return Task.objects.create(
+            created_by_id=self.context["request"].user.pk, **validated_data
         )
-        task.save()
-        return task
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     created_at = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
@@ -87,7 +153,7 @@ class CommentSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         comment = Comment.objects.create(
-            author=self.context["request"].user, **validated_data
+            author_id=self.context["request"].user.pk, **validated_data
         )
         comment.save()
         return comment
@@ -0,0 +1,283 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.access import get_project_access, invalidate_project_access
+from core.authentication import revoke_auth_state, set_auth_state
+from core.cache import bump_generations
+from core.counters import (
+    apply_deltas,
+    comment_counter_deltas,
+    deleted_task_deltas,
+    task_counter_deltas,
+    unassigned_user_deltas,
+)
+from core.events import publish_change
+from core.metrics import install_query_recorder
+from core.search import index_objects, remove_object
+from core.sync import (
+    COMMENT_SCOPE,
+    TASK_SCOPE,
+    comment_tombstone,
+    project_tombstones,
+    scope_changed,
+    scope_of,
+    task_tombstone,
+)
+from .models import Comment, Project, Task, Tombstone, User
+
+
+def previous_values(instance, *fields):
+    """
+    Fetch the stored values of the given fields for an existing row
+    """
+    if not instance.pk:
+        return None
+    return type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """
+    Drop any stale access entry left behind for a reused user id, record
+    the new role for token authentication and refresh the lists showing
+    the user
+    """
+    set_auth_state(instance)
+    invalidate_project_access(instance.pk)
+    project_ids = () if created else get_project_access(instance).all
+    bump_generations(project_ids, [instance.pk])
+
+
+@receiver(pre_delete, sender=User)
+def user_pre_delete(sender, instance, **kwargs):
+    bump_generations(get_project_access(instance).all, [instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    revoke_auth_state(instance.pk)
+    invalidate_project_access(instance.pk)
+
+
+@receiver(pre_save, sender=Project)
+def project_pre_save(sender, instance, **kwargs):
+    """
+    Remember the previous creator so that both creators get invalidated
+    """
+    instance._previous = previous_values(instance, "created_by_id")
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, **kwargs):
+    user_ids = [instance.created_by_id]
+    previous = getattr(instance, "_previous", None)
+    if previous:
+        user_ids.append(previous["created_by_id"])
+    invalidate_project_access(*user_ids)
+    bump_generations([instance.pk], user_ids)
+
+
+@receiver(pre_delete, sender=Project)
+def project_pre_delete(sender, instance, **kwargs):
+    """
+    Membership rows are removed by cascade without firing m2m_changed,
+    so invalidate the members before they are gone
+    """
+    user_ids = [instance.created_by_id, *instance.members.values_list("id", flat=True)]
+    invalidate_project_access(*user_ids)
+    bump_generations([instance.pk], user_ids)
+    Tombstone.objects.bulk_create(project_tombstones(instance.pk, user_ids))
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def project_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidate the users whose memberships were changed and mark the
+    projects as updated for the sync endpoint
+    """
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        # instance is the user whose projects changed
+        project_ids = pk_set or get_project_access(instance).member
+        invalidate_project_access(instance.pk)
+        bump_generations(project_ids, [instance.pk])
+    else:
+        if action == "pre_clear":
+            user_ids = list(instance.members.values_list("id", flat=True))
+        else:
+            user_ids = pk_set or ()
+        project_ids = [instance.pk] if user_ids else []
+        invalidate_project_access(*user_ids)
+        bump_generations([instance.pk], user_ids)
+    if project_ids:
+        Project.objects.filter(pk__in=project_ids).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Task)
+def task_pre_save(sender, instance, **kwargs):
+    instance._previous = previous_values(
+        instance,
+        "project_id_id",
+        "assigned_to_id",
+        "created_by_id",
+        "status",
+        "priority",
+    )
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    """
+    Refresh the lists of the task's project, creator and assignee
+    """
+    project_ids = [instance.project_id_id]
+    user_ids = [instance.assigned_to_id, instance.created_by_id]
+    previous = getattr(instance, "_previous", None)
+    if previous:
+        project_ids.append(previous["project_id_id"])
+        user_ids += [previous["assigned_to_id"], previous["created_by_id"]]
+    bump_generations(project_ids, user_ids)
+
+
+@receiver(pre_save, sender=Comment)
+def comment_pre_save(sender, instance, **kwargs):
+    instance._previous = previous_values(instance, "project_id_id", "task_id_id")
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    """
+    Refresh the lists of the comment's project and of the users
+    who can see the comment through its task
+    """
+    project_ids = [instance.project_id_id]
+    task_ids = [instance.task_id_id]
+    previous = getattr(instance, "_previous", None)
+    if previous:
+        project_ids.append(previous["project_id_id"])
+        task_ids.append(previous["task_id_id"])
+    user_ids = []
+    tasks = Task.objects.filter(pk__in=[pk for pk in task_ids if pk]).values_list(
+        "project_id_id", "assigned_to_id", "created_by_id"
+    )
+    for project_id, assigned_to_id, created_by_id in tasks:
+        project_ids.append(project_id)
+        user_ids += [assigned_to_id, created_by_id]
+    bump_generations(project_ids, user_ids)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Comment)
+def search_index_saved(sender, instance, bulk=False, **kwargs):
+    """
+    Bulk writers send post_save with bulk=True and index the whole batch
+    themselves with index_objects
+    """
+    if not bulk:
+        index_objects(sender, [instance])
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Comment)
+def search_index_deleted(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+@receiver(post_save, sender=Task)
+def task_counters_saved(sender, instance, created, bulk=False, **kwargs):
+    """
+    Bulk writers update the counters of the whole batch themselves
+    with update_task_counters
+    """
+    if not bulk:
+        previous = None if created else instance._previous
+        apply_deltas(task_counter_deltas(instance, previous))
+
+
+@receiver(pre_delete, sender=Task)
+def task_counters_deleted(sender, instance, **kwargs):
+    """
+    Runs before the delete since the comments of the task are detached
+    from it without signals
+    """
+    apply_deltas(deleted_task_deltas(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_counters_saved(sender, instance, created, **kwargs):
+    previous = None if created else instance._previous
+    apply_deltas(comment_counter_deltas(instance, previous))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_counters_deleted(sender, instance, **kwargs):
+    apply_deltas(comment_counter_deltas(instance, deleted=True))
+
+
+@receiver(pre_delete, sender=User)
+def user_counters_deleted(sender, instance, **kwargs):
+    apply_deltas(unassigned_user_deltas(instance.pk))
+
+
+@receiver(post_save, sender=Task)
+def task_tombstone_saved(sender, instance, created, **kwargs):
+    """
+    A task moved to another project, assignee or creator disappears for
+    the users who could only see it through the previous ones
+    """
+    previous = None if created else instance._previous
+    if previous and scope_changed(instance, previous, TASK_SCOPE):
+        task_tombstone(instance.pk, previous).save()
+
+
+@receiver(post_delete, sender=Task)
+def task_tombstone_deleted(sender, instance, **kwargs):
+    task_tombstone(instance.pk, scope_of(instance, TASK_SCOPE)).save()
+
+
+@receiver(post_save, sender=Comment)
+def comment_tombstone_saved(sender, instance, created, **kwargs):
+    previous = None if created else instance._previous
+    if previous and scope_changed(instance, previous, COMMENT_SCOPE):
+        comment_tombstone(instance.pk, previous).save()
+
+
+@receiver(post_delete, sender=Comment)
+def comment_tombstone_deleted(sender, instance, **kwargs):
+    comment_tombstone(instance.pk, scope_of(instance, COMMENT_SCOPE)).save()
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Comment)
+def change_published(sender, instance, signal, created=False, **kwargs):
+    """
+    Push the change to the event streams of its projects
+    """
+    if signal is post_delete:
+        action = "deleted"
+    else:
+        action = "created" if created else "updated"
+    publish_change(instance, action)
+
+
+@receiver(connection_created)
+def connection_metrics(sender, connection, **kwargs):
+    """
+    Count the queries and SQL time of each request on every connection
+    """
+    install_query_recorder(connection)
@@ -0,0 +1,113 @@
+import base64
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from core.constants import ADMIN, SYNC_RETENTION_DAYS, SYNC_WATERMARK_LAG
+from .models import Tombstone
+from .pagination import encode_cursor
+
+PROJECT = "project"
+TASK = "task"
+COMMENT = "comment"
+
+# Columns the visibility rules of tasks and comments filter on
+TASK_SCOPE = ("project_id_id", "assigned_to_id", "created_by_id")
+COMMENT_SCOPE = ("project_id_id", "task_id_id")
+
+
+class InvalidWatermark(Exception):
+    pass
+
+
+class Watermark:
+    def __init__(self, cursors, access, issued_at):
+        self.cursors = cursors
+        self.access = access
+        self.issued_at = issued_at
+
+    @property
+    def expired(self):
+        """
+        Tombstones older than the retention period may have been purged
+        """
+        return self.issued_at < timezone.now() - timedelta(days=SYNC_RETENTION_DAYS)
+
+
+def encode_watermark(cursors, access):
+    payload = {"c": cursors, "a": access, "t": timezone.now().isoformat()}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_watermark(value):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(value.encode()))
+        cursors = payload["c"]
+        if not isinstance(cursors, dict):
+            raise TypeError("cursors must be an object")
+        return Watermark(cursors, payload["a"], datetime.fromisoformat(payload["t"]))
+    except (TypeError, ValueError, KeyError, AttributeError) as e:
+        raise InvalidWatermark(str(e))
+
+
+def floor_cursor():
+    """
+    Cursor of everything changed after the watermark lag
+    """
+    return encode_cursor((timezone.now() - timedelta(seconds=SYNC_WATERMARK_LAG), 0))
+
+
+def access_digest(user, access):
+    """
+    Fingerprint of what the user can see: a watermark issued for another
+    role or set of projects cannot be continued incrementally
+    """
+    if user.role == ADMIN:
+        return ADMIN
+    parts = [user.role, sorted(access.created), sorted(access.member)]
+    return hashlib.sha1(json.dumps(parts).encode()).hexdigest()
+
+
+def scope_of(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+def scope_changed(instance, previous, fields):
+    return any(previous[field] != getattr(instance, field) for field in fields)
+
+
+def task_tombstone(task_id, state):
+    return Tombstone(
+        kind=TASK,
+        object_id=task_id,
+        project_id=state["project_id_id"],
+        assigned_to_id=state["assigned_to_id"],
+        created_by_id=state["created_by_id"],
+    )
+
+
+def comment_tombstone(comment_id, state):
+    return Tombstone(
+        kind=COMMENT,
+        object_id=comment_id,
+        project_id=state["project_id_id"],
+        task_id=state["task_id_id"],
+    )
+
+
+def project_tombstones(project_id, user_ids):
+    """
+    Projects are gone from the access index once deleted, so the users
+    who could see the project are recorded one row each
+    """
+    return [
+        Tombstone(kind=PROJECT, object_id=project_id, project_id=project_id, user_id=pk)
+        for pk in set(user_ids) | {None}
+    ]
+
+
+def purge_tombstones():
+    cutoff = timezone.now() - timedelta(days=SYNC_RETENTION_DAYS)
+    return Tombstone.objects.filter(deleted_at__lt=cutoff).delete()[0]
@@ -0,0 +1,27 @@
+import os
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Run the tests with the fast password hashers, since PBKDF2 would spend
+    most of the suite hashing the passwords of the fixtures, unless
+    PASSWORD_HASHER_PROFILE asks for another profile
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.hashers = None
+        if os.environ.get("PASSWORD_HASHER_PROFILE", "fast") == "fast":
+            self.hashers = override_settings(
+                PASSWORD_HASHERS=settings.FAST_PASSWORD_HASHERS
+            )
+            self.hashers.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        if self.hashers is not None:
+            self.hashers.disable()
+        super().teardown_test_environment(**kwargs)
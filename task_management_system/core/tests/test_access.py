@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..access import ProjectAccess, _cache_key, get_project_access
+from ..models import User, Project
+from ..constants import PROJECT_MANAGER, DEVELOPER
+
+
+class ProjectAccessTestCase(TestCase):
+    def setUp(self):
+        self.project_manager = User.objects.create_user(
+            email="project_manager@deloitte.com",
+            username="project_manager",
+            password="password",
+            role=PROJECT_MANAGER,
+        )
+        self.developer = User.objects.create_user(
+            email="developer@deloitte.com",
+            username="developer",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.project1 = Project.objects.create(
+            name="PM_Project", description="desc", created_by=self.project_manager
+        )
+        self.project1.members.add(self.developer)
+
+    def test_access_contains_created_and_member_projects(self):
+        access = get_project_access(self.project_manager)
+        self.assertEqual(access.created, {self.project1.id})
+        self.assertEqual(access.member, set())
+        access = get_project_access(self.developer)
+        self.assertEqual(access.member, {self.project1.id})
+
+    def test_access_is_cached_across_calls(self):
+        get_project_access(self.developer)
+        with self.assertNumQueries(0):
+            get_project_access(self.developer)
+
+    def test_member_changes_invalidate_access(self):
+        project2 = Project.objects.create(
+            name="Other_Project", description="desc", created_by=self.project_manager
+        )
+        self.assertNotIn(project2.id, get_project_access(self.developer).all)
+        project2.members.add(self.developer)
+        self.assertIn(project2.id, get_project_access(self.developer).all)
+        self.project1.members.remove(self.developer)
+        self.assertNotIn(self.project1.id, get_project_access(self.developer).all)
+        self.developer.project_members.clear()
+        self.assertEqual(get_project_access(self.developer).all, set())
+
+    def test_access_cached_before_the_commit_is_dropped(self):
+        project2 = Project.objects.create(
+            name="Other_Project", description="desc", created_by=self.project_manager
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            project2.members.add(self.developer)
+            # A concurrent request caches the memberships committed so far
+            stale = ProjectAccess(frozenset(), frozenset([self.project1.id]))
+            cache.set(_cache_key(self.developer.pk), stale)
+        self.assertIn(project2.id, get_project_access(self.developer).all)
+
+    def test_project_delete_invalidates_access(self):
+        get_project_access(self.developer)
+        self.project1.delete()
+        self.assertEqual(get_project_access(self.developer).all, set())
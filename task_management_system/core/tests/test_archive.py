@@ -0,0 +1,130 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..archive import archive_tasks
+from ..constants import DEVELOPER, PROJECT_MANAGER
+from ..counters import reconcile
+from ..models import ArchivedComment, ArchivedTask, Comment, Project, Task, User
+from ..search import search
+
+
+class ArchiveTestCase(APITestCase):
+    def setUp(self):
+        self.project_manager = User.objects.create_user(
+            email="project_manager@deloitte.com",
+            username="project_manager",
+            password="password",
+            role=PROJECT_MANAGER,
+        )
+        self.developer = User.objects.create_user(
+            email="developer@deloitte.com",
+            username="developer",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.project = Project.objects.create(
+            name="PM_Project", description="desc", created_by=self.project_manager
+        )
+        self.project.members.add(self.developer)
+        self.done = self.create_task("Finished work", "DONE")
+        self.recent = self.create_task("Recently done", "DONE")
+        self.open = self.create_task("Open work", "IN_PROGRESS")
+        self.comment = Comment.objects.create(
+            content="archived with its task", author=self.developer, task_id=self.done
+        )
+        Comment.objects.create(
+            content="stays", author=self.developer, project_id=self.project
+        )
+        old = timezone.now() - timedelta(days=400)
+        Task.objects.filter(pk__in=[self.done.pk, self.open.pk]).update(updated_at=old)
+
+    def create_task(self, title, status):
+        return Task.objects.create(
+            title=title,
+            description="desc",
+            created_by=self.project_manager,
+            project_id=self.project,
+            assigned_to=self.developer,
+            status=status,
+            priority="HIGH",
+        )
+
+    def archive(self):
+        return list(archive_tasks(days=180, chunk_size=1))
+
+    def test_archive_moves_old_done_tasks_and_their_comments(self):
+        self.assertEqual(self.archive(), [(1, 1)])
+        self.assertEqual(
+            set(Task.objects.values_list("pk", flat=True)),
+            {self.recent.pk, self.open.pk},
+        )
+        archived = ArchivedTask.objects.get()
+        self.assertEqual(archived.pk, self.done.pk)
+        self.assertEqual(archived.created_at, self.done.created_at)
+        self.assertEqual(ArchivedComment.objects.get().pk, self.comment.pk)
+        self.assertFalse(Comment.objects.filter(pk=self.comment.pk).exists())
+        self.assertEqual(reconcile(), 0)
+        self.assertEqual(search("task", "finished", Task.objects.all()), [])
+        self.assertEqual(self.archive(), [])
+
+    def test_lists_include_archived_objects_on_request(self):
+        self.archive()
+        self.client.force_authenticate(user=self.developer)
+        response = self.client.get(reverse("task-list"))
+        self.assertEqual(len(response.data), 2)
+        response = self.client.get(reverse("task-list"), {"include_archived": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        archived = {item["id"]: item["archived"] for item in response.data}
+        self.assertEqual(
+            archived, {self.done.pk: True, self.recent.pk: False, self.open.pk: False}
+        )
+        response = self.client.get(
+            reverse("comment-list"), {"include_archived": "1", "fields": "id"}
+        )
+        self.assertIn({"id": self.comment.pk, "archived": True}, response.data)
+        response = self.client.get(
+            reverse("task-list"), {"include_archived": "true", "cursor": ""}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_includes_archived_objects_on_request(self):
+        self.archive()
+        self.client.force_authenticate(user=self.developer)
+        url = reverse("task-detail", args=[self.done.pk])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(url, {"include_archived": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Finished work")
+        self.assertTrue(response.data["archived"])
+        other_developer = User.objects.create_user(
+            email="developer2@deloitte.com",
+            username="developer2",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.client.force_authenticate(user=other_developer)
+        response = self.client.get(url, {"include_archived": "true"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        # The decision on the archived task is not reused for the live one
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_restore_moves_the_task_back(self):
+        self.archive()
+        url = reverse("task-restore", args=[self.done.pk])
+        self.client.force_authenticate(user=self.developer)
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.project_manager)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], self.done.pk)
+        task = Task.objects.get(pk=self.done.pk)
+        self.assertEqual(task.created_at, self.done.created_at)
+        self.assertEqual(Comment.objects.get(pk=self.comment.pk).task_id, task)
+        self.assertFalse(ArchivedTask.objects.exists())
+        self.assertFalse(ArchivedComment.objects.exists())
+        self.assertEqual(reconcile(), 0)
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,136 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..models import Comment, Task, User, Project
+from ..constants import ADMIN, PROJECT_MANAGER, DEVELOPER, TECH_LEAD, CLIENT
+
+
+class AsyncViewsTestCase(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@deloitte.com",
+            username="admin",
+            password="password",
+            role=ADMIN,
+        )
+        self.project_manager = User.objects.create_user(
+            email="project_manager@deloitte.com",
+            username="project_manager",
+            password="password",
+            role=PROJECT_MANAGER,
+        )
+        self.tech_lead = User.objects.create_user(
+            email="tech_lead@deloitte.com",
+            username="tech_lead",
+            password="password",
+            role=TECH_LEAD,
+        )
+        self.developer = User.objects.create_user(
+            email="developer@deloitte.com",
+            username="developer",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.client_user = User.objects.create_user(
+            email="client@deloitte.com",
+            username="client",
+            password="password",
+            role=CLIENT,
+        )
+        self.users = [
+            self.admin,
+            self.project_manager,
+            self.tech_lead,
+            self.developer,
+            self.client_user,
+        ]
+
+        self.project1 = Project.objects.create(
+            name="PM_Project", description="desc", created_by=self.project_manager
+        )
+        self.project1.members.add(self.developer, self.tech_lead)
+        self.project2 = Project.objects.create(
+            name="TL_Project", description="desc", created_by=self.tech_lead
+        )
+        self.project2.members.add(self.client_user)
+
+        self.task1 = Task.objects.create(
+            title="Task 1",
+            description="Task 1 desc",
+            created_by=self.project_manager,
+            project_id=self.project1,
+            assigned_to=self.developer,
+            status="TO_DO",
+            priority="HIGH",
+        )
+        self.task2 = Task.objects.create(
+            title="Task 2",
+            description="Task 2 desc",
+            created_by=self.tech_lead,
+            project_id=self.project2,
+            assigned_to=self.client_user,
+            status="TO_DO",
+            priority="LOW",
+        )
+        Comment.objects.create(
+            content="project 1", author=self.project_manager, project_id=self.project1
+        )
+        Comment.objects.create(
+            content="task 2", author=self.client_user, task_id=self.task2
+        )
+
+        self.resources = {
+            "user": User.objects.values_list("pk", flat=True),
+            "project": Project.objects.values_list("pk", flat=True),
+            "task": Task.objects.values_list("pk", flat=True),
+            "comment": Comment.objects.values_list("pk", flat=True),
+        }
+
+    def authenticate(self, user):
+        token = AccessToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def assertSameResponse(self, sync_url, async_url):
+        expected = self.client.get(sync_url)
+        response = self.client.get(async_url)
+        self.assertEqual(response.status_code, expected.status_code)
+        if expected.status_code == status.HTTP_200_OK:
+            self.assertEqual(response.json(), expected.json())
+
+    def test_list_matches_sync_views_for_every_role(self):
+        for user in self.users:
+            self.authenticate(user)
+            for basename in self.resources:
+                with self.subTest(role=user.role, resource=basename):
+                    self.assertSameResponse(
+                        reverse(f"{basename}-list"),
+                        reverse(f"async-{basename}-list"),
+                    )
+
+    def test_retrieve_matches_sync_views_for_every_role(self):
+        for user in self.users:
+            self.authenticate(user)
+            for basename, pks in self.resources.items():
+                for pk in pks:
+                    with self.subTest(role=user.role, resource=basename, pk=pk):
+                        self.assertSameResponse(
+                            reverse(f"{basename}-detail", args=[pk]),
+                            reverse(f"async-{basename}-detail", args=[pk]),
+                        )
+
+    def test_cursor_and_missing_objects(self):
+        self.authenticate(self.admin)
+        response = self.client.get(reverse("async-task-list"), {"cursor": ""})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["results"]), 2)
+        response = self.client.get(reverse("async-task-detail", args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_authentication_is_required(self):
+        response = self.client.get(reverse("async-task-list"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+        response = self.client.get(reverse("async-task-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
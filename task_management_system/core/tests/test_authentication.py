@@ -0,0 +1,96 @@
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from ..authentication import get_auth_state
+from ..models import Project, User
+from ..constants import ADMIN, CLIENT, PROJECT_MANAGER, TECH_LEAD
+
+
+class StatelessJWTAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@deloitte.com",
+            username="admin",
+            password="password",
+            role=ADMIN,
+        )
+        self.project_manager = User.objects.create_user(
+            email="project_manager@deloitte.com",
+            username="project_manager",
+            password="password",
+            role=PROJECT_MANAGER,
+        )
+        self.tech_lead = User.objects.create_user(
+            email="tech_lead@deloitte.com",
+            username="tech_lead",
+            password="password",
+            role=TECH_LEAD,
+        )
+        self.project = Project.objects.create(
+            name="PM_Project", description="desc", created_by=self.project_manager
+        )
+        self.project.members.add(self.tech_lead)
+
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(user=self.admin)
+
+    def login(self, email):
+        # The auth state is recorded when the login transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("token_obtain_pair"),
+                {"email": email, "password": "password"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        access = response.data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return access
+
+    def test_rolled_back_role_change_is_not_cached(self):
+        self.login("project_manager@deloitte.com")
+        url = reverse("project-detail", args=[self.project.id])
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.project_manager.role = CLIENT
+            self.project_manager.save()
+            raise RuntimeError
+        self.assertEqual(
+            get_auth_state(self.project_manager.pk)["role"], PROJECT_MANAGER
+        )
+        response = self.client.patch(url, {"description": "new"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_requests_do_not_fetch_the_user(self):
+        self.login("tech_lead@deloitte.com")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("task-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for query in queries:
+            self.assertNotIn('FROM "core_user"', query["sql"])
+
+    def test_role_change_applies_to_issued_tokens(self):
+        self.login("project_manager@deloitte.com")
+        url = reverse("project-detail", args=[self.project.id])
+        response = self.client.patch(url, {"description": "new"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.admin_client.patch(
+            reverse("user-detail", args=[self.project_manager.id]), {"role": CLIENT}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(url, {"description": "newer"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deactivated_and_deleted_users_are_rejected(self):
+        self.login("tech_lead@deloitte.com")
+        self.tech_lead.is_active = False
+        self.tech_lead.save()
+        response = self.client.get(reverse("task-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.login("project_manager@deloitte.com")
+        self.project_manager.delete()
+        response = self.client.get(reverse("project-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
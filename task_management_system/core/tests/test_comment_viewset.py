@@ -0,0 +1,143 @@
+import csv
+
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from ..management.commands.benchmark_comment_visibility import (
+    legacy_visible_comments,
+    visible_comments,
+)
+from ..models import Comment, Task, User, Project
+from ..constants import ADMIN, PROJECT_MANAGER, DEVELOPER, TECH_LEAD, CLIENT
+
+
+class CommentViewSetTestCase(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@deloitte.com",
+            username="admin",
+            password="password",
+            role=ADMIN,
+        )
+        self.project_manager = User.objects.create_user(
+            email="project_manager@deloitte.com",
+            username="project_manager",
+            password="password",
+            role=PROJECT_MANAGER,
+        )
+        self.tech_lead = User.objects.create_user(
+            email="tech_lead@deloitte.com",
+            username="tech_lead",
+            password="password",
+            role=TECH_LEAD,
+        )
+        self.developer = User.objects.create_user(
+            email="developer@deloitte.com",
+            username="developer",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.client_user = User.objects.create_user(
+            email="client@deloitte.com",
+            username="client",
+            password="password",
+            role=CLIENT,
+        )
+
+        self.project1 = Project.objects.create(
+            name="PM_Project", description="desc", created_by=self.project_manager
+        )
+        self.project1.members.add(self.developer, self.tech_lead)
+        self.project2 = Project.objects.create(
+            name="TL_Project", description="desc", created_by=self.tech_lead
+        )
+        self.project2.members.add(self.client_user)
+
+        self.task1 = Task.objects.create(
+            title="Task 1",
+            description="Task 1 desc",
+            created_by=self.project_manager,
+            project_id=self.project1,
+            assigned_to=self.developer,
+            status="TO_DO",
+            priority="HIGH",
+        )
+        self.task2 = Task.objects.create(
+            title="Task 2",
+            description="Task 2 desc",
+            created_by=self.tech_lead,
+            project_id=self.project2,
+            assigned_to=self.client_user,
+            status="TO_DO",
+            priority="LOW",
+        )
+
+        self.project1_comment = Comment.objects.create(
+            content="project 1", author=self.project_manager, project_id=self.project1
+        )
+        self.project2_comment = Comment.objects.create(
+            content="project 2", author=self.tech_lead, project_id=self.project2
+        )
+        self.task1_comment = Comment.objects.create(
+            content="task 1", author=self.developer, task_id=self.task1
+        )
+        self.task2_comment = Comment.objects.create(
+            content="task 2", author=self.client_user, task_id=self.task2
+        )
+
+    def authenticate(self, user):
+        self.client.force_authenticate(user=user)
+
+    def test_visibility_matches_legacy_query_for_every_role(self):
+        for user in [
+            self.admin,
+            self.project_manager,
+            self.tech_lead,
+            self.developer,
+            self.client_user,
+        ]:
+            with self.subTest(role=user.role):
+                self.assertEqual(
+                    set(visible_comments(user)), set(legacy_visible_comments(user))
+                )
+
+    def test_developer_lists_comments_of_projects_and_assigned_tasks(self):
+        self.authenticate(self.developer)
+        response = self.client.get(reverse("comment-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        contents = [comment["content"] for comment in response.data]
+        self.assertIn(self.project1_comment.content, contents)
+        self.assertIn(self.task1_comment.content, contents)
+        self.assertNotIn(self.project2_comment.content, contents)
+        self.assertNotIn(self.task2_comment.content, contents)
+
+    def test_tech_lead_lists_comments_of_created_tasks(self):
+        self.authenticate(self.tech_lead)
+        response = self.client.get(reverse("comment-list"))
+        contents = [comment["content"] for comment in response.data]
+        self.assertIn(self.task2_comment.content, contents)
+        self.assertNotIn(self.project2_comment.content, contents)
+
+    def test_search_comment_content(self):
+        self.authenticate(self.developer)
+        response = self.client.get(reverse("comment-list"), {"search": "task"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        contents = [comment["content"] for comment in response.data]
+        self.assertEqual(contents, [self.task1_comment.content])
+
+    def test_export_applies_list_visibility(self):
+        for user in [self.project_manager, self.developer, self.client_user]:
+            self.authenticate(user)
+            listed = self.client.get(reverse("comment-list")).data
+            response = self.client.get(reverse("comment-export"), {"output": "csv"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            rows = list(
+                csv.DictReader(
+                    b"".join(response.streaming_content).decode().splitlines()
+                )
+            )
+            self.assertEqual(
+                sorted(int(row["id"]) for row in rows),
+                sorted(comment["id"] for comment in listed),
+            )
@@ -0,0 +1,20 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite profile")
+class SQLiteProfileTestCase(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_connection_is_tuned(self):
+        # 1 is NORMAL; the in-memory test database has no WAL journal
+        self.assertEqual(self.pragma("synchronous"), 1)
+        self.assertEqual(self.pragma("temp_store"), 2)
+        timeout = settings.DATABASES["default"]["OPTIONS"]["timeout"]
+        self.assertEqual(self.pragma("busy_timeout"), timeout * 1000)
@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..constants import UserRoleChoices
+from ..counters import expected_counters
+from ..datagen import generate_dataset, refresh_derived_data
+from ..models import ProjectCounter, Task, User
+
+
+class DatagenTestCase(TestCase):
+    def setUp(self):
+        self.dataset = generate_dataset(
+            users=30, projects=5, tasks=100, comments=200, skew=1.5
+        )
+        refresh_derived_data()
+
+    def test_dataset_covers_every_role(self):
+        roles = set(User.objects.values_list("role", flat=True))
+        self.assertEqual(roles, set(UserRoleChoices.values))
+        self.assertEqual(Task.objects.count(), 100)
+
+    def test_tasks_are_assigned_to_project_members(self):
+        for task in Task.objects.select_related("project_id"):
+            self.assertTrue(
+                task.project_id.members.filter(pk=task.assigned_to_id).exists()
+            )
+
+    def test_counters_are_refreshed(self):
+        counters = {
+            (c.project_id, c.dimension, c.key): c.count
+            for c in ProjectCounter.objects.all()
+            if c.count
+        }
+        self.assertEqual(counters, dict(+expected_counters()))
+
+    def test_run_benchmarks_saves_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            call_command(
+                "run_benchmarks",
+                "--requests=2",
+                "--endpoints",
+                "tasks.list",
+                "users.list",
+                f"--output={output}",
+                stdout=StringIO(),
+            )
+            with open(output) as f:
+                report = json.load(f)
+        results = {(r["endpoint"], r["role"]): r for r in report["results"]}
+        self.assertEqual(len(results), 2 * len(UserRoleChoices.values))
+        self.assertEqual(results[("tasks.list", "DEVELOPER")]["status"], "200")
+        self.assertEqual(results[("users.list", "DEVELOPER")]["status"], "403")
+        self.assertGreater(results[("tasks.list", "ADMIN")]["queries"], 0)
@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..constants import DEVELOPER, EVENT_QUEUE_SIZE, PROJECT_MANAGER
+from ..events import ALL_PROJECTS, OVERFLOW, EventBroker, broker
+from ..models import Comment, Project, Task, User
+
+
+class EventBrokerTestCase(SimpleTestCase):
+    async def test_events_fan_out_to_the_project_subscribers(self):
+        events = EventBroker()
+        first, _ = events.subscribe({1})
+        second, _ = events.subscribe({2})
+        everything, _ = events.subscribe({ALL_PROJECTS})
+        event = events.publish(1, "task", {"id": 5})
+        await asyncio.sleep(0)
+        self.assertIs(first.queue.get_nowait(), event)
+        self.assertTrue(second.queue.empty())
+        self.assertIs(everything.queue.get_nowait(), event)
+        events.unsubscribe(first)
+        events.publish(1, "task", {"id": 5})
+        await asyncio.sleep(0)
+        self.assertTrue(first.queue.empty())
+
+    async def test_resume_replays_the_missed_events(self):
+        events = EventBroker(buffer_size=3)
+        first = events.publish(1, "task", {"id": 1})
+        second = events.publish(2, "task", {"id": 2})
+        third = events.publish(1, "comment", {"id": 3})
+        _, replay = events.subscribe({1}, first.id)
+        self.assertEqual(replay, [third])
+        _, replay = events.subscribe({1, 2}, first.id)
+        self.assertEqual(replay, [second, third])
+        for i in range(3):
+            events.publish(1, "task", {"id": i})
+        _, replay = events.subscribe({1}, first.id)
+        self.assertIsNone(replay)
+        _, replay = events.subscribe({2}, first.id)
+        self.assertEqual(replay, [second])
+        _, replay = events.subscribe({1}, first.id - 1000)
+        self.assertIsNone(replay)
+
+    async def test_slow_subscribers_overflow(self):
+        events = EventBroker()
+        subscriber, _ = events.subscribe({1})
+        for i in range(EVENT_QUEUE_SIZE + 1):
+            events.publish(1, "task", {"id": i})
+        await asyncio.sleep(0)
+        self.assertTrue(subscriber.overflowed)
+        self.assertIs(subscriber.queue.get_nowait(), OVERFLOW)
+        self.assertTrue(subscriber.queue.empty())
+
+
+class EventStreamTestCase(APITestCase):
+    def setUp(self):
+        self.project_manager = User.objects.create_user(
+            email="project_manager@deloitte.com",
+            username="project_manager",
+            password="password",
+            role=PROJECT_MANAGER,
+        )
+        self.developer = User.objects.create_user(
+            email="developer@deloitte.com",
+            username="developer",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.project = Project.objects.create(
+            name="PM_Project", description="desc", created_by=self.project_manager
+        )
+        self.project.members.add(self.developer)
+        self.other_project = Project.objects.create(
+            name="Other_Project", description="desc", created_by=self.project_manager
+        )
+        self.last_event_id = broker.last_id
+
+    def create_task(self, project):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Task.objects.create(
+                title="Task 1",
+                description="Task 1 desc",
+                created_by=self.project_manager,
+                project_id=project,
+                assigned_to=self.developer,
+                status="OPEN",
+                priority="HIGH",
+            )
+
+    def headers(self, user, **headers):
+        return {"Authorization": f"Bearer {AccessToken.for_user(user)}", **headers}
+
+    async def read_events(self, response, count):
+        chunks = response.streaming_content
+        try:
+            data = [(await anext(chunks)).decode() for _ in range(count)]
+        finally:
+            await chunks.aclose()
+        return data
+
+    def test_changes_are_published_after_commit(self):
+        task = self.create_task(self.project)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(
+                content="comment", author=self.developer, task_id=task
+            )
+        replay = broker.replay({self.project.pk}, self.last_event_id)
+        self.assertEqual(
+            [(event.kind, event.data["action"]) for event in replay],
+            [("task", "created"), ("comment", "created")],
+        )
+
+    async def test_stream_replays_events_after_last_event_id(self):
+        task = await sync_to_async(self.create_task)(self.project)
+        await sync_to_async(self.create_task)(self.other_project)
+        response = await self.async_client.get(
+            reverse("events"),
+            headers=self.headers(
+                self.developer, **{"Last-Event-ID": str(self.last_event_id)}
+            ),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        retry, event = await self.read_events(response, 2)
+        self.assertTrue(retry.startswith("retry:"))
+        lines = event.splitlines()
+        self.assertEqual(lines[1], "event: task")
+        self.assertEqual(
+            json.loads(lines[2].removeprefix("data: ")),
+            {"id": task.pk, "project_id": self.project.pk, "action": "created"},
+        )
+
+    async def test_stream_is_limited_to_visible_projects(self):
+        response = await self.async_client.get(
+            reverse("events"),
+            {"projects": str(self.other_project.pk)},
+            headers=self.headers(self.developer),
+        )
+        self.assertEqual(response.status_code, 403)
+        response = await self.async_client.get(reverse("events"))
+        self.assertEqual(response.status_code, 403)
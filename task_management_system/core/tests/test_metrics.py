@@ -0,0 +1,99 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .. import metrics
+from ..models import Project, Task, User
+from ..constants import ADMIN, DEVELOPER, PROJECT_MANAGER
+
+
+class MetricsTestCase(APITestCase):
+    def setUp(self):
+        metrics.reset()
+        self.admin = User.objects.create_user(
+            email="admin@deloitte.com",
+            username="admin",
+            password="password",
+            role=ADMIN,
+        )
+        self.project_manager = User.objects.create_user(
+            email="project_manager@deloitte.com",
+            username="project_manager",
+            password="password",
+            role=PROJECT_MANAGER,
+        )
+        self.developer = User.objects.create_user(
+            email="developer@deloitte.com",
+            username="developer",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.project = Project.objects.create(
+            name="Project", description="desc", created_by=self.project_manager
+        )
+        self.task = Task.objects.create(
+            title="Task",
+            description="desc",
+            created_by=self.project_manager,
+            project_id=self.project,
+            assigned_to=self.developer,
+        )
+
+    def scrape(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse("metrics-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        return response.content.decode()
+
+    def sample(self, text, name):
+        for line in text.splitlines():
+            if line.startswith(name + " "):
+                return float(line.split()[-1])
+        self.fail(f"{name} not found")
+
+    def test_requests_are_recorded_per_action_and_role(self):
+        self.client.force_authenticate(user=self.developer)
+        self.client.get(reverse("task-list"))
+        self.client.get(reverse("task-detail", args=[self.task.id]))
+
+        text = self.scrape()
+        labels = 'view="task",action="list",role="DEVELOPER"'
+        self.assertEqual(
+            self.sample(text, f"core_request_duration_seconds_count{{{labels}}}"), 1
+        )
+        self.assertGreater(
+            self.sample(text, f"core_request_queries_sum{{{labels}}}"), 0
+        )
+        self.assertGreater(
+            self.sample(text, f"core_request_serializer_seconds_sum{{{labels}}}"), 0
+        )
+        labels = 'view="task",action="retrieve",role="DEVELOPER"'
+        self.assertGreater(
+            self.sample(text, f"core_request_permission_seconds_sum{{{labels}}}"), 0
+        )
+        labels = 'check="is_visible",role="DEVELOPER"'
+        self.assertEqual(
+            self.sample(text, f"core_permission_check_seconds_count{{{labels}}}"), 1
+        )
+
+    def test_streamed_responses_are_measured_once_consumed(self):
+        self.client.force_authenticate(user=self.developer)
+        response = self.client.get(reverse("task-export"))
+        labels = 'view="task",action="export",role="DEVELOPER"'
+        self.assertNotIn(labels, self.scrape())
+        b"".join(response.streaming_content)
+        response.close()
+
+        text = self.scrape()
+        self.assertEqual(
+            self.sample(text, f"core_request_duration_seconds_count{{{labels}}}"), 1
+        )
+        self.assertGreater(
+            self.sample(text, f"core_request_queries_sum{{{labels}}}"), 0
+        )
+
+    def test_metrics_are_admin_only(self):
+        self.client.force_authenticate(user=self.project_manager)
+        response = self.client.get(reverse("metrics-list"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,145 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_roles.granting import anyof
+
+from ..constants import ADMIN, DEVELOPER, PROJECT_MANAGER, TECH_LEAD
+from ..models import Comment, Project, Task, User
+from ..permissions import compile_view_permissions
+from ..views import TaskViewSet
+
+
+class PermissionTableTestCase(APITestCase):
+    def setUp(self):
+        self.project_manager = User.objects.create_user(
+            email="project_manager@deloitte.com",
+            username="project_manager",
+            password="password",
+            role=PROJECT_MANAGER,
+        )
+        self.developer = User.objects.create_user(
+            email="developer@deloitte.com",
+            username="developer",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.other_developer = User.objects.create_user(
+            email="developer2@deloitte.com",
+            username="developer2",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.project = Project.objects.create(
+            name="PM_Project", description="desc", created_by=self.project_manager
+        )
+        self.project.members.add(self.developer)
+        self.task = Task.objects.create(
+            title="Task 1",
+            description="Task 1 desc",
+            created_by=self.project_manager,
+            project_id=self.project,
+            assigned_to=self.developer,
+            status="OPEN",
+            priority="HIGH",
+        )
+
+    def test_table_maps_actions_and_roles_to_rules(self):
+        calls = []
+
+        def first(request, view):
+            calls.append("first")
+            return True
+
+        def second(request, view):
+            calls.append("second")
+            return True
+
+        table = compile_view_permissions(
+            {"update,partial_update": {ADMIN: True, TECH_LEAD: anyof(first, second)}}
+        )
+        self.assertIs(table["partial_update", ADMIN], True)
+        self.assertNotIn(("update", DEVELOPER), table)
+        self.assertTrue(table["update", TECH_LEAD](None, None))
+        self.assertEqual(calls, ["first"])
+
+    def test_decisions_are_cached_per_object(self):
+        self.client.force_authenticate(user=self.developer)
+        url = reverse("task-detail", args=[self.task.id])
+        calls = []
+
+        def is_assignee(request, view):
+            calls.append(view.kwargs["pk"])
+            return view.get_object().assigned_to_id == request.user.pk
+
+        table = {**TaskViewSet.permission_table, ("retrieve", DEVELOPER): is_assignee}
+        with patch.object(TaskViewSet, "permission_table", table):
+            for _ in range(3):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(calls), 1)
+
+    def test_visibility_checks_are_not_cached(self):
+        self.client.force_authenticate(user=self.developer)
+        url = reverse("task-detail", args=[self.task.id])
+        with patch("core.permissions.decision_key") as key:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        key.assert_not_called()
+
+    def test_assignment_changes_invalidate_decisions(self):
+        self.client.force_authenticate(user=self.developer)
+        url = reverse("task-detail", args=[self.task.id])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.task.assigned_to = self.other_developer
+        self.task.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.other_developer)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_membership_changes_invalidate_decisions(self):
+        self.client.force_authenticate(user=self.developer)
+        url = reverse("project-detail", args=[self.project.id])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.project.members.remove(self.developer)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.project.members.add(self.developer)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_checks_reading_the_body_are_not_cached(self):
+        other = Project.objects.create(
+            name="Other_Project", description="desc", created_by=self.developer
+        )
+        self.client.force_authenticate(user=self.project_manager)
+        url = reverse("task-detail", args=[self.task.id])
+        response = self.client.patch(url, {"project_id": self.project.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(url, {"project_id": other.id})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_lookup_and_authorization_take_one_query(self):
+        self.client.force_authenticate(user=self.other_developer)
+        self.client.get(reverse("task-list"))
+        for pk, expected in [
+            (self.task.id, status.HTTP_403_FORBIDDEN),
+            (0, status.HTTP_404_NOT_FOUND),
+        ]:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("task-detail", args=[pk]))
+            self.assertEqual(response.status_code, expected)
+            self.assertEqual(len(queries.captured_queries), 1)
+
+    def test_visible_to_depends_on_the_action(self):
+        comment = Comment.objects.create(
+            content="comment", author=self.project_manager, project_id=self.project
+        )
+        comments = Comment.objects.filter(pk=comment.pk)
+        self.assertTrue(comments.visible_to(self.developer, "retrieve").exists())
+        self.assertFalse(comments.visible_to(self.developer, "update").exists())
+        self.assertTrue(comments.visible_to(self.project_manager, "update").exists())
+        tasks = Task.objects.filter(pk=self.task.pk)
+        self.assertTrue(tasks.visible_to(self.project_manager, "destroy").exists())
+        self.assertFalse(tasks.visible_to(self.developer, "destroy").exists())
@@ -0,0 +1,147 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..counters import expected_counters, reconcile
+from ..models import Comment, Project, ProjectCounter, Task, User
+from ..constants import ADMIN, CLIENT, DEVELOPER, PROJECT_MANAGER
+
+
+class ProjectStatsTestCase(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@deloitte.com",
+            username="admin",
+            password="password",
+            role=ADMIN,
+        )
+        self.project_manager = User.objects.create_user(
+            email="project_manager@deloitte.com",
+            username="project_manager",
+            password="password",
+            role=PROJECT_MANAGER,
+        )
+        self.developer = User.objects.create_user(
+            email="developer@deloitte.com",
+            username="developer",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.client_user = User.objects.create_user(
+            email="client@deloitte.com",
+            username="client",
+            password="password",
+            role=CLIENT,
+        )
+        self.project1 = Project.objects.create(
+            name="PM_Project", description="desc", created_by=self.project_manager
+        )
+        self.project1.members.add(self.developer)
+        self.project2 = Project.objects.create(
+            name="Other_Project", description="desc", created_by=self.admin
+        )
+        self.task1 = Task.objects.create(
+            title="Task 1",
+            description="desc",
+            created_by=self.project_manager,
+            project_id=self.project1,
+            assigned_to=self.developer,
+            status="TO_DO",
+            priority="HIGH",
+        )
+        self.task2 = Task.objects.create(
+            title="Task 2",
+            description="desc",
+            created_by=self.project_manager,
+            project_id=self.project1,
+            status="DONE",
+            priority="LOW",
+        )
+        Comment.objects.create(content="on task 1", task_id=self.task1)
+        Comment.objects.create(content="on task 2", task_id=self.task2)
+        Comment.objects.create(content="on project", project_id=self.project1)
+
+    def stats(self, project):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse("project-stats", args=[project.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def assertCountersMatchRecount(self):
+        counters = {
+            (c.project_id, c.dimension, c.key): c.count
+            for c in ProjectCounter.objects.all()
+            if c.count
+        }
+        self.assertEqual(counters, dict(+expected_counters()))
+
+    def test_stats_of_a_project(self):
+        data = self.stats(self.project1)
+        self.assertEqual(data["status"], {"TO_DO": 1, "IN_PROGRESS": 0, "DONE": 1})
+        self.assertEqual(data["priority"], {"LOW": 1, "MEDIUM": 0, "HIGH": 1})
+        self.assertEqual(data["assignee"], {str(self.developer.id): 1, "unassigned": 1})
+        self.assertEqual(data["comments"], 3)
+        self.assertEqual(data["open_comments"], 1)
+
+    def test_counters_follow_updates_and_deletes(self):
+        self.task1.status = "DONE"
+        self.task1.save()
+        self.task2.project_id = self.project2
+        self.task2.status = "IN_PROGRESS"
+        self.task2.save()
+        comment = Comment.objects.get(content="on project")
+        comment.project_id = None
+        comment.task_id = self.task2
+        comment.save()
+        self.assertCountersMatchRecount()
+        self.assertEqual(self.stats(self.project2)["open_comments"], 2)
+
+        self.developer.delete()
+        self.task2.delete()
+        Comment.objects.get(content="on task 1").delete()
+        self.assertCountersMatchRecount()
+        self.assertEqual(self.stats(self.project1)["assignee"], {"unassigned": 1})
+
+        self.project1.delete()
+        self.assertCountersMatchRecount()
+        self.assertEqual(reconcile(), 0)
+
+    def test_comments_with_their_own_project_outlive_their_task(self):
+        Comment.objects.create(
+            content="on both", project_id=self.project2, task_id=self.task1
+        )
+        self.task1.delete()
+        self.assertCountersMatchRecount()
+        self.assertEqual(self.stats(self.project2)["comments"], 1)
+        self.assertEqual(self.stats(self.project2)["open_comments"], 0)
+        self.assertEqual(reconcile(), 0)
+
+    def test_bulk_writes_update_counters(self):
+        self.client.force_authenticate(user=self.project_manager)
+        url = reverse("task-bulk")
+        item = {
+            "title": "Bulk",
+            "description": "desc",
+            "status": "IN_PROGRESS",
+            "priority": "MEDIUM",
+            "project_id": self.project1.id,
+        }
+        response = self.client.post(url, [item, item], format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.patch(
+            url, [{"id": self.task1.id, "status": "DONE"}], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountersMatchRecount()
+        self.assertEqual(self.stats(self.project1)["status"]["IN_PROGRESS"], 2)
+
+    def test_reconcile_fixes_drift(self):
+        Task.objects.filter(pk=self.task1.pk).update(status="IN_PROGRESS")
+        ProjectCounter.objects.filter(dimension="comments").delete()
+        self.assertEqual(reconcile(), 3)
+        self.assertCountersMatchRecount()
+
+    def test_non_members_cannot_read_stats(self):
+        self.client.force_authenticate(user=self.client_user)
+        response = self.client.get(reverse("project-stats", args=[self.project1.id]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
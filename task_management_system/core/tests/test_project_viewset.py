@@ -1,9 +1,11 @@
 from django.urls import reverse
 from django.db.models import Q
+from django.db.models.signals import m2m_changed
 from rest_framework.test import APITestCase
 from rest_framework import status
 
 from ..models import User, Project
+from ..search import DatabaseSearchBackend
 from ..constants import ADMIN, PROJECT_MANAGER, TECH_LEAD, DEVELOPER, CLIENT
 
 
@@ -96,3 +98,109 @@ class ProjectViewSetTestCase(APITestCase):
         project_names = [project["name"] for project in response.data]
         self.assertIn(self.project1.name, project_names)
         self.assertNotIn(self.project3.name, project_names)
+
+    def test_project_manager_can_add_remove_and_replace_members(self):
+        self.authenticate(self.project_manager)
+        url = reverse("project-members", kwargs={"pk": self.project1.id})
+
+        response = self.client.post(
+            url, {"members": [self.client_user.id, self.developer.id]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data["members"]),
+            {self.developer.id, self.tech_lead.id, self.client_user.id},
+        )
+
+        response = self.client.delete(
+            url, {"members": [self.tech_lead.id]}, format="json"
+        )
+        self.assertEqual(
+            set(self.project1.members.values_list("id", flat=True)),
+            {self.developer.id, self.client_user.id},
+        )
+
+        response = self.client.put(url, {"members": [self.admin.id]}, format="json")
+        self.assertEqual(response.data["members"], [self.admin.id])
+
+        self.authenticate(self.client_user)
+        response = self.client.get(reverse("project-list"))
+        project_names = [project["name"] for project in response.data]
+        self.assertNotIn(self.project1.name, project_names)
+
+    def test_members_send_the_m2m_signals(self):
+        actions = []
+
+        def receiver(sender, action, pk_set, **kwargs):
+            actions.append((action, pk_set))
+
+        m2m_changed.connect(receiver, sender=Project.members.through)
+        self.addCleanup(m2m_changed.disconnect, receiver, Project.members.through)
+        self.authenticate(self.project_manager)
+        url = reverse("project-members", kwargs={"pk": self.project1.id})
+        self.client.put(url, {"members": [self.client_user.id]}, format="json")
+        self.assertEqual(
+            actions,
+            [
+                ("pre_add", {self.client_user.id}),
+                ("pre_remove", {self.developer.id, self.tech_lead.id}),
+                ("post_add", {self.client_user.id}),
+                ("post_remove", {self.developer.id, self.tech_lead.id}),
+            ],
+        )
+
+    def test_members_rejects_unknown_users(self):
+        self.authenticate(self.admin)
+        url = reverse("project-members", kwargs={"pk": self.project1.id})
+        response = self.client.post(url, {"members": [9999]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_members_rejects_ids_that_are_not_ints_or_strings(self):
+        self.authenticate(self.admin)
+        url = reverse("project-members", kwargs={"pk": self.project1.id})
+        members = set(self.project1.members.all())
+        for user_id in [True, float(self.tech_lead.id), [self.tech_lead.id]]:
+            with self.subTest(user_id=user_id):
+                response = self.client.post(url, {"members": [user_id]}, format="json")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(self.project1.members.all()), members)
+
+    def test_tech_lead_cannot_manage_members(self):
+        self.authenticate(self.tech_lead)
+        url = reverse("project-members", kwargs={"pk": self.project1.id})
+        response = self.client.post(url, {"members": [self.admin.id]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_expand_members(self):
+        self.authenticate(self.project_manager)
+        response = self.client.get(
+            reverse("project-list"),
+            {"fields": "name", "expand": "members", "cursor": ""},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        project1 = response.data["results"][0]
+        self.assertEqual(project1["name"], self.project1.name)
+        self.assertEqual(
+            [member["username"] for member in project1["members"]],
+            [self.tech_lead.username, self.developer.username],
+        )
+
+    def test_search_without_visible_projects(self):
+        loner = User.objects.create_user(
+            email="loner@deloitte.com",
+            username="loner",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.authenticate(loner)
+        response = self.client.get(reverse("project-list"), {"search": "P"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_database_search_backend(self):
+        backend = DatabaseSearchBackend()
+        projects = Project.objects.filter(members=self.developer)
+        self.assertEqual(
+            backend.search("project", "tl_pro", projects), [self.project2.id]
+        )
+        self.assertEqual(backend.search("project", "project desc", projects.none()), [])
@@ -0,0 +1,84 @@
+from django.core.cache import cache, caches
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from ..models import Comment, Task, User, Project
+from ..constants import ADMIN, PAGE_SIZE, PROJECT_MANAGER, DEVELOPER, LIST_CACHE_ALIAS
+
+
+class ListQueryCountTestCase(APITestCase):
+    """
+    Every list endpoint runs a fixed number of queries, whether the page
+    holds one row or a full page of rows with related objects
+    """
+
+    # (url name, role, queries): paginator count, page, and the members
+    # prefetch for projects; project managers also load their project access
+    EXPECTED_QUERIES = [
+        ("user-list", ADMIN, 2),
+        ("user-list", PROJECT_MANAGER, 3),
+        ("project-list", ADMIN, 3),
+        ("project-list", DEVELOPER, 4),
+        ("task-list", ADMIN, 2),
+        ("task-list", PROJECT_MANAGER, 3),
+        ("comment-list", ADMIN, 2),
+        ("comment-list", DEVELOPER, 3),
+    ]
+
+    def setUp(self):
+        self.users = {
+            role: User.objects.create_user(
+                email=f"{role.lower()}@deloitte.com",
+                username=role.lower(),
+                password="password",
+                role=role,
+            )
+            for role in [ADMIN, PROJECT_MANAGER, DEVELOPER]
+        }
+
+    def add_rows(self, count):
+        start = Project.objects.count()
+        for i in range(start, start + count):
+            project = Project.objects.create(
+                name=f"Project {i}",
+                description="desc",
+                created_by=self.users[PROJECT_MANAGER],
+            )
+            project.members.add(self.users[DEVELOPER])
+            task = Task.objects.create(
+                title=f"Task {i}",
+                description="desc",
+                created_by=self.users[PROJECT_MANAGER],
+                project_id=project,
+                assigned_to=self.users[DEVELOPER],
+                status="TO_DO",
+                priority="LOW",
+            )
+            Comment.objects.create(
+                content=f"Comment {i}", author=self.users[DEVELOPER], task_id=task
+            )
+            User.objects.create(
+                username=f"member {i}", email=f"member{i}@deloitte.com", role=DEVELOPER
+            ).project_members.add(project)
+
+    def assert_list_queries(self, url_name, role, expected):
+        cache.clear()
+        caches[LIST_CACHE_ALIAS].clear()
+        self.client.force_authenticate(user=self.users[role])
+        with self.assertNumQueries(expected):
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        self.add_rows(1)
+        for url_name, role, expected in self.EXPECTED_QUERIES:
+            with self.subTest(url_name=url_name, role=role, rows="one"):
+                self.assert_list_queries(url_name, role, expected)
+
+        self.add_rows(PAGE_SIZE)
+        for url_name, role, expected in self.EXPECTED_QUERIES:
+            with self.subTest(url_name=url_name, role=role, rows="full page"):
+                response = self.assert_list_queries(url_name, role, expected)
+                self.assertEqual(len(response.data), PAGE_SIZE)
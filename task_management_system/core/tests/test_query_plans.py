@@ -0,0 +1,76 @@
+import re
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from ..models import Comment, Task, User, Project
+from ..constants import ADMIN, PROJECT_MANAGER, DEVELOPER, TECH_LEAD, CLIENT
+
+# A walk over a whole table, and over a whole table or one of its indexes
+TABLE_SCAN = re.compile(r"\bSCAN (?!subquery\b)\w+\b(?! USING)")
+ANY_SCAN = re.compile(r"\bSCAN (?!subquery\b)\w+")
+
+
+class ListQueryPlanTestCase(APITestCase):
+    """
+    Run EXPLAIN QUERY PLAN on every query issued by the list endpoints
+    and check that none of them falls back to a full table scan. Admins
+    page through whole tables along an index; the lists of the other roles
+    are filtered, so they must only seek into indexes (SEARCH).
+    """
+
+    def setUp(self):
+        self.users = {
+            role: User.objects.create_user(
+                email=f"{role.lower()}@deloitte.com",
+                username=role.lower(),
+                password="password",
+                role=role,
+            )
+            for role in [ADMIN, PROJECT_MANAGER, TECH_LEAD, DEVELOPER, CLIENT]
+        }
+        project = Project.objects.create(
+            name="PM_Project",
+            description="desc",
+            created_by=self.users[PROJECT_MANAGER],
+        )
+        project.members.add(self.users[TECH_LEAD], self.users[DEVELOPER])
+        task = Task.objects.create(
+            title="Task 1",
+            description="desc",
+            created_by=self.users[TECH_LEAD],
+            project_id=project,
+            assigned_to=self.users[DEVELOPER],
+            status="TO_DO",
+            priority="LOW",
+        )
+        Comment.objects.create(
+            content="task", author=self.users[DEVELOPER], task_id=task
+        )
+        Comment.objects.create(
+            content="project", author=self.users[DEVELOPER], project_id=project
+        )
+
+    def assert_plan_uses_indexes(self, sql, role):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plan = "\n".join(row[-1] for row in cursor.fetchall())
+        if role == ADMIN:
+            self.assertIsNone(TABLE_SCAN.search(plan), f"{sql}\n{plan}")
+        else:
+            self.assertIsNone(ANY_SCAN.search(plan), f"{sql}\n{plan}")
+            self.assertIn("SEARCH", plan, f"{sql}\n{plan}")
+
+    def test_list_endpoints_use_indexes(self):
+        for basename in ["user", "project", "task", "comment"]:
+            for role, user in self.users.items():
+                for params in [{}, {"cursor": ""}]:
+                    with self.subTest(basename=basename, role=role, params=params):
+                        self.client.force_authenticate(user=user)
+                        with CaptureQueriesContext(connection) as queries:
+                            self.client.get(reverse(f"{basename}-list"), params)
+                        for query in queries.captured_queries:
+                            if query["sql"].startswith("SELECT"):
+                                self.assert_plan_uses_indexes(query["sql"], role)
@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Comment, Project, Task, User
+from ..constants import DEVELOPER, PROJECT_MANAGER
+
+
+class SyncTestCase(APITestCase):
+    def setUp(self):
+        # Without the lag, a watermark only covers changes made after it
+        patcher = mock.patch("core.sync.SYNC_WATERMARK_LAG", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.project_manager = User.objects.create_user(
+            email="project_manager@deloitte.com",
+            username="project_manager",
+            password="password",
+            role=PROJECT_MANAGER,
+        )
+        self.developer = User.objects.create_user(
+            email="developer@deloitte.com",
+            username="developer",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.other_developer = User.objects.create_user(
+            email="other_developer@deloitte.com",
+            username="other_developer",
+            password="password",
+            role=DEVELOPER,
+        )
+        self.project = Project.objects.create(
+            name="Project", description="desc", created_by=self.project_manager
+        )
+        self.project.members.add(self.developer)
+        self.task = Task.objects.create(
+            title="Task",
+            description="desc",
+            created_by=self.project_manager,
+            project_id=self.project,
+            assigned_to=self.developer,
+        )
+        self.comment = Comment.objects.create(content="comment", task_id=self.task)
+
+    def sync(self, user, watermark=None):
+        self.client.force_authenticate(user=user)
+        params = {} if watermark is None else {"since": watermark}
+        response = self.client.get(reverse("sync-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def ids(self, data, name):
+        return [item["id"] for item in data[name]]
+
+    def test_initial_snapshot(self):
+        data = self.sync(self.developer)
+        self.assertTrue(data["reset"])
+        self.assertFalse(data["has_more"])
+        self.assertEqual(self.ids(data, "projects"), [self.project.id])
+        self.assertEqual(self.ids(data, "tasks"), [self.task.id])
+        self.assertEqual(self.ids(data, "comments"), [self.comment.id])
+        self.assertEqual(self.sync(self.other_developer)["tasks"], [])
+
+    def test_changes_and_deletions_since_watermark(self):
+        watermark = self.sync(self.project_manager)["watermark"]
+        self.task.title = "Renamed"
+        self.task.save()
+        comment = Comment.objects.create(content="new", project_id=self.project)
+        deleted_id = self.comment.id
+        self.comment.delete()
+
+        data = self.sync(self.project_manager, watermark)
+        self.assertFalse(data["reset"])
+        self.assertEqual(data["projects"], [])
+        self.assertEqual(self.ids(data, "tasks"), [self.task.id])
+        self.assertEqual(data["tasks"][0]["title"], "Renamed")
+        self.assertEqual(self.ids(data, "comments"), [comment.id])
+        self.assertEqual(data["deleted"]["comments"], [deleted_id])
+
+        data = self.sync(self.project_manager, data["watermark"])
+        self.assertEqual(data["tasks"], [])
+        self.assertEqual(data["deleted"]["comments"], [])
+
+    def test_reassigned_task_is_deleted_for_previous_assignee(self):
+        watermark = self.sync(self.developer)["watermark"]
+        other_watermark = self.sync(self.other_developer)["watermark"]
+        self.task.assigned_to = self.other_developer
+        self.task.save()
+
+        data = self.sync(self.developer, watermark)
+        self.assertEqual(data["tasks"], [])
+        self.assertEqual(data["deleted"]["tasks"], [self.task.id])
+
+        data = self.sync(self.other_developer, other_watermark)
+        self.assertEqual(self.ids(data, "tasks"), [self.task.id])
+        self.assertEqual(data["deleted"]["tasks"], [])
+
+    def test_membership_change_resets_sync(self):
+        watermark = self.sync(self.other_developer)["watermark"]
+        self.project.members.add(self.other_developer)
+        data = self.sync(self.other_developer, watermark)
+        self.assertTrue(data["reset"])
+        self.assertEqual(self.ids(data, "projects"), [self.project.id])
+
+    def test_invalid_watermark(self):
+        self.client.force_authenticate(user=self.developer)
+        response = self.client.get(reverse("sync-list"), {"since": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
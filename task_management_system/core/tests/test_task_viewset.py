@@ -1,9 +1,20 @@
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.db.models import Q
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
 
+from ..cache import get_stats
 from ..models import Task, User, Project
+from ..serializers import TaskSerializer
 from ..constants import ADMIN, PROJECT_MANAGER, DEVELOPER, TECH_LEAD, CLIENT
 
 
@@ -118,3 +129,284 @@ class TaskViewSetTestCase(APITestCase):
         self.assertIn(self.task1.title, task_titles)
         self.assertIn(self.task2.title, task_titles)
         self.assertNotIn(self.task3.title, task_titles)
+
+    def test_cursor_pagination_walks_all_tasks_in_order(self):
+        for i in range(20):
+            Task.objects.create(
+                title=f"Bulk {i}",
+                description="desc",
+                created_by=self.project_manager,
+                project_id=self.project1,
+                status="TO_DO",
+                priority="LOW",
+            )
+        self.authenticate(self.admin)
+        url = reverse("task-list")
+        response = self.client.get(url, {"cursor": "", "count": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 23)
+        self.assertIsNone(response.data["previous"])
+        first_page = [task["id"] for task in response.data["results"]]
+
+        response = self.client.get(url, {"cursor": response.data["next"]})
+        self.assertNotIn("count", response.data)
+        self.assertIsNone(response.data["next"])
+        second_page = [task["id"] for task in response.data["results"]]
+        expected = list(
+            Task.objects.order_by("created_at", "id").values_list("id", flat=True)
+        )
+        self.assertEqual(first_page + second_page, expected)
+
+        response = self.client.get(url, {"cursor": response.data["previous"]})
+        self.assertEqual([task["id"] for task in response.data["results"]], first_page)
+
+    def test_invalid_cursor_is_rejected(self):
+        self.authenticate(self.admin)
+        response = self.client.get(reverse("task-list"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_cache_is_invalidated_by_task_writes(self):
+        self.authenticate(self.tech_lead)
+        url = reverse("task-list")
+        response = self.client.get(url)
+        self.assertEqual(len(response.data), 2)
+        hits = get_stats()["hits"]
+        self.client.get(url)
+        self.assertEqual(get_stats()["hits"], hits + 1)
+
+        self.task3.assigned_to = self.tech_lead
+        self.task3.save()
+        response = self.client.get(url)
+        task_titles = [task["title"] for task in response.data]
+        self.assertIn(self.task3.title, task_titles)
+
+        self.task1.delete()
+        response = self.client.get(url)
+        task_titles = [task["title"] for task in response.data]
+        self.assertNotIn(self.task1.title, task_titles)
+
+    def test_list_cached_before_the_commit_is_dropped(self):
+        self.authenticate(self.tech_lead)
+        url = reverse("task-list")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task3.assigned_to = self.tech_lead
+            self.task3.save()
+            # A concurrent request caches the list under the new generations
+            self.client.get(url)
+        misses = get_stats()["misses"]
+        self.client.get(url)
+        self.assertEqual(get_stats()["misses"], misses + 1)
+
+    def test_search_matches_prefixes_within_visible_tasks(self):
+        self.task1.description = "Refactor the billing module"
+        self.task1.save()
+        self.authenticate(self.tech_lead)
+        url = reverse("task-list")
+        response = self.client.get(url, {"search": "bill"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task["title"] for task in response.data], [self.task1.title])
+
+        response = self.client.get(url, {"search": "task"})
+        task_titles = [task["title"] for task in response.data]
+        self.assertIn(self.task2.title, task_titles)
+        self.assertNotIn(self.task3.title, task_titles)
+
+        self.task1.delete()
+        response = self.client.get(url, {"search": "bill"})
+        self.assertEqual(response.data, [])
+
+    def test_tech_lead_can_bulk_create_tasks_in_their_project(self):
+        self.authenticate(self.tech_lead)
+        url = reverse("task-bulk")
+        items = [
+            {
+                "title": f"Imported {i}",
+                "description": "desc",
+                "status": "TO_DO",
+                "priority": "LOW",
+                "project_id": self.project1.id,
+                "assigned_to": self.developer.id,
+            }
+            for i in range(20)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertLess(len(queries), 10)
+        self.assertEqual(len(response.data["results"]), 20)
+        self.assertEqual(Task.objects.filter(title__startswith="Imported").count(), 20)
+        self.assertTrue(
+            all(
+                task["created_by"] == self.tech_lead.id
+                for task in response.data["results"]
+            )
+        )
+
+    def test_bulk_create_reports_item_errors_and_writes_nothing(self):
+        self.authenticate(self.project_manager)
+        url = reverse("task-bulk")
+        items = [
+            {
+                "title": "Valid",
+                "description": "desc",
+                "status": "TO_DO",
+                "priority": "LOW",
+                "project_id": self.project1.id,
+                "assigned_to": self.developer.id,
+            },
+            {
+                "title": "Other project",
+                "description": "desc",
+                "status": "TO_DO",
+                "priority": "LOW",
+                "project_id": self.project2.id,
+            },
+            {
+                "title": "Not a member",
+                "description": "desc",
+                "status": "TO_DO",
+                "priority": "LOW",
+                "project_id": self.project1.id,
+                "assigned_to": self.client_user.id,
+            },
+        ]
+        response = self.client.post(url, items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [1, 2])
+        self.assertIn("assigned_to", response.data["errors"][1]["errors"])
+        self.assertFalse(Task.objects.filter(title="Valid").exists())
+
+    def test_bulk_update_and_delete(self):
+        self.authenticate(self.project_manager)
+        url = reverse("task-bulk")
+        response = self.client.patch(
+            url, [{"id": self.task1.id, "status": "DONE"}], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.task1.refresh_from_db()
+        self.assertEqual(self.task1.status, "DONE")
+
+        response = self.client.delete(url, [self.task2.id], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.delete(url, [self.task1.id], format="json")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Task.objects.filter(pk=self.task1.id).exists())
+
+    def test_retrieve_fetches_the_task_once(self):
+        self.authenticate(self.project_manager)
+        url = reverse("task-detail", kwargs={"pk": self.task1.id})
+        self.client.get(reverse("project-list"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        task_queries = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('SELECT "core_task"')
+        ]
+        self.assertEqual(len(task_queries), 1)
+
+    def test_export_streams_visible_tasks(self):
+        self.authenticate(self.tech_lead)
+        response = self.client.get(reverse("task-export"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual([row["id"] for row in rows], [self.task1.id, self.task2.id])
+        self.assertEqual(rows[0]["assigned_to"], self.tech_lead.id)
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        token = await sync_to_async(AccessToken.for_user)(self.tech_lead)
+        response = await self.async_client.get(
+            reverse("task-export"), headers={"Authorization": f"Bearer {token}"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.task1.id, self.task2.id])
+
+    def test_export_csv(self):
+        self.authenticate(self.developer)
+        response = self.client.get(reverse("task-export"), {"output": "csv"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith("id,title,description"))
+        self.assertEqual(len(lines), 1)
+
+        response = self.client.get(reverse("task-export"), {"output": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_renders_like_the_serializer(self):
+        self.authenticate(self.admin)
+        response = self.client.get(reverse("task-list"))
+        expected = TaskSerializer(Task.objects.order_by("created_at", "pk"), many=True)
+        self.assertEqual(
+            json.loads(response.content), json.loads(json.dumps(expected.data))
+        )
+
+    def test_sparse_fields_and_expand(self):
+        self.authenticate(self.tech_lead)
+        response = self.client.get(
+            reverse("task-list"),
+            {"fields": "id,title", "expand": "project_id,assigned_to"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        task1, task2 = response.data
+        self.assertEqual(list(task1), ["id", "title", "project_id", "assigned_to"])
+        self.assertEqual(task1["project_id"]["name"], self.project1.name)
+        self.assertEqual(task1["assigned_to"]["email"], self.tech_lead.email)
+        # Objects the tech lead cannot see are left as primary keys
+        self.assertEqual(task2["project_id"], self.project2.id)
+        self.assertEqual(task2["assigned_to"], self.client_user.id)
+
+        response = self.client.get(reverse("task-list"), {"fields": "id,secret"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse("task-list"), {"expand": "title"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_is_conditional(self):
+        self.authenticate(self.tech_lead)
+        url = reverse("task-detail", kwargs={"pk": self.task1.id})
+        response = self.client.get(url)
+        # Objects saved during the last second have no Last-Modified
+        self.assertNotIn("Last-Modified", response)
+        Task.objects.filter(pk=self.task1.pk).update(
+            updated_at=timezone.now() - timedelta(seconds=5)
+        )
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with patch.object(TaskSerializer, "to_representation") as render:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        render.assert_not_called()
+
+        self.client.patch(url, {"status": "IN_PROGRESS"})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_is_conditional(self):
+        self.authenticate(self.tech_lead)
+        url = reverse("task-list")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url, {"page": 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.task1.title = "Renamed"
+        self.task1.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
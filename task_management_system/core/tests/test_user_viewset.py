@@ -1,9 +1,14 @@
+from unittest.mock import patch
+
 from django.urls import reverse
 from django.db.models import Q
 from rest_framework.test import APITestCase
 from rest_framework import status
 
+from django.contrib.auth.hashers import check_password
+
 from ..models import User, Project
+from ..passwords import hash_passwords
 from ..constants import ADMIN, PROJECT_MANAGER, DEVELOPER, TECH_LEAD, CLIENT
 
 
@@ -126,3 +131,88 @@ class UserViewSetTestCase(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["id"], self.developer.id)
+
+    def test_retrieve_etag_changes_when_the_user_is_saved(self):
+        self.authenticate(self.developer)
+        url = reverse("user-detail", kwargs={"pk": self.developer.id})
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.developer.username = "renamed"
+        self.developer.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["username"], "renamed")
+
+    def test_admin_can_bulk_import_users(self):
+        self.client.force_authenticate(user=self.admin)
+        items = [
+            {
+                "username": f"client{i}",
+                "email": f"client{i}@HR.example.com",
+                "role": CLIENT,
+                "password": f"secret{i}",
+            }
+            for i in range(3)
+        ]
+        items.append({"username": "sso", "email": "sso@example.com", "role": CLIENT})
+        response = self.client.post(reverse("user-bulk"), items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["results"]), 4)
+        user = User.objects.get(username="client1")
+        self.assertEqual(user.email, "client1@hr.example.com")
+        self.assertTrue(user.check_password("secret1"))
+        self.assertFalse(User.objects.get(username="sso").has_usable_password())
+
+        response = self.client.post(
+            reverse("token_obtain_pair"),
+            {"email": "client2@hr.example.com", "password": "secret2"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_import_reports_duplicates_and_writes_nothing(self):
+        self.client.force_authenticate(user=self.admin)
+        items = [
+            {"username": "new", "email": "new@example.com", "role": CLIENT},
+            {"username": "new", "email": "other@example.com", "role": CLIENT},
+            {"username": "dup", "email": self.developer.email, "role": CLIENT},
+            {"username": "bad", "email": "bad@example.com", "role": "OWNER"},
+        ]
+        count = User.objects.count()
+        response = self.client.post(reverse("user-bulk"), items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [error["index"] for error in response.data["errors"]], [1, 2, 3]
+        )
+        self.assertIn("username", response.data["errors"][0]["errors"])
+        self.assertIn("email", response.data["errors"][1]["errors"])
+        self.assertIn("role", response.data["errors"][2]["errors"])
+        self.assertEqual(User.objects.count(), count)
+
+        self.client.force_authenticate(user=self.project_manager)
+        response = self.client.post(reverse("user-bulk"), items[:1], format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_import_conflicts_are_rejected(self):
+        # Another request creates the first user between validation and insert
+        self.client.force_authenticate(user=self.admin)
+        items = [
+            {"username": f"late{i}", "email": f"late{i}@example.com", "role": CLIENT}
+            for i in range(2)
+        ]
+        rows = [dict(item) for item in items]
+        User.objects.create_user(password="password", **items[0])
+        count = User.objects.count()
+        with patch("core.views.validate_user_rows", return_value=(rows, [])):
+            response = self.client.post(reverse("user-bulk"), items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(User.objects.count(), count)
+
+    def test_passwords_are_hashed_in_a_process_pool(self):
+        passwords = [f"password{i}" for i in range(60)] + [None]
+        hashes = hash_passwords(passwords, workers=2)
+        self.assertEqual(len(hashes), len(passwords))
+        for password, hashed in zip(passwords[:-1], hashes):
+            self.assertTrue(check_password(password, hashed))
+        self.assertTrue(hashes[-1].startswith("!"))
@@ -1,143 +1,92 @@
+from core.access import get_project_access
 from core.constants import PROJECT_MANAGER, TECH_LEAD
-from .models import Project, Task
-from django.db.models import Q
-from rest_framework_roles.granting import is_self
+from core.metrics import timed_permission
+from core.permissions import reads_loaded_object, uses_request_data
+from .models import Task
 from rest_framework import serializers
 
 
-def is_user_in_projects(request, view):
+def to_pk(value):
     """
-    Check if the user has created the project or
-    is a member of the project
+    Convert a primary key coming from request data to int,
+    returning None when it is not a valid key. Like the primary key
+    fields, only ints and strings are keys: int(True) would be 1.
     """
-    user = request.user
-    target_user = view.get_object()
-    projects = Project.objects.filter(Q(created_by=user) | Q(members=user)).distinct()
-    return Project.objects.filter(
-        Q(members=target_user) | Q(created_by=target_user), id__in=projects
-    ).exists()
-
-
-def is_allowed_to_retrieve(request, view):
-    """
-    Check if the user can retrieve the projects or not
-    """
-    return is_self(request, view) or is_user_in_projects(request, view)
-
-
-def is_project_member(request, view):
-    """
-    Check if the current user is a member of the project
-    """
-    user = request.user
-    project = view.get_object()
-    return project.members.filter(pk=user.pk).exists()
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
 
 
-def is_project_creator(request, view):
+def can_access_project(request, project_id):
     """
-    Check if the current user has created the project
+    Check if the user can work in the project: project managers can use
+    the projects they created or are members of, others only the projects
+    they are members of
     """
     user = request.user
-    project = view.get_object()
-    return project.created_by == user
+    access = get_project_access(user, request)
+    if user.role == PROJECT_MANAGER and project_id in access.created:
+        return True
+    return project_id in access.member
 
 
+@uses_request_data
+@timed_permission
 def is_project_member_using_task(request, view):
     """
     Check if the user has created a ptoject or is a member of the project
     for tasks
     """
-    user = request.user
     data = request.data
     project_id = data.get("project_id")
     if project_id is None:
         raise serializers.ValidationError({"project": "Missing Project Field"})
-    if user.role == PROJECT_MANAGER and user.projects.filter(pk=project_id).exists():
-        return True
-    return user.project_members.filter(pk=project_id).exists()
-
-
-def is_task_creator(request, view):
-    """
-    Check if the user has created a task
-    """
-    user = request.user
-    task = view.get_object()
-    return task.created_by == user
+    return can_access_project(request, to_pk(project_id))
 
 
-def is_task_assignee(request, view):
-    """
-    Check if the user has been assigned the task
-    """
-    user = request.user
-    task = view.get_object()
-    return task.assigned_to == user
-
-
-def is_project_member_or_creator_using_task(request, view):
-    user = request.user
-    task = view.get_object()
-    project_id = task.project_id.id
-    return (
-        user.projects.filter(pk=project_id).exists()
-        or user.project_members.filter(pk=project_id).exists()
-    )
-
-
-def check_comment_using_task_and_project(user, project_id, task_id):
+def check_comment_using_task_and_project(request, project_id, task_id):
     """
     Check if the user can access the comment of the project or task
     """
+    user = request.user
     if project_id:
-        if (
-            user.role == PROJECT_MANAGER
-            and user.projects.filter(pk=project_id).exists()
-        ):
-            return True
-        return user.project_members.filter(pk=project_id).exists()
+        return can_access_project(request, to_pk(project_id))
     elif task_id:
-        task = Task.objects.get(id=task_id)
+        task = (
+            Task.objects.filter(id=task_id)
+            .values("assigned_to_id", "created_by_id", "project_id_id")
+            .first()
+        )
+        if task is None:
+            return False
+        if task["assigned_to_id"] == user.pk:
+            return True
         if user.role == PROJECT_MANAGER:
-            projects = Project.objects.filter(
-                Q(members=user) | Q(created_by=user)
-            ).distinct()
-            return (task.assigned_to == user) or (task.project_id in projects)
+            return task["project_id_id"] in get_project_access(user, request).all
         elif user.role == TECH_LEAD:
-            return Task.objects.filter(
-                Q(assigned_to=user) | Q(created_by=user), id=task_id
-            ).exists()
-        else:
-            return task.assigned_to == user
+            return task["created_by_id"] == user.pk
+        return False
 
 
+@uses_request_data
+@timed_permission
 def is_project_member_using_comment(request, view):
-    user = request.user
     data = request.data
     if data.get("project_id") and data.get("task_id"):
         return False
     project_id = data.get("project_id")
     task_id = data.get("task_id")
-    return check_comment_using_task_and_project(user, project_id, task_id)
+    return check_comment_using_task_and_project(request, project_id, task_id)
 
 
-def check_comment(request, view):
-    user = request.user
-    comment = view.get_object()
-    project_id = None
-    task_id = None
-    if comment.project_id:
-        project_id = comment.project_id.id
-    if comment.task_id:
-        task_id = comment.task_id.id
-    return check_comment_using_task_and_project(user, project_id, task_id)
-
-
-def is_comment_author(request, view):
+@reads_loaded_object
+@timed_permission
+def is_visible(request, view):
     """
-    Check if the user is the author of the comment
+    Check if the rules of visible_to let the user apply the action to the
+    object, using the ``is_visible`` flag that get_object loads with it
     """
-    user = request.user
-    comment = view.get_object()
-    return comment.author == user
+    return view.get_object().is_visible
@@ -1,35 +1,66 @@
+import time
+
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.viewsets import ModelViewSet
-from rest_framework_roles.granting import is_self, anyof
+from rest_framework.decorators import action
+from rest_framework.viewsets import ModelViewSet, ViewSet
 from rest_framework import serializers
-from django.utils.decorators import method_decorator
-from django.db.models import Q
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_cookie, vary_on_headers
-from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Value
+from django.db.models.signals import m2m_changed, post_save
+from django.utils import timezone
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import quote_etag
 
+from core.access import get_project_access
+from core.archive import restore_task
+from core.cache import cached_list, get_stats, not_modified, set_validators
 from core.constants import (
     ADMIN,
+    BULK_MAX_ITEMS,
     CLIENT,
     DEVELOPER,
     PAGE_SIZE,
     PROJECT_MANAGER,
+    SYNC_PAGE_SIZE,
     TECH_LEAD,
 )
+from core.counters import project_stats, update_task_counters
+from core.export import EXPORT_FORMATS, export_response
+from core.metrics import expose
+from core.provisioning import import_users, validate_user_rows
+from core.sync import (
+    COMMENT,
+    PROJECT,
+    TASK,
+    InvalidWatermark,
+    access_digest,
+    decode_watermark,
+    encode_watermark,
+    floor_cursor,
+)
 from core.utils import (
-    check_comment,
-    is_allowed_to_retrieve,
-    is_comment_author,
-    is_project_creator,
-    is_project_member,
-    is_project_member_or_creator_using_task,
+    can_access_project,
     is_project_member_using_comment,
     is_project_member_using_task,
-    is_task_assignee,
-    is_task_creator,
+    is_visible,
+    to_pk,
 )
-from .models import Project, Task, User, Comment
+from .models import (
+    ArchivedComment,
+    ArchivedTask,
+    Comment,
+    Project,
+    Task,
+    Tombstone,
+    User,
+)
+from .pagination import InvalidCursor, KeysetPaginator
+from .planning import plan_queryset
+from .projection import Expansion, InvalidProjection, Projection, parse_names
+from .search import index_objects, search
 from .serializers import (
     CommentSerializer,
     CustomUserDetailsSerializer,
@@ -38,7 +69,253 @@ from .serializers import (
 )
 
 
-class UserViewSet(ModelViewSet):
+def export_list(request, queryset, filename):
+    output = request.GET.get("output", "ndjson")
+    if output not in EXPORT_FORMATS:
+        return Response(
+            {"detail": f"output must be one of {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return export_response(request, queryset, output, filename)
+
+
+def visible_queryset(model, request):
+    """
+    Objects of a model that the user may see, for ``?expand=``
+    """
+    return model.objects.visible_to(request.user, "retrieve", request)
+
+
+class QueryPlanMixin:
+    """
+    Load only the columns, joins and prefetches the serializer renders
+    when retrieving an object, and fetch the object once per request:
+    the permission checks in core.utils and the action itself all share
+    the instance memoized by get_object. On detail routes the object comes
+    with the ``is_visible`` flag of its model's visible_to rules, so that
+    the lookup and the is_visible check take a single query.
+    """
+
+    def get_object(self):
+        if not hasattr(self, "_object"):
+            self._object = super().get_object()
+        return self._object
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "retrieve":
+            queryset = plan_queryset(queryset, self.get_serializer_class())
+        if self.detail:
+            user = self.request.user
+            queryset = queryset.with_visibility(user, self.action, self.request)
+        return queryset
+
+
+class ConditionalRetrieveMixin:
+    """
+    Send ETag and Last-Modified validators with retrieve responses, derived
+    from ``updated_at``, and answer matching ``If-None-Match`` or
+    ``If-Modified-Since`` requests with a 304 before rendering the object.
+    """
+
+    def get_validators(self, instance):
+        """
+        The ETag and last modification timestamp (or None) of an object.
+        HTTP dates have a one second resolution, so objects saved during the
+        last second get no Last-Modified: another save within that second
+        would not move it.
+        """
+        updated_at = instance.updated_at.timestamp()
+        etag = quote_etag(f"{instance.pk}-{updated_at:.6f}")
+        if time.time() - updated_at < 1:
+            return etag, None
+        return etag, int(updated_at)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_validators(instance)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+            set_validators(response, etag, last_modified)
+        return response
+
+
+class ArchiveMixin:
+    """
+    ``?include_archived=true`` extends list and retrieve to the objects that
+    archive_tasks moved to ``archive_model``, under the same visibility
+    rules, and adds an ``archived`` flag to each object. Lists including
+    them are a UNION of both tables paginated by page number, without
+    search or cursors. ``list_queryset(request, model)`` builds the list of
+    either table.
+    """
+
+    archive_model = None
+
+    def include_archived(self, request):
+        return request.GET.get("include_archived", "").lower() in ("1", "true")
+
+    def permission_scope(self, request):
+        """
+        Decisions on an archived object must not answer for the live table
+        """
+        return "archived" if self.include_archived(request) else "live"
+
+    def get_object(self):
+        if self.action == "restore":
+            return self.get_archived_object()
+        try:
+            return super().get_object()
+        except Http404:
+            if self.action != "retrieve" or not self.include_archived(self.request):
+                raise
+            return self.get_archived_object()
+
+    def get_archived_object(self):
+        queryset = self.archive_model.objects.with_visibility(
+            self.request.user, self.action, self.request
+        )
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        obj = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup]})
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK and self.include_archived(
+            request
+        ):
+            response.data["archived"] = isinstance(
+                self.get_object(), self.archive_model
+            )
+        return response
+
+    def paginated_response(self, request, queryset):
+        if not self.include_archived(request):
+            return super().paginated_response(request, queryset)
+        if "cursor" in request.GET or request.GET.get("search", "").strip():
+            return Response(
+                {"detail": "include_archived lists only support page numbers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            projection = self.get_projection(request)
+        except InvalidProjection as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        archived = self.list_queryset(request, self.archive_model)
+        columns = (self.keyset_field, "archived")
+        live_rows = projection.values(
+            queryset.annotate(archived=Value(False)), *columns
+        )
+        archived_rows = projection.values(
+            archived.annotate(archived=Value(True)), *columns
+        )
+        rows = live_rows.union(archived_rows, all=True).order_by(
+            self.keyset_field, "pk"
+        )
+        try:
+            rows = list(Paginator(rows, PAGE_SIZE).page(request.GET.get("page", 1)))
+        except InvalidPage:
+            return Response(
+                {"detail": "page is not valid"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        items = projection.render(rows)
+        for item, row in zip(items, rows):
+            item["archived"] = row["archived"]
+        return Response(items)
+
+
+class PaginatedListMixin:
+    """
+    Paginate list responses either by page number (``?page=``) or by an
+    opaque keyset cursor (``?cursor=``) seeking on ``(keyset_field, id)``.
+    Cursor responses include the total count only with ``?count=true``.
+    Viewsets with a ``search_kind`` rank ``?search=`` results by relevance.
+
+    Rows are read with ``values()`` and rendered by a Projection of the
+    serializer. ``?fields=`` selects the fields to render and ``?expand=``
+    renders the relations listed in ``expandable`` (field name to
+    serializer class) as nested objects.
+    """
+
+    keyset_field = "created_at"
+    search_kind = None
+    expandable = {}
+
+    def get_projection(self, request):
+        fields = parse_names(request.GET.get("fields", "")) or None
+        expand = parse_names(request.GET.get("expand", ""))
+        unknown = [name for name in expand if name not in self.expandable]
+        if unknown:
+            raise InvalidProjection(f"Cannot expand: {', '.join(unknown)}")
+        expansions = {}
+        for name in expand:
+            serializer_class = self.expandable[name]
+            queryset = visible_queryset(serializer_class.Meta.model, request)
+            expansions[name] = Expansion(serializer_class, queryset)
+        return Projection(self.get_serializer_class(), fields, expansions)
+
+    def paginated_response(self, request, queryset):
+        try:
+            projection = self.get_projection(request)
+        except InvalidProjection as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        query = request.GET.get("search", "").strip()
+        if query and self.search_kind:
+            return self.search_response(request, queryset, query, projection)
+        if "cursor" in request.GET:
+            return self.cursor_response(request, queryset, projection)
+        page = request.GET.get("page", 1)
+        try:
+            queryset = projection.values(queryset.order_by(self.keyset_field, "pk"))
+            paginator = Paginator(queryset, PAGE_SIZE)
+            rows = list(paginator.page(page).object_list)
+        except Exception as e:
+            return Response(
+                {"detail": "page is not valid"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(projection.render(rows))
+
+    def search_response(self, request, queryset, query, projection):
+        page = request.GET.get("page", 1)
+        ids = search(self.search_kind, query, queryset)
+        try:
+            page_ids = Paginator(ids, PAGE_SIZE).page(page).object_list
+        except Exception as e:
+            return Response(
+                {"detail": "page is not valid"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        rows = projection.values(queryset.filter(pk__in=page_ids))
+        rows = {row["pk"]: row for row in rows}
+        results = [rows[pk] for pk in page_ids if pk in rows]
+        return Response(projection.render(results))
+
+    def cursor_response(self, request, queryset, projection):
+        paginator = KeysetPaginator(
+            projection.values(queryset, self.keyset_field),
+            self.keyset_field,
+            PAGE_SIZE,
+        )
+        try:
+            page = paginator.page(request.GET.get("cursor"))
+        except InvalidCursor:
+            return Response(
+                {"detail": "cursor is not valid"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        data = {
+            "next": page.next_cursor,
+            "previous": page.previous_cursor,
+            "results": projection.render(page.object_list),
+        }
+        if request.GET.get("count", "").lower() in ("1", "true"):
+            data["count"] = queryset.count()
+        return Response(data)
+
+
+class UserViewSet(
+    QueryPlanMixin, ConditionalRetrieveMixin, PaginatedListMixin, ModelViewSet
+):
     """
     ViewSet for User model with role-based permissions and caching.
     Supports listing users with pagination and restricted access based on roles.
@@ -46,15 +323,16 @@ class UserViewSet(ModelViewSet):
 
     serializer_class = CustomUserDetailsSerializer
     queryset = User.objects.all()
+    keyset_field = "date_joined"
     view_permissions = {
         "create": {ADMIN: True},
         "list": {ADMIN: True, PROJECT_MANAGER: True},
         "retrieve": {
             ADMIN: True,
-            PROJECT_MANAGER: is_allowed_to_retrieve,
-            TECH_LEAD: is_self,
-            DEVELOPER: is_self,
-            CLIENT: is_self,
+            PROJECT_MANAGER: is_visible,
+            TECH_LEAD: is_visible,
+            DEVELOPER: is_visible,
+            CLIENT: is_visible,
         },
         "update,partial_update": {ADMIN: True},
         "options": {
@@ -65,11 +343,10 @@ class UserViewSet(ModelViewSet):
             CLIENT: True,
         },
         "destroy": {ADMIN: True},
+        "bulk": {ADMIN: True},
     }
 
-    @method_decorator(cache_page(60 * 2))
-    @method_decorator(vary_on_headers("Authorization"))
-    @method_decorator(vary_on_cookie)
+    @cached_list
     def list(self, request):
         """
         List users with role-based filtering and pagination.
@@ -77,35 +354,58 @@ class UserViewSet(ModelViewSet):
         Tech leads, developers, and clients see an empty list.
         """
         try:
-            users = User.objects.all()
+            users = self.list_queryset(request)
         except Exception as e:
             return Response(
                 {"detail": f"Error retrieving users: {str(e)}"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        return self.paginated_response(request, users)
 
-        user = request.user
-        page = request.GET.get("page", 1)
-        if user.role == PROJECT_MANAGER:
-            projects = Project.objects.filter(
-                Q(created_by=user) | Q(members=user)
-            ).distinct()
-            users = User.objects.filter(
-                Q(project_members__in=projects) | Q(projects__in=projects)
-            ).distinct()
-        elif user.role in [TECH_LEAD, DEVELOPER, CLIENT]:
-            users = User.objects.none()
+    def list_queryset(self, request):
+        return User.objects.visible_to(request.user, "list", request)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Create a batch of users from ``[{username, email, role, password}]``.
+        Passwords are hashed in the request's process, which leaves the
+        process pool to the import_users command, and the users are inserted
+        with bulk_create. A user without a password gets an unusable one.
+        Nothing is written unless every item is valid; otherwise the
+        per-item errors are returned.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"detail": "Expected a non empty list of users."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > BULK_MAX_ITEMS:
+            return Response(
+                {"detail": f"At most {BULK_MAX_ITEMS} users can be sent at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        rows, errors = validate_user_rows(items)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            paginator = Paginator(users, PAGE_SIZE)
-            serializer = self.get_serializer(paginator.page(page), many=True)
-        except Exception as e:
+            with transaction.atomic():
+                users = import_users(rows, workers=1)
+        except IntegrityError:
+            # A user with one of the emails or usernames was created since
+            # the rows were validated
             return Response(
-                {"detail": "page is not valid"}, status=status.HTTP_400_BAD_REQUEST
+                {"detail": "Some of the users already exist, nothing was imported."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        return Response(serializer.data)
+        serializer = self.get_serializer(users, many=True)
+        return Response({"results": serializer.data}, status=status.HTTP_201_CREATED)
 
 
-class ProjectViewSet(ModelViewSet):
+class ProjectViewSet(
+    QueryPlanMixin, ConditionalRetrieveMixin, PaginatedListMixin, ModelViewSet
+):
     """
     ViewSet for Project model with role-based permissions and caching.
     Supports listing projects with pagination and restricted access based on roles.
@@ -113,6 +413,11 @@ class ProjectViewSet(ModelViewSet):
 
     serializer_class = ProjectSerializer
     queryset = Project.objects.all()
+    search_kind = "project"
+    expandable = {
+        "created_by": CustomUserDetailsSerializer,
+        "members": CustomUserDetailsSerializer,
+    }
     view_permissions = {
         "create": {
             ADMIN: True,
@@ -127,14 +432,14 @@ class ProjectViewSet(ModelViewSet):
         },
         "retrieve": {
             ADMIN: True,
-            PROJECT_MANAGER: anyof(is_project_creator, is_project_member),
-            TECH_LEAD: is_project_member,
-            DEVELOPER: is_project_member,
-            CLIENT: is_project_member,
+            PROJECT_MANAGER: is_visible,
+            TECH_LEAD: is_visible,
+            DEVELOPER: is_visible,
+            CLIENT: is_visible,
         },
         "update,partial_update": {
             ADMIN: True,
-            PROJECT_MANAGER: anyof(is_project_creator, is_project_member),
+            PROJECT_MANAGER: is_visible,
         },
         "options": {
             ADMIN: True,
@@ -145,13 +450,22 @@ class ProjectViewSet(ModelViewSet):
         },
         "destroy": {
             ADMIN: True,
-            PROJECT_MANAGER: anyof(is_project_creator, is_project_member),
+            PROJECT_MANAGER: is_visible,
+        },
+        "members": {
+            ADMIN: True,
+            PROJECT_MANAGER: is_visible,
+        },
+        "stats": {
+            ADMIN: True,
+            PROJECT_MANAGER: is_visible,
+            TECH_LEAD: is_visible,
+            DEVELOPER: is_visible,
+            CLIENT: is_visible,
         },
     }
 
-    @method_decorator(cache_page(60 * 2))
-    @method_decorator(vary_on_headers("Authorization"))
-    @method_decorator(vary_on_cookie)
+    @cached_list
     def list(self, request):
         """
         List projects with filtering based on user role:
@@ -160,36 +474,117 @@ class ProjectViewSet(ModelViewSet):
         - Admins see all projects.
         """
         try:
-            projects = Project.objects.all()
+            projects = self.list_queryset(request)
         except Exception as e:
             return Response(
                 {"detail": f"Error retrieving projects: {str(e)}"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        user = request.user
-        name = request.GET.get("name", "").strip()
-        if user.role == PROJECT_MANAGER:
-            projects = Project.objects.filter(
-                Q(members=user) | Q(created_by=user)
-            ).distinct()
-        elif user.role in [TECH_LEAD, DEVELOPER, CLIENT]:
-            projects = Project.objects.filter(members=user)
+        return self.paginated_response(request, projects)
 
+    def list_queryset(self, request):
+        """
+        Projects visible to the user, filtered by the list query parameters
+        """
+        projects = Project.objects.visible_to(request.user, "list", request)
+        name = request.GET.get("name", "").strip()
         if name:
             projects = projects.filter(name__icontains=name)
+        return projects
 
-        page = request.GET.get("page", 1)
-        try:
-            paginator = Paginator(projects, PAGE_SIZE)
-            Sserializer = self.get_serializer(paginator.page(page), many=True)
-        except Exception as e:
+    @action(detail=True, methods=["post", "put", "delete"])
+    def members(self, request, pk=None):
+        """
+        Manage the members of a project with ``{"members": [user ids]}``:
+        POST adds the users, DELETE removes them and PUT replaces the members.
+        Only the difference with the current members is written, with a single
+        insert and a single delete on the membership table, while the project
+        row is locked. The m2m_changed signals are sent like by the related
+        manager.
+        """
+        project = self.get_object()
+        user_ids = request.data.get("members")
+        if not isinstance(user_ids, list):
             return Response(
-                {"detail": "page is not valid"}, status=status.HTTP_400_BAD_REQUEST
+                {"members": "Expected a list of user ids."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        requested = {to_pk(user_id) for user_id in user_ids}
+        known = set(User.objects.filter(pk__in=requested).values_list("pk", flat=True))
+        unknown = [user_id for user_id in user_ids if to_pk(user_id) not in known]
+        if unknown:
+            return Response(
+                {"members": f"Unknown users: {unknown}"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        return Response(serializer.data)
 
+        Membership = Project.members.through
 
-class TaskViewSet(ModelViewSet):
+        def send(action_name, pk_set):
+            if pk_set:
+                m2m_changed.send(
+                    sender=Membership,
+                    instance=project,
+                    action=action_name,
+                    reverse=False,
+                    model=User,
+                    pk_set=pk_set,
+                    using=Membership.objects.db,
+                )
+
+        with transaction.atomic():
+            # Concurrent updates of the members of the project wait here, so
+            # that each one diffs against the members the previous one left
+            Project.objects.select_for_update().filter(pk=project.pk).exists()
+            current = set(
+                Membership.objects.filter(project_id=project.pk).values_list(
+                    "user_id", flat=True
+                )
+            )
+            added, removed = set(), set()
+            if request.method == "POST":
+                added = requested - current
+            elif request.method == "DELETE":
+                removed = requested & current
+            else:
+                added, removed = requested - current, current - requested
+
+            send("pre_add", added)
+            send("pre_remove", removed)
+            if added:
+                Membership.objects.bulk_create(
+                    [
+                        Membership(project_id=project.pk, user_id=user_id)
+                        for user_id in added
+                    ],
+                    ignore_conflicts=True,
+                )
+            if removed:
+                Membership.objects.filter(
+                    project_id=project.pk, user_id__in=removed
+                ).delete()
+            send("post_add", added)
+            send("post_remove", removed)
+        return Response({"members": sorted((current | added) - removed)})
+
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        """
+        Task counts by status, priority and assignee and the number of comments
+        and comments on open tasks, read from the ProjectCounter rows that the
+        signals keep up to date instead of aggregating the tasks on every call
+        """
+        project = self.get_object()
+        return Response(project_stats(project.pk))
+
+
+class TaskViewSet(
+    QueryPlanMixin,
+    ArchiveMixin,
+    ConditionalRetrieveMixin,
+    PaginatedListMixin,
+    ModelViewSet,
+):
     """
     ViewSet for Task model with role-based permissions and caching.
     Supports listing tasks with pagination and restricted access based on roles.
@@ -197,6 +592,13 @@ class TaskViewSet(ModelViewSet):
 
     serializer_class = TaskSerializer
     queryset = Task.objects.all()
+    archive_model = ArchivedTask
+    search_kind = "task"
+    expandable = {
+        "project_id": ProjectSerializer,
+        "assigned_to": CustomUserDetailsSerializer,
+        "created_by": CustomUserDetailsSerializer,
+    }
     view_permissions = {
         "create": {
             ADMIN: True,
@@ -212,15 +614,15 @@ class TaskViewSet(ModelViewSet):
         },
         "retrieve": {
             ADMIN: True,
-            PROJECT_MANAGER: is_project_member_or_creator_using_task,
-            TECH_LEAD: anyof(is_task_creator, is_task_assignee),
-            DEVELOPER: is_task_assignee,
-            CLIENT: is_task_assignee,
+            PROJECT_MANAGER: is_visible,
+            TECH_LEAD: is_visible,
+            DEVELOPER: is_visible,
+            CLIENT: is_visible,
         },
         "update,partial_update": {
             ADMIN: True,
             PROJECT_MANAGER: is_project_member_using_task,
-            TECH_LEAD: anyof(is_task_creator, is_task_assignee),
+            TECH_LEAD: is_visible,
         },
         "options": {
             ADMIN: True,
@@ -231,13 +633,27 @@ class TaskViewSet(ModelViewSet):
         },
         "destroy": {
             ADMIN: True,
-            PROJECT_MANAGER: is_project_member_or_creator_using_task,
+            PROJECT_MANAGER: is_visible,
+        },
+        "bulk": {
+            ADMIN: True,
+            PROJECT_MANAGER: True,
+            TECH_LEAD: True,
+        },
+        "export": {
+            ADMIN: True,
+            PROJECT_MANAGER: True,
+            TECH_LEAD: True,
+            DEVELOPER: True,
+            CLIENT: True,
+        },
+        "restore": {
+            ADMIN: True,
+            PROJECT_MANAGER: is_visible,
         },
     }
 
-    @method_decorator(cache_page(60 * 2))
-    @method_decorator(vary_on_headers("Authorization"))
-    @method_decorator(vary_on_cookie)
+    @cached_list
     def list(self, request):
         """
         List tasks with filtering based on user role:
@@ -247,37 +663,233 @@ class TaskViewSet(ModelViewSet):
         Implements pagination and error handling.
         """
         try:
-            tasks = Task.objects.all()
+            tasks = self.list_queryset(request)
         except Exception as e:
             return Response(
                 {"detail": f"Error retrieving tasks: {str(e)}"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        user = request.user
+        return self.paginated_response(request, tasks)
+
+    def list_queryset(self, request, model=Task):
+        """
+        Tasks visible to the user, filtered by the list query parameters
+        """
+        tasks = model.objects.visible_to(request.user, "list", request)
         title = request.GET.get("title", "").strip()
-        if user.role == PROJECT_MANAGER:
-            projects = user.project_members.all()
-            tasks = Task.objects.filter(project_id__in=projects)
-        elif user.role == TECH_LEAD:
-            tasks = Task.objects.filter(
-                Q(assigned_to=user) | Q(created_by=user)
-            ).distinct()
-        elif user.role in [DEVELOPER, CLIENT]:
-            tasks = Task.objects.filter(assigned_to=user)
         if title:
             tasks = tasks.filter(title__icontains=title)
-        page = request.GET.get("page", 1)
-        try:
-            paginator = Paginator(tasks, PAGE_SIZE)
-            serializer = self.get_serializer(paginator.page(page), many=True)
-        except Exception as e:
+        return tasks
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream all the tasks of the list view as NDJSON (default) or CSV
+        with ``?output=csv``
+        """
+        return export_list(request, self.list_queryset(request), "tasks")
+
+    @action(detail=True, methods=["post"])
+    def restore(self, request, pk=None):
+        """
+        Move an archived task and its comments back to the live tables
+        """
+        task = restore_task(self.get_object())
+        return Response(self.get_serializer(task).data)
+
+    @action(detail=False, methods=["post", "patch", "delete"])
+    def bulk(self, request):
+        """
+        Create (POST), partially update (PATCH) or delete (DELETE) a batch of
+        tasks in one transaction. Related objects and project memberships are
+        loaded once for the whole batch, and every item goes through the same
+        permission rules as the single task endpoints. Nothing is written
+        unless every item is valid; otherwise the per-item errors are returned.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
             return Response(
-                {"detail": "page is not valid"}, status=status.HTTP_400_BAD_REQUEST
+                {"detail": "Expected a non empty list of tasks."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > BULK_MAX_ITEMS:
+            return Response(
+                {"detail": f"At most {BULK_MAX_ITEMS} tasks can be sent at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if request.method == "DELETE":
+            return self.bulk_destroy(request, items)
+
+        tasks = {}
+        if request.method == "PATCH":
+            task_ids = [
+                to_pk(item.get("id")) for item in items if isinstance(item, dict)
+            ]
+            tasks = Task.objects.in_bulk([pk for pk in task_ids if pk is not None])
+        context = self.bulk_context(items, tasks)
+
+        valid, errors = [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append(
+                    {"index": index, "errors": {"detail": "Expected an object."}}
+                )
+                continue
+            task = None
+            if request.method == "PATCH":
+                task = tasks.get(to_pk(item.get("id")))
+                if task is None:
+                    errors.append({"index": index, "errors": {"id": "Task not found."}})
+                    continue
+            denied = self.bulk_permission_error(request, item, task)
+            if denied:
+                errors.append({"index": index, "errors": denied})
+                continue
+            serializer = self.get_serializer_class()(
+                task, data=item, partial=task is not None, context=context
+            )
+            if not serializer.is_valid():
+                errors.append({"index": index, "errors": serializer.errors})
+                continue
+            valid.append(serializer)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            if request.method == "POST":
+                saved = self.bulk_insert(request, valid)
+                status_code = status.HTTP_201_CREATED
+            else:
+                saved = self.bulk_modify(valid)
+                status_code = status.HTTP_200_OK
+        serializer = self.get_serializer(saved, many=True)
+        return Response({"results": serializer.data}, status=status_code)
+
+    def bulk_context(self, items, tasks):
+        """
+        Serializer context with the projects, users and project memberships
+        referenced by the batch, each loaded with a single query
+        """
+        project_ids, user_ids = set(), set()
+        for task in tasks.values():
+            project_ids.add(task.project_id_id)
+            user_ids.add(task.assigned_to_id)
+        for item in items:
+            if isinstance(item, dict):
+                project_ids.add(to_pk(item.get("project_id")))
+                user_ids.add(to_pk(item.get("assigned_to")))
+        project_ids.discard(None)
+        user_ids.discard(None)
+        context = self.get_serializer_context()
+        context["prefetched"] = {
+            Project: Project.objects.in_bulk(project_ids),
+            User: User.objects.in_bulk(user_ids),
+        }
+        context["project_members"] = set(
+            Project.members.through.objects.filter(
+                project_id__in=project_ids, user_id__in=user_ids
+            ).values_list("project_id", "user_id")
+        )
+        return context
+
+    def bulk_permission_error(self, request, item, task):
+        """
+        Apply the create/update rules of view_permissions to one item
+        """
+        user = request.user
+        if user.role == ADMIN:
+            return None
+        if task is not None and user.role == TECH_LEAD:
+            if user.pk in (task.created_by_id, task.assigned_to_id):
+                return None
+            return {"detail": "Permission denied for user."}
+        project_id = item.get("project_id")
+        if project_id is None and task is not None:
+            project_id = task.project_id_id
+        if project_id is None:
+            return {"project": "Missing Project Field"}
+        if not can_access_project(request, to_pk(project_id)):
+            return {"detail": "Permission denied for user."}
+        return None
+
+    def bulk_insert(self, request, valid):
+        tasks = Task.objects.bulk_create(
+            Task(created_by_id=request.user.pk, **serializer.validated_data)
+            for serializer in valid
+        )
+        for task in tasks:
+            post_save.send(
+                sender=Task, instance=task, created=True, raw=False, bulk=True
+            )
+        index_objects(Task, tasks)
+        update_task_counters(tasks)
+        return tasks
+
+    def bulk_modify(self, valid):
+        now = timezone.now()
+        tasks, fields = [], {"updated_at"}
+        for serializer in valid:
+            task = serializer.instance
+            task._previous = {
+                "project_id_id": task.project_id_id,
+                "assigned_to_id": task.assigned_to_id,
+                "created_by_id": task.created_by_id,
+                "status": task.status,
+                "priority": task.priority,
+            }
+            for field, value in serializer.validated_data.items():
+                setattr(task, field, value)
+                fields.add(field)
+            task.updated_at = now
+            tasks.append(task)
+        Task.objects.bulk_update(tasks, sorted(fields))
+        for task in tasks:
+            post_save.send(
+                sender=Task, instance=task, created=False, raw=False, bulk=True
             )
-        return Response(serializer.data)
+        index_objects(Task, tasks)
+        update_task_counters(tasks)
+        return tasks
+
+    def can_bulk_destroy(self, request, task):
+        """
+        Apply the destroy rules of view_permissions to one task
+        """
+        user = request.user
+        if user.role == ADMIN:
+            return True
+        if user.role == PROJECT_MANAGER:
+            return task.project_id_id in get_project_access(user, request).all
+        return False
+
+    def bulk_destroy(self, request, items):
+        user = request.user
+        task_ids = [
+            to_pk(item.get("id") if isinstance(item, dict) else item) for item in items
+        ]
+        tasks = Task.objects.in_bulk([pk for pk in task_ids if pk is not None])
+        errors = []
+        for index, pk in enumerate(task_ids):
+            task = tasks.get(pk)
+            if task is None:
+                errors.append({"index": index, "errors": {"id": "Task not found."}})
+            elif not self.can_bulk_destroy(request, task):
+                denied = {"detail": "Permission denied for user."}
+                errors.append({"index": index, "errors": denied})
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            Task.objects.filter(pk__in=tasks).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(
+    QueryPlanMixin,
+    ArchiveMixin,
+    ConditionalRetrieveMixin,
+    PaginatedListMixin,
+    ModelViewSet,
+):
     """
     ViewSet for Comment model with role-based permissions and caching.
     Supports listing comments with pagination and restricted access based on roles.
@@ -285,6 +897,13 @@ class CommentViewSet(ModelViewSet):
 
     serializer_class = CommentSerializer
     queryset = Comment.objects.all()
+    archive_model = ArchivedComment
+    search_kind = "comment"
+    expandable = {
+        "author": CustomUserDetailsSerializer,
+        "task_id": TaskSerializer,
+        "project_id": ProjectSerializer,
+    }
 
     view_permissions = {
         "create": {
@@ -303,17 +922,17 @@ class CommentViewSet(ModelViewSet):
         },
         "retrieve": {
             ADMIN: True,
-            PROJECT_MANAGER: check_comment,
-            TECH_LEAD: check_comment,
-            DEVELOPER: check_comment,
-            CLIENT: check_comment,
+            PROJECT_MANAGER: is_visible,
+            TECH_LEAD: is_visible,
+            DEVELOPER: is_visible,
+            CLIENT: is_visible,
         },
         "update,partial_update": {
             ADMIN: True,
-            PROJECT_MANAGER: is_comment_author,
-            TECH_LEAD: is_comment_author,
-            DEVELOPER: is_comment_author,
-            CLIENT: is_comment_author,
+            PROJECT_MANAGER: is_visible,
+            TECH_LEAD: is_visible,
+            DEVELOPER: is_visible,
+            CLIENT: is_visible,
         },
         "options": {
             ADMIN: True,
@@ -324,15 +943,20 @@ class CommentViewSet(ModelViewSet):
         },
         "destroy": {
             ADMIN: True,
-            PROJECT_MANAGER: check_comment,
-            TECH_LEAD: check_comment,
-            DEVELOPER: check_comment,
+            PROJECT_MANAGER: is_visible,
+            TECH_LEAD: is_visible,
+            DEVELOPER: is_visible,
+        },
+        "export": {
+            ADMIN: True,
+            PROJECT_MANAGER: True,
+            TECH_LEAD: True,
+            DEVELOPER: True,
+            CLIENT: True,
         },
     }
 
-    @method_decorator(cache_page(60 * 2))
-    @method_decorator(vary_on_headers("Authorization"))
-    @method_decorator(vary_on_cookie)
+    @cached_list
     def list(self, request):
         """
         List comments with filtering based on user role:
@@ -341,44 +965,148 @@ class CommentViewSet(ModelViewSet):
         Implements pagination and error handling.
         """
         try:
-            comments = Comment.objects.all()
-            projects = Project.objects.all()
+            comments = self.list_queryset(request)
         except Exception as e:
             return Response(
-                {"detail": f"Error retrieving comments/projects: {str(e)}"},
+                {"detail": f"Error retrieving comments: {str(e)}"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        return self.paginated_response(request, comments)
+
+    def list_queryset(self, request, model=Comment):
+        return model.objects.visible_to(request.user, "list", request)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream all the comments of the list view as NDJSON (default) or CSV
+        with ``?output=csv``
+        """
+        return export_list(request, self.list_queryset(request), "comments")
+
+
+class CacheStatsViewSet(ViewSet):
+    """
+    Hit/miss statistics of the list cache, visible to admins only.
+    """
+
+    view_permissions = {"list": {ADMIN: True}}
+
+    def list(self, request):
+        return Response(get_stats())
+
+
+class MetricsViewSet(ViewSet):
+    """
+    Request histograms per view, action and role in the Prometheus text
+    format, visible to admins only.
+    """
+
+    view_permissions = {"list": {ADMIN: True}}
+
+    def list(self, request):
+        return HttpResponse(expose(), content_type="text/plain; version=0.0.4")
+
+
+class SyncViewSet(ViewSet):
+    """
+    Change feed for incremental sync.
+
+    ``GET /sync/?since=<watermark>`` returns the projects, tasks and comments
+    visible to the caller that changed after the watermark, the ids of those
+    that were deleted or are no longer visible, and the watermark to send
+    next time. While ``has_more`` is true the client calls again right away.
+
+    Without a watermark, or when the watermark has expired or was issued
+    before the caller's role or projects changed, ``reset`` is true: the
+    response starts a full snapshot and the client replaces its data.
+    Clients drop the tasks and comments of deleted projects and the
+    comments of deleted tasks themselves.
+    """
+
+    view_permissions = {
+        "list": {
+            ADMIN: True,
+            PROJECT_MANAGER: True,
+            TECH_LEAD: True,
+            DEVELOPER: True,
+            CLIENT: True,
+        }
+    }
+    sources = {
+        "projects": (Project, ProjectSerializer),
+        "tasks": (Task, TaskSerializer),
+        "comments": (Comment, CommentSerializer),
+    }
+    tombstone_kinds = {PROJECT: "projects", TASK: "tasks", COMMENT: "comments"}
+
+    def visible_tombstones(self, user, access):
+        if user.role == ADMIN:
+            return Tombstone.objects.all()
+        return Tombstone.objects.filter(
+            Q(kind=PROJECT, user_id=user.pk)
+            | Q(Task.objects.visibility_filter(user, "list", access), kind=TASK)
+            | Q(Comment.objects.visibility_filter(user, "list", access), kind=COMMENT)
+        )
+
+    def list(self, request):
         user = request.user
-        page = request.GET.get("page", 1)
-        if user.role == PROJECT_MANAGER:
-            projects = Project.objects.filter(
-                Q(created_by=user) | Q(members=user)
-            ).distinct()
-            tasks = Task.objects.filter(
-                Q(assigned_to=user) | Q(project_id__in=projects)
-            ).distinct()
-            task_ids = tasks.values_list("id", flat=True)
-            project_ids = projects.values_list("id", flat=True)
-
-            comments = Comment.objects.filter(
-                Q(task_id__in=task_ids) | Q(project_id__in=project_ids)
-            ).distinct()
-        elif user.role in [TECH_LEAD, DEVELOPER, CLIENT]:
-            tasks = Task.objects.filter(
-                Q(assigned_to=user) | Q(created_by=user)
-            ).distinct()
-            projects = Project.objects.filter(members=user)
-            task_ids = tasks.values_list("id", flat=True)
-            project_ids = projects.values_list("id", flat=True)
-
-            comments = Comment.objects.filter(
-                Q(task_id__in=task_ids) | Q(project_id__in=project_ids)
-            ).distinct()
+        access = get_project_access(user, request) if user.role != ADMIN else None
+        digest = access_digest(user, access)
+        cursors, reset = {}, True
+        if "since" in request.GET:
+            try:
+                watermark = decode_watermark(request.GET["since"])
+            except InvalidWatermark:
+                return Response(
+                    {"detail": "watermark is not valid"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if watermark.access == digest and not watermark.expired:
+                cursors, reset = watermark.cursors, False
+
+        floor = floor_cursor()
+        data, next_cursors, has_more = {"reset": reset}, {}, False
         try:
-            paginator = Paginator(comments, PAGE_SIZE)
-            serializer = self.get_serializer(paginator.page(page), many=True)
-        except Exception as e:
+            for name, (model, serializer_class) in self.sources.items():
+                queryset = plan_queryset(
+                    model.objects.visible_to(user, access=access), serializer_class
+                )
+                page = KeysetPaginator(queryset, "updated_at", SYNC_PAGE_SIZE).page(
+                    cursors.get(name)
+                )
+                data[name] = serializer_class(page.object_list, many=True).data
+                next_cursors[name] = page.next_cursor or floor
+                has_more = has_more or page.next_cursor is not None
+
+            deleted = {name: set() for name in self.sources}
+            if reset:
+                # The snapshot supersedes every earlier deletion
+                next_cursors["deleted"] = floor
+            else:
+                tombstones = self.visible_tombstones(user, access)
+                page = KeysetPaginator(tombstones, "deleted_at", SYNC_PAGE_SIZE).page(
+                    cursors.get("deleted")
+                )
+                for tombstone in page.object_list:
+                    name = self.tombstone_kinds[tombstone.kind]
+                    deleted[name].add(tombstone.object_id)
+                next_cursors["deleted"] = page.next_cursor or floor
+                has_more = has_more or page.next_cursor is not None
+        except InvalidCursor:
             return Response(
-                {"detail": "page is not valid"}, status=status.HTTP_400_BAD_REQUEST
+                {"detail": "watermark is not valid"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        return Response(serializer.data)
+
+        for name, (model, _) in self.sources.items():
+            if deleted[name]:
+                # Moved objects that the caller can still see are not deleted
+                still_visible = model.objects.visible_to(user, access=access).filter(
+                    pk__in=deleted[name]
+                )
+                deleted[name] -= set(still_visible.values_list("pk", flat=True))
+        data["deleted"] = {name: sorted(ids) for name, ids in deleted.items()}
+        data["has_more"] = has_more
+        data["watermark"] = encode_watermark(next_cursors, digest)
+        return Response(data)
@@ -2,6 +2,8 @@
 ASGI config for task_management_system project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it to use the async views under ``async/``, notably the server-sent
+events stream at ``async/events/``, which holds a connection per client.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -12,5 +14,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "task_management_system.settings")
+# Sync code runs in threads that come and go under ASGI, and persistent
+# connections are only closed at the end of requests of the thread that
+# opened them, so they would pile up
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
@@ -2,6 +2,7 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 
 load_dotenv()
 
@@ -39,7 +40,7 @@ REST_FRAMEWORK_ROLES = {
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.StatelessJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
@@ -49,11 +50,13 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=2),
+    "TOKEN_OBTAIN_SERIALIZER": "core.serializers.RoleTokenObtainPairSerializer",
 }
 
 AUTH_USER_MODEL = "core.User"
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -86,13 +89,135 @@ WSGI_APPLICATION = "task_management_system.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DB_ENGINE selects the profile, "sqlite" (default) or "postgresql".
+#
+# SQLite runs in WAL mode so that readers no longer wait for the writer, with
+# synchronous=NORMAL (durable at each checkpoint rather than each commit in
+# WAL mode) and memory mapped reads. Transactions start IMMEDIATE so that
+# concurrent writers queue on the busy timeout instead of failing when
+# upgrading a read lock. Connections are kept for DB_CONN_MAX_AGE seconds
+# under WSGI; asgi.py defaults it to 0, since persistent connections are
+# per thread and the threads running sync code under ASGI are not reused.
+# SQLITE_JOURNAL_MODE=DELETE SQLITE_SYNCHRONOUS=FULL DB_CONN_MAX_AGE=0 gives
+# back the previous behaviour, e.g. to compare with benchmark_db_concurrency.
+#
+# PostgreSQL uses the connection pool of Django 5.1+, which needs the
+# psycopg[pool] package. Pooled connections are returned at the end of each
+# request, so CONN_MAX_AGE stays 0.
+
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DB_NAME", "task_management_system"),
+            "USER": os.environ.get("DB_USER", ""),
+            "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", ""),
+            "PORT": os.environ.get("DB_PORT", ""),
+            "OPTIONS": {
+                "pool": {
+                    "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+                    "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+                    "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+                },
+            },
+        }
     }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 600)),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "timeout": float(os.environ.get("DB_TIMEOUT", 20)),
+                "transaction_mode": "IMMEDIATE",
+                "init_command": ";".join(
+                    [
+                        "PRAGMA journal_mode="
+                        + os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+                        "PRAGMA synchronous="
+                        + os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+                        "PRAGMA mmap_size="
+                        + os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+                        "PRAGMA temp_store=MEMORY",
+                    ]
+                ),
+            },
+        }
+    }
+
+
+# Cache
+# The default cache holds the project access index, the list cache
+# generation counters, the permission decisions and the auth state of the
+# users, which every worker process must agree on: a save in one worker
+# has to invalidate them in all of them. LocMemCache is private to its
+# process, so it is only correct with a single worker. CACHE_URL shares the
+# default cache between the workers, "redis://host:6379/0" with Redis (the
+# redis package) or "memcached://host:11211" with Memcached (pymemcache).
+# Without it, WEB_CONCURRENCY (the worker count read by gunicorn and
+# uvicorn) must stay 1. "query_results" holds the cached list responses,
+# keyed by the generations, so it may stay local to each process.
+
+CACHE_URL = os.environ.get("CACHE_URL", "")
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+if CACHE_URL.startswith(("redis://", "rediss://", "unix://")):
+    DEFAULT_CACHE = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": CACHE_URL,
+    }
+elif CACHE_URL.startswith("memcached://"):
+    DEFAULT_CACHE = {
+        "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+        "LOCATION": CACHE_URL.removeprefix("memcached://"),
+    }
+elif CACHE_URL:
+    raise ImproperlyConfigured(f"Unsupported CACHE_URL: {CACHE_URL}")
+elif WEB_CONCURRENCY > 1:
+    raise ImproperlyConfigured(
+        "WEB_CONCURRENCY > 1 needs a shared default cache, set CACHE_URL"
+    )
+else:
+    DEFAULT_CACHE = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "default",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+
+# The server-sent events stream at async/events/ is fed by a broker living
+# in each process, so behind several workers a client would only get the
+# changes made by the worker it is connected to. EVENT_STREAM=false turns
+# the stream off, which several workers require.
+EVENT_STREAM = os.environ.get("EVENT_STREAM", "true").lower() in ("1", "true")
+if WEB_CONCURRENCY > 1 and EVENT_STREAM:
+    raise ImproperlyConfigured(
+        "WEB_CONCURRENCY > 1 needs EVENT_STREAM=false, events are per process"
+    )
+
+CACHES = {
+    "default": {**DEFAULT_CACHE, "TIMEOUT": 60 * 10},
+    "query_results": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "query-results",
+        "TIMEOUT": 60 * 10,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
 }
 
+# Seconds for which the role and active flag of a token's user are cached.
+# Saving a user updates them in the default cache, so with a shared cache a
+# role change or deactivation applies at once and the state can be kept
+# long; with a process-local one, other processes would keep accepting the
+# old state until it expires, so it is only kept for a few seconds.
+AUTH_STATE_CACHE_TIMEOUT = int(
+    os.environ.get("AUTH_STATE_CACHE_TIMEOUT", 60 * 10 if CACHE_URL else 5)
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -112,6 +237,16 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# PASSWORD_HASHER_PROFILE=fast hashes passwords with MD5 instead of PBKDF2,
+# which is only meant for throwaway setups. The test runner uses it too
+# unless PASSWORD_HASHER_PROFILE is set to another profile.
+PASSWORD_HASHER_PROFILE = os.environ.get("PASSWORD_HASHER_PROFILE", "default")
+FAST_PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+if PASSWORD_HASHER_PROFILE == "fast":
+    PASSWORD_HASHERS = FAST_PASSWORD_HASHERS
+
+TEST_RUNNER = "core.tests.runner.TestRunner"
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
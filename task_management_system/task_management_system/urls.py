@@ -1,22 +1,43 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework import routers
-from core import views
+from core import async_views, views
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
     TokenVerifyView,
 )
 
-
 router = routers.DefaultRouter()
 router.register(r"users", views.UserViewSet)
 router.register(r"projects", views.ProjectViewSet)
 router.register(r"tasks", views.TaskViewSet)
 router.register(r"comments", views.CommentViewSet)
+router.register(r"cache-stats", views.CacheStatsViewSet, basename="cache-stats")
+router.register(r"sync", views.SyncViewSet, basename="sync")
+router.register(r"metrics", views.MetricsViewSet, basename="metrics")
+
+async_patterns = []
+for prefix, view in [
+    ("users", async_views.AsyncUserView),
+    ("projects", async_views.AsyncProjectView),
+    ("tasks", async_views.AsyncTaskView),
+    ("comments", async_views.AsyncCommentView),
+]:
+    async_patterns += [
+        path(f"{prefix}/", view.as_view(), name=f"{view.basename}-list"),
+        path(f"{prefix}/<int:pk>/", view.as_view(), name=f"{view.basename}-detail"),
+    ]
+
+if settings.EVENT_STREAM:
+    async_patterns.append(
+        path("events/", async_views.EventStreamView.as_view(), name="events")
+    )
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("async/", include(async_patterns)),
     path("admin/", admin.site.urls),
     path("api-auth/", include("rest_framework.urls")),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),